@@ -0,0 +1,145 @@
+"""Benchmark iqm.alerts against recomputing the whole window on every sample.
+
+Days are generated from src/data/latest_data.json with random scaling (as in
+bench_columnar.py), streamed hour by hour and at 15-minute resolution for
+several terminals. Checks that
+
+- the default rules match staffing.alert_levels on every day (needs NumPy)
+- revising random past slots leaves the same levels as replaying the final
+  numbers into a fresh engine
+
+then times the incremental engine per sample.
+
+Usage (from the project root):
+    python benchmarks/bench_alerts.py --days 365 --terminals 4
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from iqm.alerts import LEVELS, AlertEngine, default_rules, hour_values
+
+try:
+    from iqm.staffing import alert_levels
+except ImportError:  # NumPy not installed
+    alert_levels = None
+
+SOURCE = os.path.join(ROOT_DIR, "src", "data", "latest_data.json")
+
+# Per-zone rules on top of the defaults, so every sample touches several windows
+ZONE_RULES = [
+    {"name": f"{direction}-{zone}-busy", "scope": f"{direction}.{zone}", "level": "orange",
+     "threshold": 1800, "window": 2, "mode": "mean"}
+    for direction in ("arrival", "departure") for zone in ("AB", "C", "D", "EF")
+] + [{"name": "arrival-3h", "scope": "arrival", "level": "yellow", "threshold": 4000, "window": 3, "mode": "all"}]
+
+
+def synthetic_days(days, seed=0):
+    rng = random.Random(seed)
+    with open(SOURCE, encoding="utf-8") as f:
+        base = json.load(f)
+    start = date(2025, 1, 1)
+    for i in range(days):
+        record = copy.deepcopy(base)
+        record["date"] = (start + timedelta(days=i)).isoformat()
+        scale = rng.uniform(0.7, 1.6)
+        for row in record["hourlyData"]:
+            for direction in ("arrival", "departure"):
+                zones = row[direction]
+                for zone in ("AB", "C", "D", "EF"):
+                    zones[zone] = int(zones[zone] * scale * rng.uniform(0.9, 1.1))
+                zones["total"] = zones["AB"] + zones["C"] + zones["D"] + zones["EF"]
+        yield record
+
+
+def check_default_rules(records):
+    if alert_levels is None:
+        print("default rules vs staffing.alert_levels: skipped (NumPy not installed)")
+        return True
+    engine = AlertEngine()
+    mismatches = 0
+    for record in records:
+        series = record["date"]  # one series per day: the JS calculation restarts at midnight
+        engine.push_forecast(record, series=series)
+        expected = [LEVELS[i] for i in alert_levels([hour_values(row)["total"] for row in record["hourlyData"]],
+                                                    {"blue": 7000, "yellow": 7600, "orange": 8200, "red": 8600})]
+        alerts = {a["time"][11:13]: a["level"] for a in engine.state(series)["series"][series]["scopes"]["total"]["alerts"]}
+        actual = [alerts.get(f"{row['hourStart']:02d}", "normal") for row in record["hourlyData"]]
+        mismatches += expected != actual
+    print(f"default rules vs staffing.alert_levels: {len(records)} days, {mismatches} mismatched")
+    return mismatches == 0
+
+
+def check_revisions(records, seed=1):
+    rng = random.Random(seed)
+    rules = default_rules() + ZONE_RULES
+    live = AlertEngine(rules)
+    final = {}
+    for record in records:
+        day = datetime.strptime(record["date"], "%Y-%m-%d")
+        for row in record["hourlyData"]:
+            when = day + timedelta(hours=row["hourStart"])
+            values = hour_values(row)
+            live.push("T1", when, values)
+            final[when] = values
+            # Re-publish one of the last few hours with new numbers
+            past = when - timedelta(hours=rng.randint(0, 5))
+            if past in final and rng.random() < 0.3:
+                revised = {scope: int(value * rng.uniform(0.8, 1.2)) for scope, value in final[past].items()}
+                final[past] = revised
+                live.push("T1", past, revised)
+    replay = AlertEngine(rules)
+    for when in sorted(final):
+        replay.push("T1", when, final[when])
+    same = live.state()["series"] == replay.state()["series"]
+    print(f"revised slots vs fresh replay: {'identical' if same else 'DIFFERENT'}")
+    return same
+
+
+def bench_stream(records, terminals, resolution):
+    engine = AlertEngine(default_rules() + ZONE_RULES)
+    slots = 60 // resolution
+    samples = []
+    for record in records:
+        day = datetime.strptime(record["date"], "%Y-%m-%d")
+        for row in record["hourlyData"]:
+            values = hour_values(row)
+            part = {scope: value / slots for scope, value in values.items()}
+            for k in range(slots):
+                samples.append((day + timedelta(hours=row["hourStart"], minutes=k * resolution), part))
+    start = time.perf_counter()
+    for when, values in samples:
+        for t in range(terminals):
+            engine.push(f"T{t + 1}", when, values, resolution=resolution)
+    elapsed = time.perf_counter() - start
+    count = len(samples) * terminals
+    stats = engine.stats()
+    print(f"{resolution:>2}-minute slots: {count:>8} samples x {len(engine.rules)} rules in {elapsed:.2f} s "
+          f"({elapsed / count * 1e6:.1f} us/sample), {stats['transitions']} transitions")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the streaming alert engine")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--terminals", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    records = list(synthetic_days(args.days))
+    ok = check_default_rules(records)
+    ok = check_revisions(records[:60]) and ok
+    for resolution in (60, 15):
+        bench_stream(records, args.terminals, resolution)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Benchmark iqm.columnar over a year of synthetic hourly data.
+
+Days are generated from src/data/latest_data.json with random scaling, so
+the shape matches real forecasts. Checks the JSON round trip is lossless,
+then times conversion, save/mmap-load and the aggregations.
+
+Usage (from the project root):
+    python benchmarks/bench_columnar.py --days 365
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from iqm.columnar import HourlyColumns
+
+SOURCE = os.path.join(ROOT_DIR, "src", "data", "latest_data.json")
+
+
+def synthetic_records(days, seed=0):
+    rng = random.Random(seed)
+    with open(SOURCE, encoding="utf-8") as f:
+        base = json.load(f)
+    start = date(2025, 1, 1)
+    records = []
+    for i in range(days):
+        record = copy.deepcopy(base)
+        record["date"] = (start + timedelta(days=i)).isoformat()
+        scale = rng.uniform(0.7, 1.3)
+        for row in record["hourlyData"]:
+            for direction in ("arrival", "departure"):
+                zones = row[direction]
+                for zone in ("AB", "C", "D", "EF"):
+                    zones[zone] = int(zones[zone] * scale)
+                zones["total"] = zones["AB"] + zones["C"] + zones["D"] + zones["EF"]
+        records.append(record)
+    return records
+
+
+def timed(label, fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:>9.3f} ms")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark columnar hourly data")
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args(argv)
+
+    records = synthetic_records(args.days)
+    cols = timed("from_records", lambda: HourlyColumns.from_records(records), repeat=3)
+    if cols.to_records() != records:
+        print("Round trip mismatch")
+        return 1
+    print(f"{args.days} days, counts array {cols.counts.nbytes / 1024:.0f} KiB "
+          f"(JSON {len(json.dumps(records)) / 1024:.0f} KiB)")
+
+    timed("to_records", cols.to_records, repeat=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        timed("save", lambda: cols.save(tmp), repeat=3)
+        loaded = timed("load (mmap)", lambda: HourlyColumns.load(tmp))
+        timed("daily_totals (mmap)", loaded.daily_totals)
+        timed("zone_peaks (mmap)", loaded.zone_peaks)
+        timed("hour_of_week_profile (mmap)", loaded.hour_of_week_profile)
+        del loaded
+    timed("daily_totals", cols.daily_totals)
+    timed("zone_totals", cols.zone_totals)
+    timed("zone_peaks", cols.zone_peaks)
+    timed("hour_of_week_profile mean", cols.hour_of_week_profile)
+    timed("hour_of_week_profile max", lambda: cols.hour_of_week_profile(stat="max"))
+    timed("summary", cols.summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Parse-time benchmark for iqm.parser on saved airport.kr pages.
+
+Usage (from the project root):
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --repeat 500 --backend stream --backend lxml
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from iqm import parser as airport_parser
+
+FIXTURE_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+
+
+def time_backend(html, backend, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        airport_parser.parse_airport_html(html, backend=backend)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark airport page parsing")
+    arg_parser.add_argument("--repeat", type=int, default=200)
+    arg_parser.add_argument("--backend", action="append", choices=airport_parser.BACKENDS,
+                            help="backend(s) to run (default: all available)")
+    arg_parser.add_argument("--fixtures", default=os.path.join(FIXTURE_DIR, "883_*.html"))
+    args = arg_parser.parse_args(argv)
+
+    backends = args.backend or airport_parser.available_backends()
+    fixtures = sorted(glob.glob(args.fixtures))
+    if not fixtures:
+        print(f"No fixtures matched {args.fixtures}")
+        return 1
+
+    print(f"{'fixture':<32} {'backend':<8} {'rows':>4} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'min ms':>9}")
+    for path in fixtures:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+
+        # All backends must agree before their timings mean anything
+        reference = None
+        for backend in backends:
+            rows = airport_parser.parse_airport_html(html, backend=backend)["hourlyData"]
+            if reference is None:
+                reference = rows
+            elif rows != reference:
+                print(f"{os.path.basename(path)}: backend {backend} output differs from {backends[0]}")
+                return 1
+
+        for backend in backends:
+            samples = sorted(time_backend(html, backend, args.repeat))
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{os.path.basename(path):<32} {backend:<8} {len(reference):>4} "
+                  f"{statistics.mean(samples):>9.3f} {statistics.median(samples):>9.3f} "
+                  f"{p95:>9.3f} {samples[0]:>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""End-to-end benchmark: scrape -> parse -> compute -> save -> serve, fully offline.
+
+Stages:
+- parse.*     parse_airport_html / parse_short_term / parse_long_term on the
+              recorded 883/964/965 fixtures
+- save.*      atomic_write_json of latest_data.json and parking_data.json
+- compute.*   staffing.compute_requirements with default settings (NumPy)
+- fetch.pages one fetch_all round of all three pages (as scripts/fetch_data.py)
+              against the mock upstream in benchmarks/upstream.py
+- serve.*     GET /api/airport-data against an in-process server.py whose
+              upstream is the mock, with --concurrency clients:
+                uncached     cache TTL 0 and every upstream page differs
+                parse-reuse  cache TTL 0, unchanged page (parse skipped)
+                cached       default cache TTL (served from memory)
+
+--fault KEY=VALUE injects mock upstream faults (see benchmarks/upstream.py)
+into fetch.* and serve.*, e.g. --fault error_rate=0.1 --fault delay=0.05,
+to measure throughput and error rates while upstream degrades.
+
+Every stage reports latency percentiles (ms) and peak traced memory per
+call (KB, tracemalloc, measured in a separate sequential pass). For serve.*
+the client runs in the same process, so its allocations are included.
+
+Usage (from the project root):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --requests 1000 --concurrency 32 --save
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<earlier>.json
+    python benchmarks/bench_pipeline.py --skip-offline --fault hang_rate=0.05 --fault hang=3 --upstream-timeout 1
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import server
+from iqm.fetch import (PARKING_LONG_PATH, PARKING_SHORT_PATH, PASSENGER_PATH, PageJob, atomic_write_json,
+                       fetch_all, make_session)
+from iqm.parking import new_parking_result, parse_long_term, parse_short_term
+from iqm.parser import parse_airport_html
+
+from upstream import PAGES, Faults, MockUpstream
+
+try:
+    from iqm import staffing
+except ImportError:  # NumPy not installed
+    staffing = None
+
+FIXTURE_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+SERVE_SCENARIOS = (
+    # name, cache TTL, upstream varies every response
+    ("uncached", 0, True),
+    ("parse-reuse", 0, False),
+    ("cached", server.CACHE_TTL, False),
+)
+
+
+def percentile(sorted_samples, pct):
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples_ms):
+    s = sorted(samples_ms)
+    return {
+        "n": len(s),
+        "mean": round(sum(s) / len(s), 3),
+        "p50": round(percentile(s, 50), 3),
+        "p95": round(percentile(s, 95), 3),
+        "p99": round(percentile(s, 99), 3),
+        "min": round(s[0], 3),
+        "max": round(s[-1], 3),
+    }
+
+
+def time_calls(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def peak_kb(func, samples):
+    """Mean tracemalloc peak (KB) over `samples` sequential calls."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return round(sum(peaks) / len(peaks) / 1024, 1)
+
+
+def read_fixture(path):
+    with open(os.path.join(FIXTURE_DIR, PAGES[path]), encoding="utf-8") as f:
+        return f.read()
+
+
+def make_faults(overrides, **fixed):
+    faults = Faults()
+    faults.update({**overrides, **fixed})
+    return faults
+
+
+def bench_offline(repeat, memory_samples):
+    passenger = read_fixture(PASSENGER_PATH)
+    short_html, long_html = read_fixture(PARKING_SHORT_PATH), read_fixture(PARKING_LONG_PATH)
+    forecast = parse_airport_html(passenger)
+    parking = new_parking_result()
+    parking["shortTerm"] = parse_short_term(short_html)
+    parking["longTerm"] = parse_long_term(long_html)
+
+    tmp_dir = tempfile.mkdtemp(prefix="iqm-bench-")
+    stages = {
+        "parse.883": lambda: parse_airport_html(passenger),
+        "parse.964": lambda: parse_short_term(short_html),
+        "parse.965": lambda: parse_long_term(long_html),
+        "save.latest_data": lambda: atomic_write_json(forecast, os.path.join(tmp_dir, "latest_data.json")),
+        "save.parking_data": lambda: atomic_write_json(parking, os.path.join(tmp_dir, "parking_data.json")),
+    }
+    if staffing is not None:
+        stages["compute.staffing"] = lambda: staffing.compute_requirements(forecast)
+
+    results = {}
+    try:
+        for name, func in stages.items():
+            func()  # warm up
+            results[name] = summarize(time_calls(func, repeat))
+            results[name]["memKB"] = peak_kb(func, memory_samples)
+    finally:
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+    return results
+
+
+def run_load(url, total, concurrency):
+    """`total` GETs from `concurrency` keep-alive clients; returns (latencies ms, errors, wall s)."""
+    local = threading.local()
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = session.get(url, timeout=30).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    return [ms for ms, _ in outcomes], sum(1 for _, ok in outcomes if not ok), wall
+
+
+def bench_fetch(rounds, memory_samples, fault_overrides, timeout):
+    """`rounds` sequential fetch_all rounds of the three pages; failed pages are counted, not timed apart."""
+    upstream = MockUpstream(faults=make_faults(fault_overrides), seed=0).start()
+    base = upstream.base_url
+    jobs = {
+        "airport": PageJob(base + PASSENGER_PATH, None, parse_airport_html),
+        "shortTerm": PageJob(base + PARKING_SHORT_PATH, None, parse_short_term),
+        "longTerm": PageJob(base + PARKING_LONG_PATH, None, parse_long_term),
+    }
+    # No retries: measure what upstream faults cost per attempt
+    session = make_session(pool_size=3, retries=0)
+    latencies, failed = [], 0
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            results = fetch_all(session, jobs, timeout=timeout)
+            latencies.append((time.perf_counter() - start) * 1000)
+            failed += sum(1 for res in results.values() if res.error is not None)
+        mem = peak_kb(lambda: fetch_all(session, jobs, timeout=timeout), memory_samples)
+    finally:
+        upstream.stop()
+    result = summarize(latencies)
+    result.update({"memKB": mem, "errors": failed, "upstream": upstream.stats()["outcomes"]})
+    return {"fetch.pages": result}
+
+
+def bench_serve(total, concurrency, memory_samples, fault_overrides, timeout):
+    results = {}
+    for name, ttl, vary in SERVE_SCENARIOS:
+        upstream = MockUpstream(faults=make_faults(fault_overrides, vary=vary), seed=0).start()
+        httpd = server.make_server(port=0, workers=max(server.MAX_WORKERS, concurrency * 2), cache_ttl=ttl,
+                                   stream_interval=0, upstream_timeout=timeout, upstream=upstream.base_url)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/api/airport-data"
+        try:
+            run_load(url, min(total, 20), concurrency)  # warm up
+            latencies, errors, wall = run_load(url, total, concurrency)
+            with requests.Session() as session:
+                mem = peak_kb(lambda: session.get(url, timeout=30), memory_samples)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            upstream.stop()
+
+        result = summarize(latencies)
+        result.update({
+            "memKB": mem,
+            "errors": errors,
+            "rps": round(total / wall, 1),
+            "upstream": upstream.stats()["outcomes"],
+        })
+        results[f"serve.{name}"] = result
+    return results
+
+
+def parse_faults(items):
+    """["error_rate=0.1", "layout=no-id", "vary=true"] -> validated overrides dict."""
+    overrides = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--fault expects KEY=VALUE, got {item!r}")
+        overrides[key] = value.lower() == "true" if value.lower() in ("true", "false") else value
+    Faults().update(overrides)  # validate now rather than inside a scenario
+    return overrides
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'stage':<22} {'n':>5} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mem KB':>8} {'rps':>8}")
+    for name, r in results.items():
+        rps = f"{r['rps']:>8.1f}" if "rps" in r else f"{'':>8}"
+        print(f"{name:<22} {r['n']:>5} {r['mean']:>9.3f} {r['p50']:>9.3f} {r['p95']:>9.3f} {r['p99']:>9.3f} "
+              f"{r['memKB']:>8.1f} {rps}")
+        if r.get("errors"):
+            print(f"  {r['errors']} failed")
+        if r.get("upstream"):
+            print(f"  upstream: {', '.join(f'{k} {v}' for k, v in sorted(r['upstream'].items()))}")
+
+
+def print_comparison(before, after):
+    print(f"\nCompared with {before['meta'].get('revision')} ({before['meta'].get('timestamp')}):")
+    print(f"{'stage':<22} {'p50 before':>11} {'p50 after':>10} {'change':>8} {'p95 before':>11} {'p95 after':>10} {'change':>8}")
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+7.1f}%" if old else f"{'':>8}"
+
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        print(f"{name:<22} {old['p50']:>11.3f} {new['p50']:>10.3f} {change(old['p50'], new['p50'])} "
+              f"{old['p95']:>11.3f} {new['p95']:>10.3f} {change(old['p95'], new['p95'])}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark the scrape/parse/compute/serve pipeline offline")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="calls per offline stage")
+    arg_parser.add_argument("--requests", type=int, default=400, help="requests per serve scenario")
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients for serve.*")
+    arg_parser.add_argument("--memory-samples", type=int, default=20, help="calls traced per stage for memKB")
+    arg_parser.add_argument("--rounds", type=int, default=50, help="fetch_all rounds for fetch.pages")
+    arg_parser.add_argument("--fault", action="append", default=[], metavar="KEY=VALUE",
+                            help="mock upstream fault for fetch.*/serve.* (repeatable)")
+    arg_parser.add_argument("--upstream-timeout", type=float, default=server.UPSTREAM_TIMEOUT,
+                            help="per-request upstream timeout in fetch.*/serve.*")
+    arg_parser.add_argument("--skip-offline", action="store_true", help="skip the parse/save/compute stages")
+    arg_parser.add_argument("--skip-serve", action="store_true", help="skip the fetch and serve stages")
+    arg_parser.add_argument("--save", nargs="?", const="", metavar="PATH",
+                            help="write results as JSON (default: benchmarks/results/<time>-<revision>.json)")
+    arg_parser.add_argument("--compare", metavar="PATH", help="earlier results file to compare against")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        faults = parse_faults(args.fault)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    # Injected upstream faults make the in-process server log expected errors
+    logging.disable(logging.CRITICAL)
+
+    results = {} if args.skip_offline else bench_offline(args.repeat, args.memory_samples)
+    if not args.skip_serve:
+        results.update(bench_fetch(args.rounds, args.memory_samples, faults, args.upstream_timeout))
+        results.update(bench_serve(args.requests, args.concurrency, args.memory_samples, faults,
+                                   args.upstream_timeout))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": staffing is not None,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+
+    if args.save is not None:
+        path = args.save or os.path.join(
+            RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['revision'] or 'unknown'}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""Mock airport.kr for load and resilience testing, built from the recorded fixtures.
+
+    /ap_ko/883/subview.do?pday=YYYYMMDD[&terminal=T2]  passenger forecast for any day / terminal
+    /ap_ko/964/subview.do                short-term parking
+    /ap_ko/965/subview.do                long-term parking
+
+The 883 table is regenerated per pday: the fixture's counts scaled by a
+per-day factor with per-cell noise (seeded by the date and terminal, so the
+same request always returns the same page; the fixture's own day returns it
+unchanged for T1).
+Parking counts change once a minute.
+
+Faults (all off by default) are set with command-line options or at run
+time with POST /__mock/faults {"error_rate": 0.2, ...}:
+
+    delay, jitter        fixed + uniform random seconds added per response
+    error_rate           fraction answered with error_status (default 503)
+    hang_rate, hang      fraction that stall `hang` seconds before answering
+    truncate_rate        fraction cut off in the middle of the data table
+    layout               normal | no-id (table/container ids removed)
+                         | missing-column (11 cells per row)
+                         | renamed-labels (parking labels the parser won't match)
+    vary                 per-request comment inside the data table (defeats parse reuse)
+    validators           send ETag and answer If-None-Match with 304
+
+GET /__mock/faults and GET /__mock/stats report the current settings and
+per-outcome counts; POST /__mock/reset restores defaults and zeroes them.
+
+Usage (from the project root):
+    python benchmarks/upstream.py --port 8090 --delay 0.2 --error-rate 0.1
+    python server.py --upstream http://localhost:8090
+    IQM_UPSTREAM=http://localhost:8090 python scripts/fetch_data.py
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import http.server
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from iqm.fetch import PARKING_LONG_PATH, PARKING_SHORT_PATH, PASSENGER_PATH
+from iqm.parser import extract_table_rows
+
+FIXTURE_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+PAGES = {
+    PASSENGER_PATH: "883_passenger.html",
+    PARKING_SHORT_PATH: "964_parking_short.html",
+    PARKING_LONG_PATH: "965_parking_long.html",
+}
+LAYOUTS = ("normal", "no-id", "missing-column", "renamed-labels")
+
+DATA_ELEMENT_RE = re.compile(r"""\bid\s*=\s*["']?(?:userEx|menu\d+_obj\d+)["'\s][^>]*>""")
+DATA_ID_RE = re.compile(r"""\s\bid\s*=\s*["']?(?:userEx|menu\d+_obj\d+)["']?""")
+PDAY_INPUT_RE = re.compile(r'(name="pday" value=")(\d{8})(")')
+PARKING_VALUE_RE = re.compile(r'(<span class="num-noti"><strong>)([^<]*)(</strong>)')
+LAST_CELL_RE = re.compile(r'\s*<td class="num">(?:(?!<td).)*?</td>(\s*</tr>)', re.DOTALL)
+RENAMED_LABELS = {"지상 1층": "1F", "지하 1층": "B1", "지하 2층": "B2", "장기주차장 P": "LOT P", "주차타워": "TOWER"}
+
+
+@dataclasses.dataclass
+class Faults:
+    delay: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    hang_rate: float = 0.0
+    hang: float = 30.0
+    truncate_rate: float = 0.0
+    layout: str = "normal"
+    vary: bool = False
+    validators: bool = False
+
+    def update(self, values):
+        """Apply a partial {field: value} dict; raises ValueError on unknown fields or bad values."""
+        types = {f.name: f.type for f in dataclasses.fields(self)}
+        changes = {}
+        for key, value in values.items():
+            if key not in types:
+                raise ValueError(f"Unknown fault: {key}")
+            kind = types[key]
+            if kind is bool and not isinstance(value, bool):
+                raise ValueError(f"{key} must be true or false")
+            value = kind(value)
+            if key.endswith("_rate") and not 0 <= value <= 1:
+                raise ValueError(f"{key} must be between 0 and 1")
+            if key == "layout" and value not in LAYOUTS:
+                raise ValueError(f"layout must be one of {', '.join(LAYOUTS)}")
+            changes[key] = value
+        if sum(changes.get(k, getattr(self, k)) for k in ("error_rate", "hang_rate", "truncate_rate")) > 1:
+            raise ValueError("error_rate + hang_rate + truncate_rate must not exceed 1")
+        for key, value in changes.items():
+            setattr(self, key, value)
+
+
+class PassengerPages:
+    """883 pages for any pday, rendered in the fixture's markup."""
+
+    def __init__(self, html):
+        start = html.index("<tbody", html.index('id="userEx"'))
+        start = html.index(">", start) + 1
+        end = html.index("</tbody>", start)
+        self.head, self.tail = html[:start], html[end:]
+        self.fixture_pday = PDAY_INPUT_RE.search(self.head).group(2)
+        self.rows = [row for row in extract_table_rows(html) if row[0] != "합계"]
+
+    def render(self, pday, terminal="T1"):
+        rng = random.Random(pday if terminal == "T1" else f"{pday}:{terminal}")
+        exact = pday == self.fixture_pday and terminal == "T1"
+        factor = 1.0 if exact else rng.uniform(0.8, 1.2)
+        body, totals = [], [0] * 11
+        for row in self.rows:
+            cells = [int(v) for v in row[1:12]]
+            if not exact:
+                cells = [round(v * factor * rng.uniform(0.9, 1.1)) for v in cells]
+            cells[4], cells[10] = sum(cells[0:4]), sum(cells[5:10])
+            totals = [a + b for a, b in zip(totals, cells)]
+            body.append(self._row(row[0], (f"{v:,}" for v in cells)))
+        body.append(self._row("합계", (f"<strong>{v:,}</strong>" for v in totals), ' class="total"'))
+        head = PDAY_INPUT_RE.sub(lambda m: m.group(1) + pday + m.group(3), self.head)
+        if terminal != "T1":
+            head = head.replace('value="T1" selected', 'value="T1"').replace(
+                f'value="{terminal}"', f'value="{terminal}" selected')
+        return head + "".join(body) + "\n            " + self.tail
+
+    @staticmethod
+    def _row(label, cells, attrs=""):
+        tds = "".join(f'\n              <td class="num">{cell}</td>' for cell in cells)
+        return f'\n            <tr{attrs}>\n              <th scope="row">{label}</th>{tds}\n            </tr>'
+
+
+def parking_page(html, minute):
+    # Deterministic per page and minute; ~5% of lots show "만차"
+    rng = random.Random(f"{len(html)}:{minute}")
+
+    def value(m):
+        base = int(m.group(2).replace(",", "")) if m.group(2)[:1].isdigit() else 300
+        text = "만차" if rng.random() < 0.05 else f"{max(0, round(base * rng.uniform(0.5, 1.5))):,}"
+        return m.group(1) + text + m.group(3)
+
+    return PARKING_VALUE_RE.sub(value, html)
+
+
+def apply_layout(html, layout):
+    if layout == "no-id":
+        return DATA_ID_RE.sub("", html, count=1)
+    if layout == "missing-column":
+        return LAST_CELL_RE.sub(r"\1", html)
+    if layout == "renamed-labels":
+        for old, new in RENAMED_LABELS.items():
+            html = html.replace(f'<span class="num-txt">{old}', f'<span class="num-txt">{new}')
+    return html
+
+
+def truncate(html):
+    # Cut off a little way into the data table/container
+    match = DATA_ELEMENT_RE.search(html)
+    start = match.end() if match else 0
+    return html[:start + (len(html) - start) // 4]
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real site
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        mock = self.server.mock
+        if url.path == "/__mock/faults":
+            self.send_json(200, dataclasses.asdict(mock.faults))
+        elif url.path == "/__mock/stats":
+            self.send_json(200, mock.stats())
+        elif url.path in mock.templates:
+            self.send_page(url)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        mock = self.server.mock
+        if self.path == "/__mock/reset":
+            mock.reset()
+            self.send_json(200, dataclasses.asdict(mock.faults))
+            return
+        if self.path != "/__mock/faults":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            with mock.lock:
+                mock.faults.update(json.loads(self.rfile.read(length) or b"{}"))
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(200, dataclasses.asdict(mock.faults))
+
+    def send_page(self, url):
+        mock = self.server.mock
+        with mock.lock:
+            faults = dataclasses.replace(mock.faults)
+            roll = mock.rng.random()
+            n = next(mock.counter)
+        delay = faults.delay + (mock.rng.uniform(0, faults.jitter) if faults.jitter else 0)
+
+        if roll < faults.error_rate:
+            time.sleep(delay)
+            mock.record(url.path, "error")
+            self.send_error(faults.error_status)
+            return
+        roll -= faults.error_rate
+        hung = roll < faults.hang_rate
+        if hung:
+            delay += faults.hang
+        truncated = not hung and roll - faults.hang_rate < faults.truncate_rate
+
+        html = mock.render(url)
+        html = apply_layout(html, faults.layout)
+        if faults.vary:
+            html = DATA_ELEMENT_RE.sub(lambda m: f"{m.group(0)}<!-- rev {n} -->", html, count=1)
+        if truncated:
+            html = truncate(html)
+        body = html.encode("utf-8")
+        time.sleep(delay)
+
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"' if faults.validators else None
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            mock.record(url.path, "notModified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        mock.record(url.path, "hang" if hung else "truncated" if truncated else "ok")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockUpstream:
+    def __init__(self, port=0, faults=None, seed=None, fixture_dir=FIXTURE_DIR):
+        self.templates = {}
+        for path, name in PAGES.items():
+            with open(os.path.join(fixture_dir, name), encoding="utf-8") as f:
+                self.templates[path] = f.read()
+        self.passenger = PassengerPages(self.templates[PASSENGER_PATH])
+        self.faults = faults or Faults()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.outcomes = Counter()
+        self.paths = Counter()
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def requests(self):
+        with self.lock:
+            return sum(self.paths.values())
+
+    def render(self, url):
+        if url.path == PASSENGER_PATH:
+            query = parse_qs(url.query)
+            pday = query.get("pday", [None])[0]
+            if not (pday and len(pday) == 8 and pday.isdigit()):
+                pday = datetime.now().strftime("%Y%m%d")
+            return self.passenger.render(pday, query.get("terminal", ["T1"])[0].upper())
+        return parking_page(self.templates[url.path], int(time.time() // 60))
+
+    def record(self, path, outcome):
+        with self.lock:
+            self.outcomes[outcome] += 1
+            self.paths[path] += 1
+
+    def stats(self):
+        with self.lock:
+            return {"requests": sum(self.paths.values()), "outcomes": dict(self.outcomes), "paths": dict(self.paths)}
+
+    def reset(self):
+        with self.lock:
+            self.faults = Faults()
+            self.rng = random.Random(self.seed)
+            self.outcomes.clear()
+            self.paths.clear()
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name="mock-upstream", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock airport.kr with fault injection")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--seed", type=int, default=None, help="seed for fault decisions")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=30.0, help="seconds a hanging response stalls")
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--layout", choices=LAYOUTS, default="normal")
+    parser.add_argument("--vary", action="store_true", help="make every response differ (defeats parse reuse)")
+    parser.add_argument("--validators", action="store_true", help="send ETag and honour If-None-Match")
+    args = parser.parse_args(argv)
+
+    faults = Faults()
+    faults.update({f.name: getattr(args, f.name) for f in dataclasses.fields(Faults)})
+    mock = MockUpstream(args.port, faults, args.seed)
+    print(f"Mock airport.kr at {mock.base_url} (faults: {dataclasses.asdict(faults)})")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared server-side modules for Immigration Queue Manager."""
@@ -0,0 +1,460 @@
+"""Incremental alert engine: sliding-window rules over streaming passenger totals.
+
+determineConsecutiveAlerts (alertSystem.js) and staffing.alert_levels
+recompute a whole day at once with a fixed two-hour lookback. AlertEngine
+instead consumes samples as they arrive, hourly or finer, for any number of
+series (one per terminal by default) and keeps only the window state per
+series and rule:
+
+- a running sum of the last N slots (mode "mean": the window's average rate)
+- a monotonic deque of the last N slots' rates (mode "all": every slot over
+  the threshold, i.e. N consecutive hours)
+
+so appending the next slot costs O(1) amortised per rule. A revised past slot
+(a forecast re-published with new numbers) re-evaluates only the windows that
+contain it. Whenever a scope's level changes, subscribers receive a
+transition:
+
+    {"series": "T1", "scope": "total", "time": "2026-10-17T08:00:00",
+     "level": "red", "previous": "yellow", "rules": ["red-2h"], "revised": false}
+
+Rules (JSON list; default_rules() gives the dashboard's):
+
+    {"name": "arrival-AB-busy", "scope": "arrival.AB", "level": "orange",
+     "threshold": 2500, "window": 2, "mode": "all", "op": ">"}
+
+- scope:     "total", "arrival", "departure" or "<direction>.<zone>" (AB, C, D, EF)
+- threshold: passengers per hour; sub-hourly samples are scaled to an hourly rate
+- window:    hours, a whole number of the series' slots
+- mode:      "all" (every slot over the threshold) or "mean" (default)
+- op:        ">=" (default) or ">"
+
+A window only fires once every slot in it has a sample, like the
+consecutive-hour rules needing the previous hour; the scope's level is the
+highest level among the rules that fire. On one day's hourly totals
+default_rules() reproduces determineConsecutiveAlerts exactly; across
+midnight the windows carry on, where the per-day calculation restarts.
+
+Usage: python -m iqm.alerts src/data/latest_data.json [rules.json]
+"""
+
+import json
+import math
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from iqm import metrics
+from iqm.terminals import DEFAULT_TERMINAL
+
+LEVELS = ("normal", "blue", "yellow", "orange", "red")  # staffing.ALERT_LEVELS
+DIRECTIONS = ("arrival", "departure")
+ZONES = ("AB", "C", "D", "EF")
+SCOPES = ("total",) + DIRECTIONS + tuple(f"{d}.{z}" for d in DIRECTIONS for z in ZONES)
+MODES = ("mean", "all")
+OPS = (">=", ">")
+
+# Mirrors DefaultSettings.alertThresholds in src/js/config.js
+DEFAULT_THRESHOLDS = {"blue": 7000, "yellow": 7600, "orange": 8200, "red": 8600}
+DEFAULT_RESOLUTION = 60   # minutes per slot (forecast rows are hourly)
+RETAIN_HOURS = 48         # past slots kept per series for revisions and state()
+EPOCH = datetime(2000, 1, 1)
+
+
+def default_rules(thresholds=None):
+    """determineConsecutiveAlerts as rules: one-hour levels plus the two-hour upgrades."""
+    t = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    rules = [{"name": level, "scope": "total", "level": level, "threshold": t[level]} for level in LEVELS[1:]]
+    rules.append({"name": "yellow-2h", "scope": "total", "level": "yellow", "threshold": t["yellow"],
+                  "window": 2, "mode": "all", "op": ">"})
+    rules.append({"name": "red-2h", "scope": "total", "level": "red", "threshold": t["orange"],
+                  "window": 2, "mode": "all", "op": ">"})
+    return rules
+
+
+class Rule:
+    __slots__ = ("name", "scope", "level", "rank", "threshold", "window", "mode", "op")
+
+    def __init__(self, name, scope, level, threshold, window=1, mode="mean", op=">="):
+        if not name or not isinstance(name, str):
+            raise ValueError("Rule name must be a non-empty string")
+        if scope not in SCOPES:
+            raise ValueError(f"Rule {name}: unknown scope {scope!r} (expected one of {', '.join(SCOPES)})")
+        if level not in LEVELS[1:]:
+            raise ValueError(f"Rule {name}: unknown level {level!r}")
+        if mode not in MODES:
+            raise ValueError(f"Rule {name}: mode must be one of {', '.join(MODES)}")
+        if op not in OPS:
+            raise ValueError(f"Rule {name}: op must be one of {', '.join(OPS)}")
+        try:
+            threshold = float(threshold)
+            window = float(window)
+        except (TypeError, ValueError):
+            raise ValueError(f"Rule {name}: threshold and window must be numbers")
+        if window <= 0:
+            raise ValueError(f"Rule {name}: window must be positive")
+        self.name = name
+        self.scope = scope
+        self.level = level
+        self.rank = LEVELS.index(level)
+        self.threshold = threshold
+        self.window = window
+        self.mode = mode
+        self.op = op
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("Each rule must be an object")
+        unknown = set(data) - {"name", "scope", "level", "threshold", "window", "mode", "op"}
+        if unknown:
+            raise ValueError(f"Rule {data.get('name')}: unknown field(s) {', '.join(sorted(unknown))}")
+        missing = {"name", "scope", "level", "threshold"} - set(data)
+        if missing:
+            raise ValueError(f"Rule {data.get('name')}: missing {', '.join(sorted(missing))}")
+        return cls(**data)
+
+    def to_dict(self):
+        return {"name": self.name, "scope": self.scope, "level": self.level, "threshold": self.threshold,
+                "window": self.window, "mode": self.mode, "op": self.op}
+
+    def slots(self, resolution):
+        size = self.window * 60 / resolution
+        if size != int(size):
+            raise ValueError(f"Rule {self.name}: {self.window}h window is not a whole number "
+                             f"of {resolution}-minute slots")
+        return int(size)
+
+    def passes(self, rate):
+        return rate > self.threshold if self.op == ">" else rate >= self.threshold
+
+
+def parse_rules(data):
+    """Rule objects from a JSON list (or {"rules": [...]}); raises ValueError."""
+    if isinstance(data, dict) and "rules" in data:
+        data = data["rules"]
+    if not isinstance(data, list) or not data:
+        raise ValueError("rules must be a non-empty list")
+    rules = [item if isinstance(item, Rule) else Rule.from_dict(item) for item in data]
+    names = [rule.name for rule in rules]
+    if len(set(names)) != len(names):
+        raise ValueError("Rule names must be unique")
+    return rules
+
+
+def load_rules(path):
+    with open(path, encoding="utf-8") as f:
+        return parse_rules(json.load(f))
+
+
+def hour_values(row):
+    """Scope -> passengers for one forecast hourlyData row (source totals, like alertSystem.js)."""
+    values = {}
+    for direction in DIRECTIONS:
+        zones = row.get(direction) or {}
+        values[direction] = zones.get("total") or 0
+        for zone in ZONES:
+            values[f"{direction}.{zone}"] = zones.get(zone) or 0
+    values["total"] = values["arrival"] + values["departure"]
+    return values
+
+
+def check_sample(when, values):
+    """Validate one sample; returns its start time as a datetime. Raises ValueError."""
+    if isinstance(when, str):
+        try:
+            when = datetime.fromisoformat(when)
+        except ValueError:
+            raise ValueError(f"Invalid sample time {when!r}")
+    if not isinstance(when, datetime):
+        raise ValueError("Sample time must be an ISO date-time string")
+    if when.tzinfo is not None:
+        raise ValueError(f"Sample time {when.isoformat()} must be local time without a UTC offset")
+    if not isinstance(values, dict):
+        raise ValueError("Sample values must be an object of {scope: passengers}")
+    for scope, passengers in values.items():
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown scope {scope!r} (expected one of {', '.join(SCOPES)})")
+        if (isinstance(passengers, bool) or not isinstance(passengers, (int, float))
+                or not math.isfinite(passengers) or passengers < 0):
+            raise ValueError(f"{scope}: passengers must be a finite, non-negative number")
+    return when
+
+
+class _Window:
+    """Rolling sum and minimum of one scope's rates over the `size` slots ending at `end`."""
+
+    __slots__ = ("size", "end", "total", "count", "mins")
+
+    def __init__(self, size):
+        self.size = size
+        self.end = None
+        self.total = 0.0
+        self.count = 0
+        self.mins = deque()  # (slot, rate), rates increasing
+
+    def reset(self, rates, end):
+        # Rebuild from the stored rates after a gap or a revision: O(size)
+        self.end = end
+        self.total = 0.0
+        self.count = 0
+        self.mins.clear()
+        for slot in range(end - self.size + 1, end + 1):
+            rate = rates.get(slot)
+            if rate is not None:
+                self._add(slot, rate)
+
+    def advance(self, rates, slot, rate):
+        # Slide one slot forward: O(1) amortised
+        leaving = slot - self.size
+        old = rates.get(leaving)
+        if old is not None:
+            self.total -= old
+            self.count -= 1
+        if self.mins and self.mins[0][0] <= leaving:
+            self.mins.popleft()
+        self.end = slot
+        self._add(slot, rate)
+
+    def _add(self, slot, rate):
+        self.total += rate
+        self.count += 1
+        while self.mins and self.mins[-1][1] >= rate:
+            self.mins.pop()
+        self.mins.append((slot, rate))
+
+    def fires(self, rule):
+        if self.count < self.size:
+            return False
+        return rule.passes(self.total / self.size if rule.mode == "mean" else self.mins[0][1])
+
+
+def _fires_at(rule, size, rates, slot):
+    # Direct evaluation of one window, for revised slots
+    window = [rates.get(s) for s in range(slot - size + 1, slot + 1)]
+    if None in window:
+        return False
+    return rule.passes(sum(window) / size if rule.mode == "mean" else min(window))
+
+
+class _Scope:
+    """Samples, windows and levels of one scope within one series."""
+
+    __slots__ = ("rules", "sizes", "rates", "windows", "levels", "fired", "last", "retain")
+
+    def __init__(self, rules, resolution, retain):
+        self.rules = rules
+        self.sizes = [rule.slots(resolution) for rule in rules]
+        self.rates = {}
+        self.windows = [_Window(size) for size in self.sizes]
+        self.levels = {}   # slot -> level rank (only slots that had a sample)
+        self.fired = {}    # slot -> names of the rules that fired
+        self.last = None
+        self.retain = max(retain, max(self.sizes))
+
+    def push(self, slot, rate):
+        """Store one slot's rate; returns [(slot, previous rank, revised)] for changed levels."""
+        if self.rates.get(slot) == rate:
+            return []
+        self.rates[slot] = rate
+        last = self.last
+        if last is None or slot > last:
+            for window in self.windows:
+                if last is not None and slot == last + 1:
+                    window.advance(self.rates, slot, rate)
+                else:
+                    window.reset(self.rates, slot)
+            self.last = slot
+            previous = self.levels.get(last, 0) if last is not None else 0
+            self._set(slot, [rule for rule, window in zip(self.rules, self.windows) if window.fires(rule)])
+            self._prune(slot, contiguous=last is not None and slot == last + 1)
+            return [(slot, previous, False)] if self.levels[slot] != previous else []
+
+        if slot <= last - self.retain:
+            return []  # older than anything still tracked
+        # Revision: only windows containing `slot` can change
+        for window in self.windows:
+            window.reset(self.rates, last)
+        changed = []
+        for s in range(slot, min(slot + max(self.sizes) - 1, last) + 1):
+            if s not in self.rates:
+                continue
+            previous = self.levels.get(s, 0)
+            kept = self.fired.get(s, ())
+            self._set(s, [rule for rule, size in zip(self.rules, self.sizes)
+                          if (_fires_at(rule, size, self.rates, s) if s - slot < size else rule.name in kept)])
+            if self.levels[s] != previous:
+                changed.append((s, previous, True))
+        return changed
+
+    def _set(self, slot, rules):
+        self.fired[slot] = [rule.name for rule in rules]
+        self.levels[slot] = max((rule.rank for rule in rules), default=0)
+
+    def _prune(self, slot, contiguous):
+        oldest = slot - self.retain
+        if contiguous:
+            for store in (self.rates, self.levels, self.fired):
+                store.pop(oldest, None)
+        else:
+            for store in (self.rates, self.levels, self.fired):
+                for s in [s for s in store if s <= oldest]:
+                    del store[s]
+
+
+class _Series:
+    def __init__(self, name, resolution, rules, retain_hours):
+        self.name = name
+        self.resolution = resolution
+        retain = int(retain_hours * 60 // resolution)
+        by_scope = {}
+        for rule in rules:
+            by_scope.setdefault(rule.scope, []).append(rule)
+        self.scopes = {scope: _Scope(scope_rules, resolution, retain) for scope, scope_rules in by_scope.items()}
+
+    def slot(self, when):
+        minutes, rest = divmod((when - EPOCH).total_seconds(), 60)
+        if rest or minutes % self.resolution:
+            raise ValueError(f"{when.isoformat()} is not on a {self.resolution}-minute boundary")
+        return int(minutes // self.resolution)
+
+    def time(self, slot):
+        return (EPOCH + timedelta(minutes=slot * self.resolution)).isoformat()
+
+    def push(self, slot, values):
+        scale = 60 / self.resolution
+        events = []
+        for scope, state in self.scopes.items():
+            passengers = values.get(scope)
+            if passengers is None:
+                continue
+            for s, previous, revised in state.push(slot, float(passengers) * scale):
+                events.append({
+                    "series": self.name,
+                    "scope": scope,
+                    "time": self.time(s),
+                    "level": LEVELS[state.levels[s]],
+                    "previous": LEVELS[previous],
+                    "rules": state.fired[s],
+                    "revised": revised,
+                })
+        return events
+
+    def state(self, scope=None):
+        scopes = {}
+        for name, state in self.scopes.items():
+            if scope is not None and name != scope:
+                continue
+            scopes[name] = {
+                "level": LEVELS[state.levels.get(state.last, 0)] if state.last is not None else "normal",
+                "time": self.time(state.last) if state.last is not None else None,
+                "alerts": [{"time": self.time(s), "level": LEVELS[rank], "rules": state.fired[s]}
+                           for s, rank in sorted(state.levels.items()) if rank],
+            }
+        return {"resolution": self.resolution, "scopes": scopes}
+
+
+class AlertEngine:
+    """Streaming alert evaluation for many series; thread-safe.
+
+    subscribe(callback) registers callback(event) for every level transition
+    (server.py publishes them on /api/stream).
+    """
+
+    def __init__(self, rules=None, retain_hours=RETAIN_HOURS):
+        self.rules = parse_rules(rules if rules is not None else default_rules())
+        self.retain_hours = retain_hours
+        self._series = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.transitions = 0
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def push(self, series, when, values, resolution=DEFAULT_RESOLUTION):
+        """Feed one slot of passenger counts ({scope: passengers}) starting at `when`.
+
+        Returns the transitions it caused. A series keeps the resolution
+        (minutes per slot) of its first sample.
+        """
+        return self.push_many(series, [(when, values)], resolution)
+
+    def push_many(self, series, samples, resolution=DEFAULT_RESOLUTION):
+        """Feed several (when, values) slots of one series, in order.
+
+        Every sample is validated before any is applied, so a ValueError
+        leaves the engine unchanged.
+        """
+        checked = [(check_sample(when, values), values) for when, values in samples]
+        with self._lock:
+            state = self._series.get(series)
+            if state is None:
+                if resolution <= 0 or 60 % resolution and resolution % 60:
+                    raise ValueError("resolution must divide an hour or be a whole number of hours")
+                state = _Series(series, resolution, self.rules, self.retain_hours)
+            elif state.resolution != resolution:
+                raise ValueError(f"Series {series} uses {state.resolution}-minute slots, got {resolution}")
+            slots = [state.slot(when) for when, _ in checked]
+            self._series[series] = state
+            events = []
+            for slot, (_, values) in zip(slots, checked):
+                events += state.push(slot, values)
+            self.samples += len(slots)
+            self.transitions += len(events)
+            subscribers = list(self._subscribers)
+        for event in events:
+            metrics.ALERT_TRANSITIONS.inc(scope=event["scope"], level=event["level"])
+            for callback in subscribers:
+                callback(event)
+        return events
+
+    @metrics.STAGE_DURATION.timed(stage="alerts.forecast")
+    def push_forecast(self, forecast, series=None):
+        """Feed every hour of a parsed forecast; hours whose totals didn't change are no-ops."""
+        series = series or forecast.get("terminal", DEFAULT_TERMINAL)
+        day = datetime.strptime(forecast["date"], "%Y-%m-%d")
+        samples = []
+        for index, row in enumerate(forecast.get("hourlyData", [])):
+            start = row.get("hourStart")
+            samples.append((day + timedelta(hours=index if start is None else start), hour_values(row)))
+        return self.push_many(series, samples)
+
+    def state(self, series=None, scope=None):
+        with self._lock:
+            return {
+                "rules": [rule.to_dict() for rule in self.rules],
+                "series": {name: state.state(scope) for name, state in self._series.items()
+                           if series is None or name == series},
+            }
+
+    def stats(self):
+        with self._lock:
+            return {"series": len(self._series), "rules": len(self.rules), "samples": self.samples,
+                    "transitions": self.transitions, "subscribers": len(self._subscribers)}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or len(argv) > 2:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        return 2
+    with open(argv[0], encoding="utf-8") as f:
+        forecast = json.load(f)
+    engine = AlertEngine(load_rules(argv[1]) if len(argv) > 1 else None)
+    for event in engine.push_forecast(forecast):
+        print(f"{event['time']}  {event['scope']:<12} {event['previous']:>6} -> {event['level']:<6} "
+              f"{', '.join(event['rules'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""In-process TTL cache with LRU eviction and single-flight loading."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    # One in-progress load that concurrent callers for the same key wait on
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def resolve(self, value):
+        self.value = value
+        self.event.set()
+
+    def fail(self, error):
+        self.error = error
+        self.event.set()
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class TTLCache:
+    """Cache values for `ttl` seconds, keeping at most `max_entries` keys.
+
+    `get_or_load(key, loader)` returns a fresh cached value or calls `loader()`.
+    While a load for a key is running, other callers for that key wait for its
+    result instead of starting their own, so N simultaneous misses cost one
+    upstream fetch. Loader errors are propagated to every waiter and nothing
+    is cached.
+    """
+
+    def __init__(self, ttl=300, max_entries=32, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0       # entry present but expired -> reloaded
+        self.coalesced = 0   # waited on another caller's load
+        self.evictions = 0
+        self.errors = 0
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.stale += 1
+                flight = self._inflight[key] = _Flight()
+                leader = True
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                del self._inflight[key]
+            flight.fail(e)
+            raise
+
+        with self._lock:
+            self._store(key, value)
+            del self._inflight[key]
+        flight.resolve(value)
+        return value
+
+    def _store(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key, value):
+        """Store a value loaded elsewhere (e.g. by a background refresher)."""
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale + self.coalesced
+            return {
+                "ttl": self.ttl,
+                "maxEntries": self.max_entries,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hitRatio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
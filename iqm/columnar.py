@@ -0,0 +1,212 @@
+"""Columnar container for hourly passenger data (requires NumPy).
+
+All counts for N days live in one int32 array shaped (N, 24, 2, 5):
+date x hour x direction (arrival, departure) x zone (AB, C, D, EF, total).
+A (N, 24) boolean mask marks which hours were present in the source data.
+
+Converts losslessly to and from the PassengerForecast JSON records produced
+by iqm.parser (rows come back ordered by hourStart), and saves as plain .npy
+files plus a small JSON sidecar so a year of data can be memory-mapped.
+"""
+
+import json
+import os
+
+import numpy as np
+
+ZONES = ("AB", "C", "D", "EF", "total")
+ZONE_ONLY = ZONES[:-1]
+DIRECTIONS = ("arrival", "departure")
+HOURS = 24
+DTYPE = np.int32
+
+COUNTS_FILE = "counts.npy"
+PRESENT_FILE = "present.npy"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+
+def hour_label(hour):
+    return f"{hour:02d}~{(hour + 1) % HOURS:02d}"
+
+
+def weekday_of(dates):
+    # 1970-01-01 was a Thursday; Monday = 0
+    return (dates.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+
+class HourlyColumns:
+    def __init__(self, dates, counts, present, terminals=None, last_updated=None, labels=None,
+                 content_hashes=None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.counts = counts
+        self.present = present
+        n = len(self.dates)
+        self.terminals = list(terminals) if terminals is not None else ["T1"] * n
+        self.last_updated = list(last_updated) if last_updated is not None else [None] * n
+        self.content_hashes = list(content_hashes) if content_hashes is not None else [None] * n
+        # Hour strings that differ from the canonical "HH~HH" form: {"day:hour": label}
+        self.labels = dict(labels or {})
+
+    def __len__(self):
+        return len(self.dates)
+
+    # --- Conversion -------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records):
+        records = sorted(records, key=lambda r: r["date"])
+        n = len(records)
+        counts = np.zeros((n, HOURS, len(DIRECTIONS), len(ZONES)), dtype=DTYPE)
+        present = np.zeros((n, HOURS), dtype=bool)
+        labels = {}
+
+        for i, record in enumerate(records):
+            for row in record["hourlyData"]:
+                hour = row["hourStart"]
+                if not 0 <= hour < HOURS or present[i, hour]:
+                    raise ValueError(f"{record['date']}: invalid or duplicate hourStart {hour}")
+                present[i, hour] = True
+                for d, direction in enumerate(DIRECTIONS):
+                    zones = row[direction]
+                    counts[i, hour, d] = [zones.get(zone, 0) for zone in ZONES]
+                if row["hour"] != hour_label(hour):
+                    labels[f"{i}:{hour}"] = row["hour"]
+
+        return cls(
+            [r["date"] for r in records],
+            counts,
+            present,
+            terminals=[r.get("terminal", "T1") for r in records],
+            last_updated=[r.get("lastUpdated") for r in records],
+            labels=labels,
+            content_hashes=[r.get("contentHash") for r in records],
+        )
+
+    @classmethod
+    def from_history(cls, store, start, end):
+        return cls.from_records(list(store.range(start, end)))
+
+    def to_records(self):
+        records = []
+        counts = np.asarray(self.counts).tolist()
+        for i, day in enumerate(self.dates.astype(str)):
+            hourly = []
+            for hour in np.flatnonzero(self.present[i]).tolist():
+                row = {"hour": self.labels.get(f"{i}:{hour}", hour_label(hour)), "hourStart": hour}
+                for d, direction in enumerate(DIRECTIONS):
+                    row[direction] = dict(zip(ZONES, counts[i][hour][d]))
+                hourly.append(row)
+            record = {"date": day, "terminal": self.terminals[i]}
+            if self.last_updated[i] is not None:
+                record["lastUpdated"] = self.last_updated[i]
+            record["hourlyData"] = hourly
+            if self.content_hashes[i] is not None:
+                record["contentHash"] = self.content_hashes[i]
+            records.append(record)
+        return records
+
+    # --- Persistence ------------------------------------------------------
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, COUNTS_FILE), np.ascontiguousarray(self.counts))
+        np.save(os.path.join(path, PRESENT_FILE), np.ascontiguousarray(self.present))
+        meta = {
+            "version": FORMAT_VERSION,
+            "zones": ZONES,
+            "directions": DIRECTIONS,
+            "dates": self.dates.astype(str).tolist(),
+            "terminals": self.terminals,
+            "lastUpdated": self.last_updated,
+            "labels": self.labels,
+            "contentHashes": self.content_hashes,
+        }
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a saved container; with mmap=True the counts stay on disk until touched."""
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar format version: {meta.get('version')}")
+        mode = "r" if mmap else None
+        counts = np.load(os.path.join(path, COUNTS_FILE), mmap_mode=mode)
+        present = np.load(os.path.join(path, PRESENT_FILE), mmap_mode=mode)
+        return cls(meta["dates"], counts, present, meta["terminals"], meta["lastUpdated"], meta["labels"],
+                   meta.get("contentHashes"))
+
+    # --- Selection --------------------------------------------------------
+
+    def column(self, direction, zone="total"):
+        """(days, 24) view of one direction/zone."""
+        return self.counts[:, :, DIRECTIONS.index(direction), ZONES.index(zone)]
+
+    def between(self, start, end):
+        """Sub-container for start..end inclusive (dates are kept sorted)."""
+        lo = np.searchsorted(self.dates, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")
+        labels = {}
+        for key, label in self.labels.items():
+            i, hour = key.split(":")
+            if lo <= int(i) < hi:
+                labels[f"{int(i) - lo}:{hour}"] = label
+        return HourlyColumns(self.dates[lo:hi], self.counts[lo:hi], self.present[lo:hi],
+                             self.terminals[lo:hi], self.last_updated[lo:hi], labels, self.content_hashes[lo:hi])
+
+    # --- Aggregations -----------------------------------------------------
+
+    def daily_totals(self):
+        """(days, 2) passengers per day for [arrival, departure], from the source totals."""
+        return self.counts[:, :, :, ZONES.index("total")].sum(axis=1, dtype=np.int64)
+
+    def zone_totals(self):
+        """(days, 2, 4) passengers per day by direction and zone (AB, C, D, EF)."""
+        return self.counts[:, :, :, :len(ZONE_ONLY)].sum(axis=1, dtype=np.int64)
+
+    def zone_peaks(self):
+        """Peak hourly passengers per day/direction/zone and the hour it occurs.
+
+        Returns (values, hours), both shaped (days, 2, 4).
+        """
+        zones = self.counts[:, :, :, :len(ZONE_ONLY)]
+        return zones.max(axis=1), zones.argmax(axis=1)
+
+    def hour_of_week_profile(self, direction="arrival", zone="total", stat="mean"):
+        """(7, 24) profile by weekday (Monday = 0) and hour, over present hours only.
+
+        stat: "mean" or "max".
+        """
+        values = self.column(direction, zone)
+        weekdays = weekday_of(self.dates)
+        present = np.asarray(self.present)
+        if stat == "max":
+            out = np.zeros((7, HOURS), dtype=np.int64)
+            np.maximum.at(out, weekdays, np.where(present, values, 0))
+            return out
+        if stat != "mean":
+            raise ValueError(f"Unknown stat: {stat}")
+        sums = np.zeros((7, HOURS), dtype=np.float64)
+        seen = np.zeros((7, HOURS), dtype=np.int64)
+        np.add.at(sums, weekdays, np.where(present, values, 0))
+        np.add.at(seen, weekdays, present)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(seen > 0, sums / np.maximum(seen, 1), np.nan)
+
+    def summary(self):
+        """Per-day JSON-friendly summary: totals and peak hour per direction."""
+        totals = self.daily_totals()
+        combined = self.column("arrival") + self.column("departure")
+        peak_hours = np.where(self.present, combined, -1).argmax(axis=1)
+        return [
+            {
+                "date": day,
+                "arrival": int(totals[i, 0]),
+                "departure": int(totals[i, 1]),
+                "peakHour": int(peak_hours[i]),
+                "peakPassengers": int(combined[i, peak_hours[i]]),
+            }
+            for i, day in enumerate(self.dates.astype(str).tolist())
+        ]
@@ -0,0 +1,294 @@
+"""HTTP fetching for airport.kr pages: pooled keep-alive session, retries, concurrency."""
+
+import copy
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from iqm import metrics
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7'
+}
+
+# Upstream site; IQM_UPSTREAM (or a --upstream option) points every fetch
+# elsewhere, e.g. at the mock in benchmarks/upstream.py
+DEFAULT_UPSTREAM = "https://www.airport.kr"
+UPSTREAM_ENV = "IQM_UPSTREAM"
+PASSENGER_PATH = "/ap_ko/883/subview.do"
+PARKING_SHORT_PATH = "/ap_ko/964/subview.do"
+PARKING_LONG_PATH = "/ap_ko/965/subview.do"
+PAGE_RE = re.compile(r"/ap_ko/(\d+)/")
+
+DEFAULT_TIMEOUT = (5, 15)    # (connect, read) seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5        # sleeps 0.5s, 1s, 2s between attempts
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# One page job: fetch `url` with `params`, then run `parse(text)`
+PageJob = namedtuple("PageJob", "url params parse")
+# value is the parse result; error is set instead when stage ("fetch"/"parse") failed
+PageResult = namedtuple("PageResult", "value error stage elapsed")
+
+
+def upstream_base(base=None):
+    """Base URL for airport.kr pages: `base`, else $IQM_UPSTREAM, else the real site."""
+    return (base or os.environ.get(UPSTREAM_ENV) or DEFAULT_UPSTREAM).rstrip("/")
+
+
+def upstream_url(path, base=None):
+    return upstream_base(base) + path
+
+
+def page_label(url):
+    """Metrics label for an upstream URL: the airport.kr menu number ("883", "964", ...)."""
+    match = PAGE_RE.search(url)
+    return match.group(1) if match else "other"
+
+
+def make_session(pool_size=10, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """requests.Session with keep-alive connection pooling and bounded retries."""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def timed_get(session, url, params=None, timeout=DEFAULT_TIMEOUT, headers=None):
+    """session.get() that records upstream latency, outcome and body size per page."""
+    page = page_label(url)
+    start = time.perf_counter()
+    try:
+        response = session.get(url, params=params, timeout=timeout, headers=headers)
+    except requests.Timeout:
+        metrics.UPSTREAM_REQUESTS.inc(page=page, outcome="timeout")
+        raise
+    except requests.RequestException:
+        metrics.UPSTREAM_REQUESTS.inc(page=page, outcome="error")
+        raise
+    finally:
+        metrics.UPSTREAM_DURATION.observe(time.perf_counter() - start, page=page)
+    if response.status_code == 304:
+        outcome = "not_modified"
+    else:
+        outcome = "ok" if response.ok else "http_error"
+        metrics.UPSTREAM_BYTES.observe(len(response.content), page=page)
+    metrics.UPSTREAM_REQUESTS.inc(page=page, outcome=outcome)
+    return response
+
+
+def fetch_text(session, url, params=None, timeout=DEFAULT_TIMEOUT, conditional=None):
+    if conditional is not None:
+        return conditional.fetch(session, url, params, timeout)
+    response = timed_get(session, url, params, timeout)
+    response.raise_for_status()
+    return response.text
+
+
+class ConditionalGet:
+    """Remembers ETag / Last-Modified per (url, params) and revalidates with them.
+
+    When upstream answers 304 Not Modified the previous body is returned
+    without being downloaded again. Pages that send neither validator are
+    fetched normally and not stored.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (etag, last_modified, text)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+
+    def fetch(self, session, url, params=None, timeout=DEFAULT_TIMEOUT, headers=None):
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = dict(headers or {})
+        if entry is not None:
+            etag, last_modified, _ = entry
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = timed_get(session, url, params, timeout, headers)
+        with self._lock:
+            self.requests += 1
+            if response.status_code == 304 and entry is not None:
+                self.not_modified += 1
+                self._entries.move_to_end(key)
+                return entry[2]
+        response.raise_for_status()
+        text = response.text
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self._lock:
+            if etag or last_modified:
+                self._entries[key] = (etag, last_modified, text)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(key, None)
+        return text
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "notModified": self.not_modified, "entries": len(self._entries)}
+
+
+class ParseCache:
+    """Callable wrapper around a page parser that skips unchanged pages.
+
+    `fragment(text)` picks out the part of the page the parser actually reads
+    (e.g. the forecast table); its hash, together with any extra arguments,
+    keys the cache. On a hit the previous result is passed through
+    `on_reuse(value, *args)` (default: a deep copy) instead of parsing again.
+    When `fragment` returns None the whole page is hashed. Usable directly as
+    PageJob.parse.
+    """
+
+    def __init__(self, parse, fragment=None, on_reuse=None, max_entries=8, name=None):
+        self.parse = parse
+        self.name = name  # metrics page label (e.g. "883"); reuse isn't counted without one
+        self.fragment = fragment
+        self.on_reuse = on_reuse
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # (digest, args) -> parse result
+        self._lock = threading.Lock()
+        self.parsed = 0
+        self.reused = 0
+
+    def _key(self, text, args):
+        part = self.fragment(text) if self.fragment is not None else None
+        digest = hashlib.blake2b((text if part is None else part).encode("utf-8"), digest_size=16).digest()
+        return digest, args
+
+    def __call__(self, text, *args):
+        key = self._key(text, args)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.reused += 1
+        if value is not None:
+            if self.name is not None:
+                metrics.PARSE_REUSED.inc(page=self.name)
+            return self.on_reuse(value, *args) if self.on_reuse is not None else copy.deepcopy(value)
+
+        value = self.parse(text, *args)
+        with self._lock:
+            self.parsed += 1
+            self._entries[key] = copy.deepcopy(value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"parsed": self.parsed, "reused": self.reused}
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads: at most `rate` requests/second on average."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _run_job(session, job, timeout, limiter=None, conditional=None):
+    start = time.perf_counter()
+    try:
+        if limiter is not None:
+            limiter.acquire()
+        text = fetch_text(session, job.url, job.params, timeout, conditional)
+    except Exception as e:
+        return PageResult(None, e, "fetch", time.perf_counter() - start)
+    try:
+        value = job.parse(text)
+    except Exception as e:
+        metrics.PARSE_ERRORS.inc(page=page_label(job.url))
+        return PageResult(None, e, "parse", time.perf_counter() - start)
+    return PageResult(value, None, None, time.perf_counter() - start)
+
+
+def fetch_all(session, jobs, timeout=DEFAULT_TIMEOUT, max_workers=None, limiter=None, conditional=None):
+    """Run all page jobs concurrently; returns {name: PageResult}.
+
+    Each page is parsed on its worker as soon as its body arrives, so parsing
+    overlaps with the fetches still in flight and total wall time is bounded
+    by the slowest page rather than the sum. Pass a RateLimiter to cap the
+    request rate when fetching many pages, and a ConditionalGet to revalidate
+    pages fetched before instead of downloading them again.
+    """
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs), thread_name_prefix="fetch") as pool:
+        futures = {name: pool.submit(_run_job, session, job, timeout, limiter, conditional)
+                   for name, job in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def atomic_write_json(data, filepath, indent=2):
+    """Write JSON to a temp file in the same directory, then rename over `filepath`.
+
+    Readers (the dev server, git) never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
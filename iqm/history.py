@@ -0,0 +1,202 @@
+"""Append-only on-disk history of daily passenger forecasts.
+
+Layout under the store root:
+
+    2026-07.jsonl      one compact JSON record per line, appended in fetch order
+    2026-07.idx.json   {"size": <bytes covered>, "dates": {"2026-07-24": [offset, length], ...}}
+
+Re-fetching a day appends a new line and repoints the index, so the latest
+record for a date wins and older versions stay on disk. The index is only a
+cache: if it is missing, or the data file has grown past the size it covers
+(e.g. a crash between append and index write), the uncovered tail is
+rescanned on load.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from iqm.fetch import atomic_write_json
+from iqm.terminals import partition_dir
+
+DEFAULT_HISTORY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "history")
+DATA_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx.json"
+
+
+def month_key(day):
+    return day[:7]
+
+
+def iter_dates(start, end):
+    """Yield YYYY-MM-DD strings from start to end inclusive."""
+    current = to_date(start)
+    last = to_date(end)
+    while current <= last:
+        yield current.isoformat()
+        current += timedelta(days=1)
+
+
+def to_date(value):
+    if isinstance(value, date):
+        return value
+    value = value.strip()
+    if len(value) == 8 and value.isdigit():
+        return datetime.strptime(value, "%Y%m%d").date()
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _record_line(record):
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class HistoryStore:
+    # Thread-safe within a process. Any number of processes may read, but run
+    # one writer process at a time.
+
+    def __init__(self, root=DEFAULT_HISTORY_DIR):
+        self.root = root
+        self._indexes = {}  # month -> {"size": int, "dates": {date: [offset, length]}}
+        self._lock = threading.Lock()
+
+    def _paths(self, month):
+        base = os.path.join(self.root, month)
+        return base + DATA_SUFFIX, base + INDEX_SUFFIX
+
+    def _load_index(self, month):
+        data_path, index_path = self._paths(month)
+        index = self._indexes.get(month)
+        if index is not None:
+            # Pick up records appended by another process (e.g. the fetch job
+            # writing while the server reads)
+            if os.path.exists(data_path) and os.path.getsize(data_path) > index["size"]:
+                self._scan(data_path, index)
+            return index
+
+        index = {"size": 0, "dates": {}}
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        if data_size < index["size"]:
+            # Data file was replaced or truncated: rebuild from scratch
+            index = {"size": 0, "dates": {}}
+        if data_size > index["size"]:
+            self._scan(data_path, index)
+            atomic_write_json(index, index_path, indent=None)
+
+        self._indexes[month] = index
+        return index
+
+    def _scan(self, data_path, index):
+        with open(data_path, "rb") as f:
+            f.seek(index["size"])
+            offset = index["size"]
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial last line from an interrupted append
+                try:
+                    day = json.loads(line)["date"]
+                    index["dates"][day] = [offset, len(line)]
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+            index["size"] = offset
+
+    def append(self, record, skip_unchanged=True):
+        """Store one day's forecast. Returns False if skipped as unchanged."""
+        with self._lock:
+            if skip_unchanged and self._unchanged_locked(record):
+                return False
+            self._write_locked(month_key(record["date"]), [record])
+            return True
+
+    def extend(self, records, skip_unchanged=True):
+        """Store many days at once: one append, fsync and index write per month.
+
+        Returns the dates written, skipping days whose hourly data is unchanged.
+        """
+        by_month = {}
+        for record in records:
+            by_month.setdefault(month_key(record["date"]), []).append(record)
+        written = []
+        with self._lock:
+            for month, month_records in sorted(by_month.items()):
+                if skip_unchanged:
+                    month_records = [record for record in month_records if not self._unchanged_locked(record)]
+                if month_records:
+                    self._write_locked(month, month_records)
+                    written.extend(record["date"] for record in month_records)
+        return written
+
+    def _unchanged_locked(self, record):
+        previous = self._get_locked(record["date"])
+        return previous is not None and previous.get("hourlyData") == record.get("hourlyData")
+
+    def _write_locked(self, month, records):
+        os.makedirs(self.root, exist_ok=True)
+        data_path, index_path = self._paths(month)
+        index = self._load_index(month)
+        lines = [_record_line(record) for record in records]
+        with open(data_path, "ab") as f:
+            # Cover any bytes the index hasn't seen (e.g. partial line)
+            offset = f.seek(0, os.SEEK_END)
+            if offset != index["size"]:
+                f.write(b"\n")
+                offset += 1
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        for record, line in zip(records, lines):
+            index["dates"][record["date"]] = [offset, len(line)]
+            offset += len(line)
+        index["size"] = offset
+        atomic_write_json(index, index_path, indent=None)
+
+    def get(self, day):
+        with self._lock:
+            return self._get_locked(to_date(day).isoformat())
+
+    def _get_locked(self, day):
+        month = month_key(day)
+        index = self._load_index(month)
+        entry = index["dates"].get(day)
+        if entry is None:
+            return None
+        data_path, _ = self._paths(month)
+        with open(data_path, "rb") as f:
+            f.seek(entry[0])
+            return json.loads(f.read(entry[1]))
+
+    def has(self, day):
+        day = to_date(day).isoformat()
+        with self._lock:
+            return day in self._load_index(month_key(day))["dates"]
+
+    def months(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(DATA_SUFFIX)] for name in os.listdir(self.root) if name.endswith(DATA_SUFFIX))
+
+    def dates(self):
+        with self._lock:
+            result = []
+            for month in self.months():
+                result.extend(self._load_index(month)["dates"])
+            return sorted(result)
+
+    def range(self, start, end):
+        """Yield stored records from start to end inclusive, in date order."""
+        for day in iter_dates(start, end):
+            record = self.get(day)
+            if record is not None:
+                yield record
+
+
+def terminal_history(terminal=None, root=DEFAULT_HISTORY_DIR):
+    """HistoryStore for one terminal: `root` for T1, `root/T2` for T2 (see iqm.terminals)."""
+    return HistoryStore(partition_dir(root, terminal))
@@ -0,0 +1,261 @@
+"""HTTP validators and compression for server.py responses.
+
+A Representation is one response body with its strong ETag, Last-Modified
+time and precompressed gzip/deflate variants, built once and reused for every
+request until the underlying data changes. Each content-coding gets its own
+ETag ("<hash>-gzip") since the bytes on the wire differ. AssetManifest lists
+those ETags for every static file so the service worker can update only the
+files that changed.
+"""
+
+import email.utils
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+COMPRESS_MIN_BYTES = 512
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+# Preference order when the client accepts several with equal q
+ENCODINGS = ("gzip", "deflate")
+
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class Representation:
+    def __init__(self, body, content_type, last_modified=None):
+        self.body = body
+        self.content_type = content_type
+        self.etag = make_etag(body)
+        self.last_modified = last_modified  # POSIX timestamp or None
+        self.data = None
+        self.encoded = {}
+        if is_compressible(content_type) and len(body) >= COMPRESS_MIN_BYTES:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            self.encoded["deflate"] = zlib.compress(body, 6)
+
+    @classmethod
+    def from_json(cls, data, last_modified=None):
+        rep = cls(compact_json(data), "application/json; charset=utf-8", last_modified)
+        rep.data = data  # kept so other endpoints can reuse the parsed value
+        return rep
+
+    @property
+    def vary(self):
+        return bool(self.encoded)
+
+    def body_for(self, encoding):
+        if encoding is None:
+            return self.body
+        return self.encoded[encoding]
+
+    def etag_for(self, encoding):
+        if encoding is None:
+            return self.etag
+        return self.etag[:-1] + "-" + encoding + '"'
+
+    def last_modified_header(self):
+        if self.last_modified is None:
+            return None
+        return email.utils.formatdate(self.last_modified, usegmt=True)
+
+    def is_not_modified(self, headers):
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            etags = [self.etag] + [self.etag_for(encoding) for encoding in self.encoded]
+            return etag_matches(if_none_match, etags)
+
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(self.last_modified) <= since
+        return False
+
+
+def etag_matches(if_none_match, etags):
+    # Weak comparison, as required for If-None-Match
+    if if_none_match.strip() == "*":
+        return True
+    bare = {etag[2:] if etag.startswith("W/") else etag for etag in etags}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in bare:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding, available):
+    """Pick gzip or deflate from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding or not available:
+        return None
+    best, best_q = None, 0.0
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        candidates = ENCODINGS if name == "*" else (name,)
+        for encoding in candidates:
+            if encoding in available and q > 0:
+                # Ties keep the earlier entry in ENCODINGS order
+                if q > best_q or (q == best_q and ENCODINGS.index(encoding) < ENCODINGS.index(best)):
+                    best, best_q = encoding, q
+    return best
+
+
+class StaticFileCache:
+    """Representations of files on disk, reloaded when size or mtime changes."""
+
+    def __init__(self, max_entries=256, max_file_bytes=2 * 1024 * 1024, compact_json_files=True):
+        self.max_entries = max_entries
+        self.max_file_bytes = max_file_bytes
+        self.compact_json_files = compact_json_files
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), Representation)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return a Representation for `path`, or None if it should be streamed as-is."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size > self.max_file_bytes:
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        rep = self._load(path, st)
+        with self._lock:
+            self._entries[path] = (version, rep)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rep
+
+    def _load(self, path, st):
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type == "application/json":
+            content_type = "application/json; charset=utf-8"
+            if self.compact_json_files:
+                # Data files are pretty-printed on disk; send them compact
+                try:
+                    body = compact_json(json.loads(body))
+                except ValueError:
+                    pass
+        elif content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        return Representation(body, content_type, st.st_mtime)
+
+
+ASSET_SUFFIXES = (".html", ".css", ".js", ".json", ".png", ".svg", ".ico", ".webmanifest", ".woff2")
+
+
+class AssetManifest:
+    """Content hash of every static asset under `root`, served as /asset-manifest.json.
+
+    {"version": "<hash of the list>", "assets": {"./js/app.js": "<hash>", ...}}
+
+    Hashes are the ETags StaticFileCache sends for the same files, so the
+    service worker downloads only assets whose hash changed. Data files
+    (`exclude_dirs`) are left out: they change hourly and the service worker
+    revalidates them with their own ETags instead. The manifest is rebuilt
+    only when a file's size or mtime changes.
+    """
+
+    def __init__(self, root, static_cache, exclude_dirs=("data",), exclude_files=("sw.js",),
+                 suffixes=ASSET_SUFFIXES):
+        self.root = root
+        self.static_cache = static_cache
+        self.exclude_dirs = set(exclude_dirs)
+        self.exclude_files = set(exclude_files)
+        self.suffixes = suffixes
+        self._versions = None
+        self._rep = None
+        self._lock = threading.Lock()
+
+    def files(self):
+        """(relative path, absolute path, stat) for every asset, sorted."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = os.path.relpath(dirpath, self.root)
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and
+                                 not (rel_dir == "." and d in self.exclude_dirs))
+            for name in sorted(filenames):
+                if name.startswith(".") or not name.endswith(self.suffixes):
+                    continue
+                if rel_dir == "." and name in self.exclude_files:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                rel = "./" + os.path.normpath(os.path.join(rel_dir, name)).replace(os.sep, "/")
+                found.append((rel, path, st))
+        return found
+
+    def get(self):
+        """Representation of the current manifest."""
+        files = self.files()
+        versions = tuple((rel, st.st_mtime_ns, st.st_size) for rel, _, st in files)
+        with self._lock:
+            if versions == self._versions:
+                return self._rep
+
+        assets = {}
+        for rel, path, _ in files:
+            rep = self.static_cache.get(path)
+            assets[rel] = (rep.etag if rep is not None else _file_etag(path)).strip('"')
+        data = {"version": make_etag(compact_json(assets)).strip('"'), "assets": assets}
+        rep = Representation.from_json(data, max((st.st_mtime for _, _, st in files), default=None))
+        with self._lock:
+            self._versions = versions
+            self._rep = rep
+        return rep
+
+
+def _file_etag(path):
+    # Files too large for StaticFileCache, hashed in chunks
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return '"' + digest.hexdigest() + '"'
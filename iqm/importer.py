@@ -0,0 +1,514 @@
+"""Bulk import of forecast files into the history store (server.py /api/import, python -m iqm.importer).
+
+Accepted files:
+
+- CSV, UTF-8 or CP949 (EUC-KR), one row per hour with an optional date
+  column so one file can hold any number of days. Read and decoded in
+  chunks, so the file is never held in memory as a whole.
+- .xlsx (needs openpyxl), read row by row in read-only mode from a
+  temporary file.
+- airport.kr's "Excel" download, which is the 883 HTML table saved as .xls;
+  one day, parsed like the live page (needs the date).
+
+Header rows are matched by keyword like importer.js (시간, 입국/출국, AB..EF,
+1..5/6, 합계, 날짜/일자, 터미널; English arrival/departure/date/hour work
+too) and may span two rows, as in the airport's table, where 입국장/출국장
+sit above the zone names. Departure gates map onto zone keys as the parser
+does: 1+2 -> AB, 3 -> C, 4 -> D, 5/6 -> EF. A missing total is the sum of
+the zones.
+
+Every (terminal, date) becomes one record in the parser's PassengerForecast
+schema, and each terminal's records are written with HistoryStore.extend
+(one append, fsync and index write per month). Rows that fail validation
+are skipped and reported with their line numbers.
+"""
+
+import argparse
+import codecs
+import csv
+import json
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from datetime import time as time_of_day
+
+from iqm.history import DEFAULT_HISTORY_DIR, terminal_history, to_date
+from iqm.parser import TOTAL_MARKERS, content_hash, parse_airport_html
+from iqm.terminals import DEFAULT_TERMINAL, TERMINAL_NAMES, TERMINALS, normalize_terminal
+
+try:
+    import openpyxl
+except ImportError:  # optional; only needed for .xlsx
+    openpyxl = None
+
+FORMATS = ("csv", "xlsx", "html")
+ENCODINGS = ("utf-8-sig", "cp949")
+READ_CHUNK = 64 * 1024
+MAX_HEADER_ROWS = 3
+MAX_ROWS = 200_000      # hourly rows per file (about 22 years of one terminal)
+MAX_ERRORS = 50         # row errors listed in the report (all are counted)
+SOURCE = "import"
+
+DIRECTION_WORDS = {"arrival": ("입국", "arrival", "도착"), "departure": ("출국", "departure", "출발")}
+DATE_WORDS = ("날짜", "일자", "date")
+HOUR_WORDS = ("시간", "시각", "hour", "time")
+TERMINAL_WORDS = ("터미널", "terminal")
+TOTAL_WORDS = ("합계", "소계", "total")
+ZONE_CODES = {
+    "AB": "AB", "A": "AB", "B": "AB", "C": "C", "D": "D", "EF": "EF", "E": "EF", "F": "EF",
+    "12": "AB", "1": "AB", "2": "AB", "3": "C", "4": "D", "56": "EF", "5": "EF", "6": "EF",
+}
+ZONE_KEYS = ("AB", "C", "D", "EF")
+CODE_RE = re.compile(r"[^A-Z0-9]")
+HOUR_RE = re.compile(r"(\d{1,2})")
+XLSX_MAGIC = b"PK\x03\x04"
+BIFF_MAGIC = b"\xd0\xcf\x11\xe0"
+
+
+class BoundedReader:
+    """Read at most `length` bytes of `stream` (a request body), with bytes already read put back in front."""
+
+    def __init__(self, stream, length=None, prefix=b""):
+        self.stream = stream
+        self.remaining = length
+        self.prefix = prefix
+
+    def read(self, size=-1):
+        if self.prefix:
+            size = len(self.prefix) if size is None or size < 0 else size
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+            return data
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return b""
+            size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        return data
+
+
+def sniff_format(head):
+    """"xlsx", "html" or "csv" from a file's first bytes; raises ValueError for legacy binary .xls."""
+    if head.startswith(XLSX_MAGIC):
+        return "xlsx"
+    if head.startswith(BIFF_MAGIC):
+        raise ValueError("Legacy .xls files are not supported; save the sheet as .xlsx or CSV")
+    if head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<"):
+        return "html"
+    return "csv"
+
+
+def detect_encoding(head):
+    """First of ENCODINGS that decodes `head`; None while it is plain ASCII (readable as either)."""
+    if head.isascii():
+        return None
+    for encoding in ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("File is neither UTF-8 nor CP949 (EUC-KR) text")
+
+
+def decoded_lines(stream, encoding):
+    """Lines of `stream` decoded a chunk at a time (line endings kept, as csv.reader expects).
+
+    With encoding=None the first chunk that isn't plain ASCII picks it, so a
+    CP949 file whose first READ_CHUNK bytes are ASCII isn't read as UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)() if encoding else None
+    pending = ""
+    try:
+        while True:
+            chunk = stream.read(READ_CHUNK)
+            if decoder is None and not chunk.isascii():
+                encoding = detect_encoding(chunk)
+                decoder = codecs.getincrementaldecoder(encoding)()
+            text = pending + (chunk.decode("ascii") if decoder is None else decoder.decode(chunk, final=not chunk))
+            parts = text.split("\n")
+            pending = parts.pop()
+            for part in parts:
+                yield part + "\n"
+            if not chunk:
+                break
+    except UnicodeDecodeError as e:
+        raise ValueError(f"File is not valid {encoding} text: {e}")
+    if pending:
+        yield pending
+
+
+def csv_rows(stream, encoding):
+    """(line number, cells) for each CSV record."""
+    reader = csv.reader(decoded_lines(stream, encoding))
+    for cells in reader:
+        yield reader.line_num, cells
+
+
+def xlsx_rows(stream):
+    """(row number, cells) of the first worksheet, read in openpyxl's streaming read-only mode."""
+    if openpyxl is None:
+        raise ValueError("Reading .xlsx files requires openpyxl (pip install openpyxl)")
+    # The zip directory is at the end of the file, so spool it to disk first
+    with tempfile.SpooledTemporaryFile(max_size=READ_CHUNK * 16) as f:
+        shutil.copyfileobj(stream, f, READ_CHUNK)
+        f.seek(0)
+        try:
+            workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Cannot read .xlsx file: {e}")
+        try:
+            for number, cells in enumerate(workbook.active.iter_rows(values_only=True), 1):
+                yield number, list(cells)
+        finally:
+            workbook.close()
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _has_any(label, words):
+    lowered = label.lower()
+    return any(word in lowered for word in words)
+
+
+def _zone_code(part):
+    rest = part.lower()
+    for words in DIRECTION_WORDS.values():
+        for word in words:
+            rest = rest.replace(word, "")
+    return ZONE_CODES.get(CODE_RE.sub("", rest.upper()))
+
+
+def classify(parts):
+    """("date" | "hour" | "terminal", None) or (direction, zone key or "total") for a column's header cells.
+
+    The direction may come from any header row (a group cell above); the
+    rest is decided by the lowest cell that says something.
+    """
+    joined = " ".join(parts)
+    direction = next((name for name, words in DIRECTION_WORDS.items() if _has_any(joined, words)), None)
+    for part in reversed(parts):
+        if not part:
+            continue
+        if _has_any(part, DATE_WORDS):
+            return "date", None
+        if _has_any(part, TERMINAL_WORDS):
+            return "terminal", None
+        if direction is None:
+            if _has_any(part, HOUR_WORDS):
+                return "hour", None
+        elif _has_any(part, TOTAL_WORDS):
+            return direction, "total"
+        elif _zone_code(part):
+            return direction, _zone_code(part)
+    return None
+
+
+def column_parts(header_rows):
+    """Header cells per column, top to bottom; blanks in the upper rows repeat the cell to their left (merged group cells)."""
+    width = max(len(row) for row in header_rows)
+    columns = [[] for _ in range(width)]
+    for depth, row in enumerate(header_rows):
+        carried = ""
+        for i in range(width):
+            cell = _text(row[i]) if i < len(row) else ""
+            if depth < len(header_rows) - 1:
+                carried = cell or carried
+                cell = carried
+            columns[i].append(cell)
+    return columns
+
+
+class ColumnMap:
+    """Which column holds the date, hour, terminal and each direction x zone (several may add up)."""
+
+    def __init__(self, labels):
+        self.date = self.hour = self.terminal = None
+        self.counts = {direction: {} for direction in DIRECTION_WORDS}
+        for i, parts in enumerate(labels):
+            kind = classify(parts)
+            if kind is None:
+                continue
+            name, key = kind
+            if key is None:
+                if getattr(self, name) is None:
+                    setattr(self, name, i)
+            else:
+                self.counts[name].setdefault(key, []).append(i)
+        if self.hour is None:
+            raise ValueError("No hour column (시간) in the header")
+        if not any(self.counts.values()):
+            raise ValueError("No arrival/departure zone columns (입국/출국) in the header")
+        # (direction, [(zone, columns)], total columns or None), resolved once per file
+        self.plan = [(direction, [(zone, keys.get(zone, ())) for zone in ZONE_KEYS], keys.get("total"))
+                     for direction, keys in self.counts.items()]
+
+    def zone_counts(self, cells):
+        """{direction: {AB, C, D, EF, total}} for one data row."""
+        width = len(cells)
+        result = {}
+        for direction, zones, total in self.plan:
+            counts = {zone: sum(parse_count(cells[i]) if i < width else 0 for i in indexes)
+                      for zone, indexes in zones}
+            counts["total"] = (sum(parse_count(cells[i]) if i < width else 0 for i in total) if total
+                               else sum(counts.values()))
+            result[direction] = counts
+        return result
+
+    def describe(self, parts):
+        labels = [" ".join(part for part in column if part) for column in parts]
+        columns = {"date": self.date, "hour": self.hour, "terminal": self.terminal}
+        described = {name: labels[i] for name, i in columns.items() if i is not None}
+        for direction, keys in self.counts.items():
+            for key, indexes in keys.items():
+                described[f"{direction}.{key}"] = [labels[i] for i in indexes]
+        return described
+
+
+def _is_data_row(cells):
+    # Hour rows are mostly numbers; header rows mostly words (the airport's
+    # gate numbers 1..4 are a minority of their row)
+    texts = [_text(cell) for cell in cells if _text(cell)]
+    numbers = sum(1 for text in texts if text.replace(",", "").isdigit())
+    return numbers >= 3 and numbers * 2 > len(texts)
+
+
+def parse_terminal(value):
+    text = _text(value)
+    for terminal, name in TERMINAL_NAMES.items():
+        if text == name:
+            return terminal
+    return normalize_terminal(text)
+
+
+def parse_count(value):
+    if isinstance(value, str):
+        text = value.strip()
+        if text.isdigit():
+            return int(text)  # the common CSV case
+        text = text.replace(",", "")
+        if text.isdigit():
+            return int(text)
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        number = value
+    else:
+        text = str(value).replace(",", "").strip()
+        if text in ("", "-"):
+            return 0
+        try:
+            number = float(text)
+        except ValueError:
+            raise ValueError(f"{value!r} is not a passenger count")
+    if number < 0 or number != int(number):
+        raise ValueError(f"{value!r} is not a passenger count")
+    return int(number)
+
+
+def parse_hour(value):
+    """Start hour 0..23, or None for a total row. Accepts "07~08", "07:00", "7시", 7 and time values."""
+    if isinstance(value, (datetime, time_of_day)):
+        return value.hour
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        hour = int(value)
+    else:
+        text = _text(value)
+        if any(marker in text for marker in TOTAL_MARKERS):
+            return None
+        match = HOUR_RE.search(text)
+        if match is None:
+            raise ValueError(f"{text!r} is not an hour")
+        hour = int(match.group(1))
+    if not 0 <= hour <= 23:
+        raise ValueError(f"Hour {hour} outside 0..23")
+    return hour
+
+
+def parse_day(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = _text(value).replace("/", "-").replace(".", "-").rstrip("-")
+    try:
+        return to_date(text).isoformat()
+    except ValueError:
+        raise ValueError(f"{text!r} is not a date")
+
+
+def hour_label(hour):
+    # Same labels as the 883 table ("23~00")
+    return f"{hour:02d}~{(hour + 1) % 24:02d}"
+
+
+def new_record(day, terminal):
+    return {"date": day, "terminal": terminal, "lastUpdated": datetime.now().isoformat(), "source": SOURCE,
+            "hourlyData": []}
+
+
+def read_rows(rows, date_param=None, terminal=None):
+    """Group (line, cells) rows into records; returns (records, report)."""
+    terminal = normalize_terminal(terminal)
+    default_day = parse_day(date_param) if date_param else None
+    report = {"rows": 0, "skippedRows": 0, "errorCount": 0, "errors": []}
+
+    def error(line, message):
+        report["errorCount"] += 1
+        report["skippedRows"] += 1
+        if len(report["errors"]) < MAX_ERRORS:
+            report["errors"].append({"line": line, "error": message})
+
+    header, columns = [], None
+    by_key = {}                      # (terminal, date) -> {hour: row}
+    last_day = default_day
+    for line, cells in rows:
+        if not any(_text(cell) for cell in cells):
+            continue
+        if columns is None:
+            if not _is_data_row(cells):
+                header.append(cells)
+                if len(header) > MAX_HEADER_ROWS:
+                    raise ValueError(f"No data rows after {MAX_HEADER_ROWS} header rows")
+                continue
+            if not header:
+                raise ValueError("Missing header row")
+            labels = column_parts(header)
+            columns = ColumnMap(labels)
+            report["columns"] = columns.describe(labels)
+            if columns.date is None and default_day is None:
+                raise ValueError("No date column (날짜); give the date of the file's single day")
+
+        def cell(i):
+            return cells[i] if i is not None and i < len(cells) else None
+
+        try:
+            hour = parse_hour(cell(columns.hour))
+            if hour is None:
+                continue  # 합계 row
+            day = _text(cell(columns.date))
+            # A blank date repeats the one above (merged cells in spreadsheets)
+            day = parse_day(cell(columns.date)) if day else last_day
+            if day is None:
+                raise ValueError("No date")
+            row_terminal = parse_terminal(cell(columns.terminal)) if _text(cell(columns.terminal)) else terminal
+            row = {"hour": hour_label(hour), "hourStart": hour, **columns.zone_counts(cells)}
+        except ValueError as e:
+            error(line, str(e))
+            continue
+        last_day = day
+        hours = by_key.setdefault((row_terminal, day), {})
+        if hour in hours:
+            error(line, f"Duplicate hour {hour_label(hour)} for {row_terminal} {day}")
+            continue
+        hours[hour] = row
+        report["rows"] += 1
+        if report["rows"] > MAX_ROWS:
+            raise ValueError(f"Too many rows (max {MAX_ROWS})")
+
+    if columns is None:
+        raise ValueError("No data rows found")
+    records = []
+    for (row_terminal, day), hours in sorted(by_key.items(), key=lambda item: (item[0][1], item[0][0])):
+        record = new_record(day, row_terminal)
+        record["hourlyData"] = [hours[hour] for hour in sorted(hours)]
+        record["contentHash"] = content_hash(record)
+        records.append(record)
+    return records, report
+
+
+def read_forecasts(stream, date_param=None, terminal=None, file_format=None):
+    """Parse a forecast file from a binary stream into per-day records; returns (records, report)."""
+    head = stream.read(READ_CHUNK)
+    if not head:
+        raise ValueError("Empty file")
+    file_format = file_format or sniff_format(head)
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format {file_format!r} (expected one of {', '.join(FORMATS)})")
+    stream = BoundedReader(stream, prefix=head)
+
+    if file_format == "xlsx":
+        records, report = read_rows(xlsx_rows(stream), date_param, terminal)
+    elif file_format == "html":
+        if not date_param:
+            raise ValueError("The airport's table export holds one day; give its date")
+        html = "".join(decoded_lines(stream, detect_encoding(head)))
+        forecast = parse_airport_html(html, to_date(date_param).strftime("%Y%m%d"),
+                                      terminal=normalize_terminal(terminal), check_terminal=False)
+        if not forecast["hourlyData"]:
+            raise ValueError("No passenger table found in the file")
+        forecast["source"] = SOURCE
+        records = [forecast]
+        report = {"rows": len(forecast["hourlyData"]), "skippedRows": 0, "errorCount": 0, "errors": []}
+    else:
+        records, report = read_rows(csv_rows(stream, detect_encoding(head)), date_param, terminal)
+    report["format"] = file_format
+    return records, report
+
+
+def import_forecasts(stream, stores=None, date_param=None, terminal=None, file_format=None, dry_run=False):
+    """read_forecasts, then write each terminal's days into its store ({terminal: HistoryStore}).
+
+    Days whose hourly data matches the stored day are counted as unchanged.
+    """
+    started = time.perf_counter()
+    records, report = read_forecasts(stream, date_param, terminal, file_format)
+    stored = []
+    if not dry_run:
+        if stores is None:
+            stores = {name: terminal_history(name) for name in TERMINALS}
+        by_terminal = {}
+        for record in records:
+            by_terminal.setdefault(record["terminal"], []).append(record)
+        for record_terminal, terminal_records in by_terminal.items():
+            stored.extend(stores[record_terminal].extend(terminal_records))
+    days = [record["date"] for record in records]
+    report.update({
+        "days": len(records),
+        "start": min(days) if days else None,
+        "end": max(days) if days else None,
+        "terminals": sorted({record["terminal"] for record in records}),
+        "stored": len(stored),
+        "unchanged": 0 if dry_run else len(records) - len(stored),
+        "dryRun": dry_run,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+    })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import forecast files (CSV, .xlsx, airport.kr export) into history")
+    parser.add_argument("file")
+    parser.add_argument("--date", help="date of a single-day file without a date column (YYYY-MM-DD or YYYYMMDD)")
+    parser.add_argument("--terminal", type=normalize_terminal, default=DEFAULT_TERMINAL,
+                        help="terminal of rows without a terminal column (default: T1)")
+    parser.add_argument("--format", choices=FORMATS, help="default: detected from the file's content")
+    parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR,
+                        help="history root; T2 is stored in its T2/ subdirectory")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+    args = parser.parse_args(argv)
+
+    stores = {terminal: terminal_history(terminal, args.history_dir) for terminal in TERMINALS}
+    try:
+        with open(args.file, "rb") as f:
+            report = import_forecasts(f, stores, args.date, args.terminal, args.format, args.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 1 if report["errorCount"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
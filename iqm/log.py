@@ -0,0 +1,119 @@
+"""Logging setup for server.py.
+
+Every logger writes into an in-memory queue; a single listener thread does the
+console/file I/O so request threads never block on disk. Files rotate at a
+fixed size:
+
+- server.log        everything at the configured level and above
+- server_error.log  errors only
+- server_debug.log  per-row parser dump (logger "iqm.parser.rows"), off by
+                    default and switchable at runtime with set_row_dump()
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+ROW_LOGGER = "iqm.parser.rows"
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+_listener = None
+_level_handlers = []
+
+
+class _ExcludeFilter(logging.Filter):
+    # Inverse of logging.Filter: drop records from `name` and its children
+    def filter(self, record):
+        return not super().filter(record)
+
+
+def _rotating(path, level, max_bytes, backup_count, formatter):
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup_logging(level="INFO", log_dir="logs", max_bytes=DEFAULT_MAX_BYTES,
+                  backup_count=DEFAULT_BACKUP_COUNT, row_dump=False, console=True):
+    global _listener, _level_handlers
+    if _listener is not None:
+        shutdown()
+
+    level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    formatter = logging.Formatter(LOG_FORMAT)
+    os.makedirs(log_dir, exist_ok=True)
+
+    not_rows = _ExcludeFilter(ROW_LOGGER)
+    only_rows = logging.Filter(ROW_LOGGER)
+
+    main_file = _rotating(os.path.join(log_dir, "server.log"), level, max_bytes, backup_count, formatter)
+    main_file.addFilter(not_rows)
+    error_file = _rotating(os.path.join(log_dir, "server_error.log"), logging.ERROR,
+                           max_bytes, backup_count, formatter)
+    error_file.addFilter(not_rows)
+    row_file = _rotating(os.path.join(log_dir, "server_debug.log"), logging.DEBUG,
+                         max_bytes, backup_count, formatter)
+    row_file.addFilter(only_rows)
+
+    handlers = [main_file, error_file, row_file]
+    _level_handlers = [main_file]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(level)
+        console_handler.setFormatter(formatter)
+        console_handler.addFilter(not_rows)
+        handlers.append(console_handler)
+        _level_handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    set_row_dump(row_dump)
+    atexit.register(shutdown)
+
+
+def set_level(level):
+    value = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger().setLevel(value)
+    for handler in _level_handlers:
+        handler.setLevel(value)
+
+
+def set_row_dump(enabled):
+    logging.getLogger(ROW_LOGGER).setLevel(logging.DEBUG if enabled else logging.WARNING)
+
+
+def row_dump_enabled():
+    return logging.getLogger(ROW_LOGGER).isEnabledFor(logging.DEBUG)
+
+
+def get_state():
+    return {
+        "level": logging.getLevelName(logging.getLogger().level),
+        "rowDump": row_dump_enabled(),
+    }
+
+
+def shutdown():
+    # Flush queued records and stop the listener thread
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,214 @@
+"""Prometheus-style metrics for server.py's /metrics endpoint (text format 0.0.4).
+
+Metrics are module-level objects registered in REGISTRY; instrumented code
+calls inc() / set() / observe() with label values as keyword arguments. An
+update is one dict lookup and one bisect under a lock, cheap enough for every
+request and every upstream page. Numbers that are already tracked elsewhere
+(cache and scheduler stats) are read at scrape time by collectors instead of
+being counted twice.
+"""
+
+import bisect
+import functools
+import math
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def set_collector(self, name, collect):
+        """Add or replace a scrape-time collector.
+
+        `collect()` returns [(metric name, type, help, [(labels dict, value), ...]), ...].
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collect in collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}   # label values tuple -> value
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def _labels(self, key, extra=()):
+        return _format_labels(list(zip(self.labelnames, key)) + list(extra))
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help_text, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (last one is +Inf), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed seconds of its block."""
+        return _Timer(self, labels)
+
+    def timed(self, **labels):
+        """Decorator form of time()."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Timer(self, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{self._labels(key, [('le', _format_value(float(bound)))])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+# --- Metrics ---------------------------------------------------------------
+
+HTTP_REQUESTS = Counter("iqm_http_requests_total", "HTTP requests handled by server.py.",
+                        ("route", "method", "status"))
+HTTP_DURATION = Histogram("iqm_http_request_duration_seconds",
+                          "Time to handle a request (not recorded for /api/stream).", ("route",))
+HTTP_RESPONSE_BYTES = Histogram("iqm_http_response_bytes", "Response body size as sent (after compression).",
+                                ("route",), buckets=SIZE_BUCKETS)
+STAGE_DURATION = Histogram("iqm_stage_duration_seconds",
+                           "Time spent in one stage of a request or background job.", ("stage",))
+
+UPSTREAM_DURATION = Histogram("iqm_upstream_fetch_duration_seconds", "airport.kr request time per page.",
+                              ("page",))
+UPSTREAM_REQUESTS = Counter("iqm_upstream_requests_total",
+                            "airport.kr requests per page by outcome (ok, not_modified, http_error, timeout, error).",
+                            ("page", "outcome"))
+UPSTREAM_BYTES = Histogram("iqm_upstream_response_bytes", "airport.kr response body size per page.",
+                           ("page",), buckets=SIZE_BUCKETS)
+
+PARSE_DURATION = Histogram("iqm_parse_duration_seconds", "Page parse time.", ("page",))
+PARSE_ROWS = Counter("iqm_parse_rows_total", "Hourly rows parsed from the passenger forecast table.", ("page",))
+PARSE_LAST_ROWS = Gauge("iqm_parse_last_rows", "Rows found by the most recent parse (0 suggests a layout change).",
+                        ("page",))
+PARSE_REUSED = Counter("iqm_parse_reused_total", "Parses skipped because the page's data fragment was unchanged.",
+                       ("page",))
+PARSE_ERRORS = Counter("iqm_parse_errors_total", "Pages fetched successfully but failed to parse.", ("page",))
+
+ALERT_TRANSITIONS = Counter("iqm_alert_transitions_total", "Alert level changes emitted by the alert engine.",
+                            ("scope", "level"))
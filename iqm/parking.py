@@ -0,0 +1,169 @@
+"""Parsers for the airport.kr parking availability pages (964 short-term, 965 long-term)."""
+
+import re
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from iqm import metrics
+
+SHORT_CONTAINER = "#menu964_obj1181"
+LONG_CONTAINER = "#menu965_obj1182"
+
+NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+def _container_fragment(html, element_id):
+    # Source of the element with id=element_id that holds the counts (None if absent)
+    match = re.search(r"<([a-z][a-z0-9]*)\b[^>]*\bid\s*=\s*[\"']?" + re.escape(element_id) + r"[\"'\s>]",
+                      html, re.IGNORECASE)
+    if match is None:
+        return None
+    depth = 1
+    tag_re = re.compile(r"<(/?)" + match.group(1) + r"\b", re.IGNORECASE)
+    for tag in tag_re.finditer(html, match.end()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            close = html.find(">", tag.end())
+            return html[match.start():close + 1 if close >= 0 else len(html)]
+    return html[match.start():]
+
+
+def short_term_fragment(html):
+    return _container_fragment(html, SHORT_CONTAINER[1:])
+
+
+def long_term_fragment(html):
+    return _container_fragment(html, LONG_CONTAINER[1:])
+
+
+def _available(val_el):
+    # "113 대" -> 113; text without digits (e.g. "만차") -> 0
+    digits = NON_DIGIT_RE.sub("", val_el.get_text(strip=True))
+    return int(digits) if digits else 0
+
+
+@metrics.PARSE_DURATION.timed(page="964")
+def parse_short_term(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    container = soup.select_one(SHORT_CONTAINER)
+    if not container:
+        raise ValueError("Short term container not found")
+
+    # Initialize with defaults
+    st_data = {
+        "floor1": {"available": 0, "name": "지상 1층"},
+        "basement1": {"available": 0, "name": "지하 1층"},
+        "basement2": {"available": 0, "name": "지하 2층"}
+    }
+
+    # Iterate all list items to find matches
+    for item in container.select("ul > li"):
+        label_el = item.select_one(".num-txt")
+        val_el = item.select_one(".num-noti strong")
+
+        if not label_el or not val_el:
+            continue
+
+        label = label_el.get_text(strip=True)
+        val = _available(val_el)
+
+        if "지상 1층" in label:
+            st_data["floor1"]["available"] = val
+        elif "지하 1층" in label:
+            st_data["basement1"]["available"] = val
+        elif "지하 2층" in label:
+            st_data["basement2"]["available"] = val
+
+    return st_data
+
+
+@metrics.PARSE_DURATION.timed(page="965")
+def parse_long_term(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    container = soup.select_one(LONG_CONTAINER)
+    if not container:
+        raise ValueError("Long term container not found")
+
+    lt_data = {
+        "east": {
+            "p1": {"available": 0, "name": "장기주차장 P1"},
+            "tower": {"available": 0, "name": "주차타워 동편"},
+            "p3": {"available": 0, "name": "장기주차장 P3"}
+        },
+        "west": {
+            "p2": {"available": 0, "name": "장기주차장 P2"},
+            "tower": {"available": 0, "name": "주차타워 서편"},
+            "p4": {"available": 0, "name": "장기주차장 P4"}
+        }
+    }
+
+    # East and West sit in separate lists; a list mentioning P1/P3 is East,
+    # one mentioning P2/P4 is West.
+    for ul in container.select("ul"):
+        entries = []
+        is_east = False
+        is_west = False
+
+        for item in ul.select("li"):
+            label_el = item.select_one(".num-txt")
+            if not label_el:
+                continue
+            label = label_el.get_text(strip=True)
+            if "P1" in label or "P3" in label:
+                is_east = True
+            if "P2" in label or "P4" in label:
+                is_west = True
+
+            val_el = item.select_one(".num-noti strong")
+            if val_el:
+                entries.append((label, _available(val_el)))
+
+        for label, val in entries:
+            if is_east:
+                if "P1" in label:
+                    lt_data["east"]["p1"]["available"] = val
+                elif "P3" in label:
+                    lt_data["east"]["p3"]["available"] = val
+                elif "주차타워" in label:
+                    lt_data["east"]["tower"]["available"] = val
+            elif is_west:
+                if "P2" in label:
+                    lt_data["west"]["p2"]["available"] = val
+                elif "P4" in label:
+                    lt_data["west"]["p4"]["available"] = val
+                elif "주차타워" in label:
+                    lt_data["west"]["tower"]["available"] = val
+
+    return lt_data
+
+
+def new_parking_result(now=None):
+    now = now or datetime.now()
+    return {
+        "id": now.strftime("%Y%m%d%H%M%S"),
+        "lastUpdated": now.isoformat(),
+        "shortTerm": None,
+        "longTerm": None,
+        "errors": []
+    }
+
+
+def flatten_available(parking):
+    """{"shortTerm.floor1": 113, "longTerm.east.p1": 40, ...} for every lot present."""
+    out = {}
+
+    def walk(node, prefix):
+        if not isinstance(node, dict):
+            return
+        if "available" in node:
+            out[prefix] = node["available"]
+            return
+        for key, value in node.items():
+            walk(value, f"{prefix}.{key}")
+
+    for section in ("shortTerm", "longTerm"):
+        walk(parking.get(section), section)
+    return out
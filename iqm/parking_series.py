@@ -0,0 +1,253 @@
+"""Delta-encoded time series of parking availability.
+
+Layout under the store root (one file per local day):
+
+    2026-07-24.jsonl
+        {"t": 1784860800, "k": {"shortTerm.floor1": 113, ...}}   keyframe: every lot
+        {"t": 1784860860, "d": {"shortTerm.floor1": 109}}        delta: changed lots only
+        {"t": 1784861760}                                        heartbeat: sampled, nothing changed
+
+Each day file opens with a keyframe, so any day can be decoded on its own.
+Unchanged samples are not written except for a heartbeat every
+`heartbeat` seconds; queries carry the last value forward for at most
+`max_gap` seconds past the last line, so an outage shows up as gaps
+(None) rather than a flat line.
+
+compact() keeps raw per-sample files for `raw_days`, rewrites older days at
+`downsample` resolution (the value at the end of each bucket; the keyframe
+records "res"), and deletes days older than `retention_days`.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from iqm.parking import flatten_available
+
+DEFAULT_SERIES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "parking")
+SUFFIX = ".jsonl"
+
+HEARTBEAT = 900          # seconds between "still sampling" lines when nothing changes
+MAX_GAP = 2 * HEARTBEAT  # carry a value forward at most this long past the last line
+RAW_DAYS = 7             # days kept at full sampling resolution
+DOWNSAMPLE = 600         # resolution (seconds) for older days
+RETENTION_DAYS = 90      # days kept at all
+
+
+def day_of(timestamp):
+    return datetime.fromtimestamp(timestamp).date().isoformat()
+
+
+def day_start(day):
+    return int(datetime.combine(date.fromisoformat(day), datetime.min.time()).timestamp())
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def decode_day(lines):
+    """Yield (t, state) after every line of one day file; state is a fresh dict each time."""
+    state = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # partial last line from an interrupted append
+        if "k" in record:
+            state = dict(record["k"])
+        elif "d" in record:
+            state = {**state, **record["d"]}
+        yield record["t"], state
+
+
+class ParkingSeries:
+    # Single writer per store (the refresh job); readers may run concurrently.
+
+    def __init__(self, root=DEFAULT_SERIES_DIR, heartbeat=HEARTBEAT, max_gap=MAX_GAP):
+        self.root = root
+        self.heartbeat = heartbeat
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self._day = None       # day the in-memory state belongs to
+        self._state = None     # last written values
+        self._last_t = None    # timestamp of the last written line
+
+    def _path(self, day):
+        return os.path.join(self.root, day + SUFFIX)
+
+    def days(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(SUFFIX)] for name in os.listdir(self.root) if name.endswith(SUFFIX))
+
+    def _read_day(self, day):
+        try:
+            with open(self._path(day), encoding="utf-8") as f:
+                return list(decode_day(f))
+        except FileNotFoundError:
+            return []
+
+    def _restore(self, day):
+        # Resume the delta chain after a restart
+        samples = self._read_day(day)
+        self._day = day
+        self._state, self._last_t = (samples[-1][1], samples[-1][0]) if samples else (None, None)
+
+    # --- Writing ------------------------------------------------------------
+
+    def append(self, parking, timestamp=None):
+        """Record one parking result (as written to parking_data.json).
+
+        Returns "keyframe", "delta", "heartbeat" or None when nothing was written.
+        Lots missing from `parking` (e.g. a failed section) are left unchanged.
+        """
+        values = flatten_available(parking)
+        if not values:
+            return None
+        t = int(timestamp if timestamp is not None else time.time())
+        day = day_of(t)
+        with self._lock:
+            if self._day != day:
+                self._restore(day)
+            if self._state is None:
+                record, kind = {"t": t, "k": values}, "keyframe"
+                self._state = dict(values)
+            else:
+                changed = {lot: v for lot, v in values.items() if self._state.get(lot) != v}
+                if changed:
+                    record, kind = {"t": t, "d": changed}, "delta"
+                    self._state.update(changed)
+                elif t - self._last_t >= self.heartbeat:
+                    record, kind = {"t": t}, "heartbeat"
+                else:
+                    return None
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._path(day), "a", encoding="utf-8") as f:
+                f.write(_line(record))
+            self._last_t = t
+            return kind
+
+    # --- Queries ------------------------------------------------------------
+
+    def samples(self, start, end):
+        """(t, state) for every stored line with start <= t <= end."""
+        out = []
+        day = date.fromisoformat(day_of(start))
+        last = date.fromisoformat(day_of(end))
+        while day <= last:
+            out.extend(s for s in self._read_day(day.isoformat()) if start <= s[0] <= end)
+            day += timedelta(days=1)
+        return out
+
+    def _state_before(self, t):
+        # Last stored state strictly before t (searches back one day at most)
+        for day in (day_of(t), day_of(t - 86400)):
+            earlier = [s for s in self._read_day(day) if s[0] < t]
+            if earlier:
+                return earlier[-1]
+        return None
+
+    def lots(self):
+        latest = self.latest()
+        return sorted(latest["values"]) if latest else []
+
+    def latest(self):
+        for day in reversed(self.days()):
+            samples = self._read_day(day)
+            if samples:
+                return {"t": samples[-1][0], "values": samples[-1][1]}
+        return None
+
+    def series(self, lots=None, hours=6, resolution=300, now=None):
+        """Fixed-resolution series over the last `hours`.
+
+        Returns {"start", "end", "resolution", "times": [bucket end, ...],
+        "lots": {lot: [value or None, ...]}}; each value is the last known
+        availability at the bucket end, None where no sample is recent enough.
+        """
+        resolution = max(1, int(resolution))
+        end = int(now if now is not None else time.time())
+        end -= end % resolution
+        start = end - int(hours * 3600)
+        times = list(range(start + resolution, end + 1, resolution))
+
+        samples = self.samples(start + 1, end)
+        prior = self._state_before(start + 1)
+        if prior is not None:
+            samples.insert(0, prior)
+
+        wanted = lots or sorted({lot for _, state in samples for lot in state})
+        out = {lot: [] for lot in wanted}
+        i = -1
+        for bucket_end in times:
+            while i + 1 < len(samples) and samples[i + 1][0] <= bucket_end:
+                i += 1
+            fresh = i >= 0 and bucket_end - samples[i][0] <= self.max_gap
+            for lot in wanted:
+                out[lot].append(samples[i][1].get(lot) if fresh else None)
+        return {"start": start, "end": end, "resolution": resolution, "times": times, "lots": out}
+
+    # --- Maintenance --------------------------------------------------------
+
+    def compact(self, raw_days=RAW_DAYS, downsample=DOWNSAMPLE, retention_days=RETENTION_DAYS, today=None):
+        """Downsample days older than raw_days and delete days older than retention_days.
+
+        Returns {"downsampled": [...], "deleted": [...]}.
+        """
+        today = date.fromisoformat(today) if today else date.today()
+        result = {"downsampled": [], "deleted": []}
+        for day in self.days():
+            age = (today - date.fromisoformat(day)).days
+            if age > retention_days:
+                os.remove(self._path(day))
+                result["deleted"].append(day)
+            elif age > raw_days and self._downsample_day(day, downsample):
+                result["downsampled"].append(day)
+        return result
+
+    def _downsample_day(self, day, resolution):
+        path = self._path(day)
+        with open(path, encoding="utf-8") as f:
+            first = f.readline()
+            try:
+                if json.loads(first).get("res", 0) >= resolution:
+                    return False  # already at this resolution
+            except ValueError:
+                pass
+            f.seek(0)
+            samples = list(decode_day(f))
+        if not samples:
+            return False
+
+        base = day_start(day)
+        lines, state, last_t, i = [], None, None, -1
+        for bucket_end in range(base + resolution, base + 86400 + 1, resolution):
+            moved = False
+            while i + 1 < len(samples) and samples[i + 1][0] <= bucket_end:
+                i += 1
+                moved = True
+            if i < 0 or not moved:
+                continue  # nothing sampled in this bucket: leave the gap
+            t, values = min(bucket_end, base + 86399), samples[i][1]
+            if state is None:
+                lines.append(_line({"t": t, "k": values, "res": resolution}))
+            else:
+                changed = {lot: v for lot, v in values.items() if state.get(lot) != v}
+                if changed:
+                    lines.append(_line({"t": t, "d": changed}))
+                elif t - last_t >= self.heartbeat:
+                    lines.append(_line({"t": t}))
+                else:
+                    continue
+            state, last_t = values, t
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return True
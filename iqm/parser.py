@@ -0,0 +1,448 @@
+"""Parser for the airport.kr passenger forecast page (883, table id="userEx").
+
+Used by server.py, scripts/fetch_data.py and scripts/update_data.py.
+
+Backends:
+- "stream": locates <table id="userEx"> with a regex search and tokenizes only
+  that fragment; falls back to a single html.parser pass over the document
+  when the id is missing or the table is nested. No tree is built and there
+  are no third-party dependencies.
+- "lxml": lxml.html tree + XPath, used when lxml is installed.
+- "bs4": BeautifulSoup with html.parser (the original implementation's tree).
+- "auto" (default): stream when the userEx id is present, otherwise lxml if
+  installed, otherwise stream's full-document pass.
+"""
+
+import hashlib
+import html as html_lib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+
+from iqm import metrics
+from iqm.terminals import DEFAULT_TERMINAL, TERMINAL_PARAM, normalize_terminal
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # optional
+    lxml_html = None
+
+log = logging.getLogger(__name__)
+# Per-row dump, silent unless enabled (see iqm.log.set_row_dump)
+row_log = logging.getLogger(__name__ + ".rows")
+
+TABLE_ID = "userEx"
+MIN_CELLS = 12          # time + 5 arrival + 6 departure columns
+FALLBACK_MIN_ROWS = 10  # a table with more rows than this is assumed to be the forecast
+
+HOUR_START_RE = re.compile(r"(\d+)")
+TARGET_TABLE_RE = re.compile(r"<table\b[^>]*\bid\s*=\s*[\"']?" + TABLE_ID + r"[\"'\s>]", re.IGNORECASE)
+TABLE_TAG_RE = re.compile(r"<(/?)table\b", re.IGNORECASE)
+# Unrolled "[^<]*(?:<(?!stop)[^<]*)*" loops: capture up to the next stop tag
+# without testing a lookahead at every character.
+TBODY_RE = re.compile(r"<tbody\b[^>]*>([^<]*(?:<(?!/tbody)[^<]*)*)", re.IGNORECASE)
+ROW_RE = re.compile(r"<tr\b[^>]*>([^<]*(?:<(?!tr\b|/tbody|/thead|/tfoot)[^<]*)*)", re.IGNORECASE)
+CELL_RE = re.compile(r"<t[dh]\b[^>]*>([^<]*(?:<(?!t[dh]\b|/tr)[^<]*)*)", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]*>")
+STREAM_CHUNK = 16 * 1024
+TOTAL_MARKERS = ("합", "계", "Total")
+# The search form's terminal <select> and its selected <option>
+TERMINAL_SELECT_RE = re.compile(r"<select\b[^>]*\bname\s*=\s*[\"']?" + TERMINAL_PARAM
+                                + r"[\"'\s>][^<]*(?:<(?!/select)[^<]*)*", re.IGNORECASE)
+SELECTED_OPTION_RE = re.compile(r"<option\b([^>]*\bselected\b[^>]*)>", re.IGNORECASE)
+OPTION_VALUE_RE = re.compile(r"\bvalue\s*=\s*[\"']?([^\"'\s>]+)", re.IGNORECASE)
+
+BACKENDS = ("auto", "stream", "lxml", "bs4")
+
+
+@dataclass(frozen=True)
+class ZoneCounts:
+    AB: int
+    C: int
+    D: int
+    EF: int
+    total: int
+
+    def to_dict(self):
+        return {"AB": self.AB, "C": self.C, "D": self.D, "EF": self.EF, "total": self.total}
+
+
+@dataclass(frozen=True)
+class HourlyRow:
+    hour: str
+    hour_start: int
+    arrival: ZoneCounts
+    departure: ZoneCounts
+
+    def to_dict(self):
+        return {
+            "hour": self.hour,
+            "hourStart": self.hour_start,
+            "arrival": self.arrival.to_dict(),
+            "departure": self.departure.to_dict(),
+        }
+
+
+def to_int(val):
+    return int(val) if val.isdigit() else 0
+
+
+def parse_row(cell_texts):
+    """Convert one row of cleaned cell texts to an HourlyRow, or None to skip it."""
+    if len(cell_texts) < MIN_CELLS:
+        return None
+
+    hour = cell_texts[0].replace("시", "")
+
+    # Exclude "Total" row (합계)
+    if any(marker in hour for marker in TOTAL_MARKERS):
+        return None
+
+    # Indices:
+    # 0: Time
+    # 1-4: Arr AB, C, D, EF    5: Arr Total
+    # 6-10: Dep 1, 2, 3, 4, 5/6    11: Dep Total
+    arrival = ZoneCounts(
+        AB=to_int(cell_texts[1]),
+        C=to_int(cell_texts[2]),
+        D=to_int(cell_texts[3]),
+        EF=to_int(cell_texts[4]),
+        total=to_int(cell_texts[5]),
+    )
+    departure = ZoneCounts(
+        AB=to_int(cell_texts[6]) + to_int(cell_texts[7]),
+        C=to_int(cell_texts[8]),
+        D=to_int(cell_texts[9]),
+        EF=to_int(cell_texts[10]),
+        total=to_int(cell_texts[11]),
+    )
+
+    # Parse start hour (e.g., "00~01" -> 0)
+    match = HOUR_START_RE.search(hour)
+    hour_start = int(match.group(1)) if match else 0
+
+    return HourlyRow(hour=hour, hour_start=hour_start, arrival=arrival, departure=departure)
+
+
+def parse_rows(table_rows):
+    hourly_rows = []
+    dump_rows = row_log.isEnabledFor(logging.DEBUG)
+    for cell_texts in table_rows:
+        if dump_rows:
+            row_log.debug("Row len: %d, Content: %s", len(cell_texts), cell_texts)
+        try:
+            row = parse_row(cell_texts)
+        except Exception as e:
+            log.warning("Row parsing error: %s for row: %s", e, cell_texts)
+            continue
+        if row is not None:
+            hourly_rows.append(row)
+    return hourly_rows
+
+
+# --- Table extraction -------------------------------------------------------
+
+class _TableCollector(HTMLParser):
+    # Records the cell texts of every table's rows (body rows only when the
+    # table has a <tbody>) and stops collecting once the userEx table closes.
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []         # open tables, innermost last
+        self.row = None         # cell texts of the current <tr>
+        self.cell = None        # text chunks of the current <td>/<th>
+        self.in_tbody = 0
+        self.target_rows = None
+        self.fallback_rows = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.target_rows is not None:
+            return
+        if tag == "table":
+            # Nested table: park the enclosing row/cell until it closes
+            self.stack.append({
+                "id": dict(attrs).get("id"),
+                "rows": [],
+                "body_rows": [],
+                "has_tbody": False,
+                "outer": (self.row, self.cell, self.in_tbody),
+            })
+            self.row, self.cell, self.in_tbody = None, None, 0
+        elif not self.stack:
+            return
+        elif tag == "tbody":
+            self.stack[-1]["has_tbody"] = True
+            self.in_tbody += 1
+        elif tag == "tr":
+            self._end_row()
+            self.row = []
+        elif tag in ("td", "th") and self.row is not None:
+            self._end_cell()
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if self.target_rows is not None or not self.stack:
+            return
+        if tag in ("td", "th"):
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+        elif tag == "tbody":
+            self._end_row()
+            self.in_tbody = max(0, self.in_tbody - 1)
+        elif tag == "table":
+            self._end_row()
+            table = self.stack.pop()
+            self.row, self.cell, self.in_tbody = table["outer"]
+            rows = table["body_rows"] if table["has_tbody"] else table["rows"]
+            if table["id"] == TABLE_ID:
+                self.target_rows = rows
+            elif self.fallback_rows is None and len(rows) > FALLBACK_MIN_ROWS:
+                self.fallback_rows = rows
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            text = data.strip()
+            if text:
+                self.cell.append(text)
+
+    def _end_cell(self):
+        if self.cell is not None:
+            self.row.append("".join(self.cell).replace(",", ""))
+            self.cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self.row is not None:
+            table = self.stack[-1]
+            table["rows"].append(self.row)
+            if self.in_tbody:
+                table["body_rows"].append(self.row)
+            self.row = None
+
+    def close_open_tables(self):
+        # Tables left open at EOF (truncated page) still count
+        while self.target_rows is None and self.stack:
+            self.handle_endtag("table")
+
+
+def _cell_text(inner):
+    # Same result as BeautifulSoup's get_text(strip=True) for flat cell markup
+    return "".join(html_lib.unescape(part).strip() for part in TAG_RE.split(inner)).replace(",", "")
+
+
+def _rows_fragment(fragment):
+    # Tokenize one isolated, non-nested <table> fragment with regexes
+    bodies = TBODY_RE.findall(fragment)
+    sections = bodies if bodies else [fragment]
+    return [
+        [_cell_text(cell) for cell in CELL_RE.findall(row)]
+        for section in sections
+        for row in ROW_RE.findall(section)
+    ]
+
+
+def _rows_stream(html):
+    # Fast path: jump straight to <table id="userEx"> and tokenize only that
+    # fragment, as long as no other table is nested inside it.
+    match = TARGET_TABLE_RE.search(html)
+    if match:
+        next_tag = TABLE_TAG_RE.search(html, match.end())
+        if next_tag is None or next_tag.group(1) == "/":
+            end = next_tag.start() if next_tag else len(html)
+            return _rows_fragment(html[match.end():end])
+
+        collector = _TableCollector()
+        for pos in range(match.start(), len(html), STREAM_CHUNK):
+            collector.feed(html[pos:pos + STREAM_CHUNK])
+            if collector.target_rows is not None:
+                return collector.target_rows
+        collector.close()
+        collector.close_open_tables()
+        if collector.target_rows is not None:
+            return collector.target_rows
+
+    # No id match: one pass over the whole document for the fallback table
+    collector = _TableCollector()
+    collector.feed(html)
+    collector.close()
+    collector.close_open_tables()
+    return collector.target_rows if collector.target_rows is not None else collector.fallback_rows
+
+
+def _cell_text_lxml(cell):
+    return "".join(t.strip() for t in cell.itertext()).replace(",", "")
+
+
+def _rows_lxml(html):
+    doc = lxml_html.fromstring(html)
+    tables = doc.xpath('//table[@id=$id]', id=TABLE_ID)
+    target = tables[0] if tables else None
+    if target is None:
+        for table in doc.iter("table"):
+            body = table.find(".//tbody")
+            if len((body if body is not None else table).xpath(".//tr")) > FALLBACK_MIN_ROWS:
+                target = table
+                break
+    if target is None:
+        return None
+    body = target.find(".//tbody")
+    rows = (body if body is not None else target).xpath(".//tr")
+    return [[_cell_text_lxml(c) for c in row if c.tag in ("td", "th")] for row in rows]
+
+
+def _rows_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    target = None
+    fallback = None
+    for table in soup.find_all("table"):
+        if table.get("id") == TABLE_ID:
+            target = table
+            break
+        if fallback is None:
+            tbody = table.find("tbody") or table
+            if len(tbody.find_all("tr")) > FALLBACK_MIN_ROWS:
+                fallback = table
+    target = target or fallback
+    if target is None:
+        return None
+    tbody = target.find("tbody") or target
+    return [
+        [cell.get_text(strip=True).replace(",", "") for cell in row.find_all(["td", "th"], recursive=False)]
+        for row in tbody.find_all("tr")
+    ]
+
+
+def _rows_auto(html):
+    if lxml_html is not None and not TARGET_TABLE_RE.search(html):
+        return _rows_lxml(html)
+    return _rows_stream(html)
+
+
+_EXTRACTORS = {"auto": _rows_auto, "stream": _rows_stream, "lxml": _rows_lxml, "bs4": _rows_bs4}
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "lxml" or lxml_html is not None]
+
+
+def extract_table_rows(html, backend=None):
+    """Return the forecast table as a list of rows of cleaned cell texts."""
+    backend = backend or "auto"
+    if backend not in _EXTRACTORS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    if backend == "lxml" and lxml_html is None:
+        raise ValueError("lxml backend requested but lxml is not installed")
+    rows = _EXTRACTORS[backend](html)
+    if rows is None:
+        raise ValueError("Could not find valid data table (id='userEx') in HTML")
+    return rows
+
+
+def format_date(date_param=None):
+    # date_param is YYYYMMDD, convert to YYYY-MM-DD; default to today
+    if date_param and len(date_param) == 8 and date_param.isdigit():
+        return f"{date_param[:4]}-{date_param[4:6]}-{date_param[6:]}"
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def content_hash(forecast):
+    """Hash of a forecast's date, terminal and hourly counts (not lastUpdated).
+
+    Lets clients and the update job tell whether derived data (e.g. the
+    precomputed staffing file) still matches the forecast.
+    """
+    key = {k: forecast.get(k) for k in ("date", "terminal", "hourlyData")}
+    body = json.dumps(key, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def table_fragment(html):
+    """Source text of the <table id="userEx"> element (None when the id is missing).
+
+    The rest of the page (session tokens, banners, timestamps) changes on
+    every request, so callers hash this to tell whether re-parsing is needed.
+    """
+    match = TARGET_TABLE_RE.search(html)
+    if match is None:
+        return None
+    depth = 1
+    for tag in TABLE_TAG_RE.finditer(html, match.end()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            close = html.find(">", tag.end())
+            return html[match.start():close + 1 if close >= 0 else len(html)]
+    return html[match.start():]
+
+
+def page_terminal(html):
+    """Terminal selected in the page's search form, or None when the page doesn't say."""
+    select = TERMINAL_SELECT_RE.search(html)
+    option = SELECTED_OPTION_RE.search(select.group(0)) if select else None
+    value = OPTION_VALUE_RE.search(option.group(1)) if option else None
+    if value is None:
+        return None
+    try:
+        return normalize_terminal(html_lib.unescape(value.group(1)))
+    except ValueError:
+        return None
+
+
+def check_page_terminal(html, terminal):
+    """Raise ValueError unless the page is for `terminal`.
+
+    If upstream ignored the terminal parameter it would return T1's page, and
+    that must not be stored as another terminal's forecast. A page that
+    doesn't name its terminal is accepted only for the default terminal,
+    which is what the unparameterised request always returned.
+    """
+    shown = page_terminal(html)
+    if shown == terminal or (shown is None and terminal == DEFAULT_TERMINAL):
+        return
+    raise ValueError(f"Requested terminal {terminal} but the page shows {shown or 'no terminal'}")
+
+
+def restamp_forecast(forecast, date_param=None, terminal=None):
+    """Copy of an earlier parse result for an unchanged table, with the current date and lastUpdated."""
+    forecast = {**forecast, "date": format_date(date_param), "lastUpdated": datetime.now().isoformat(),
+                "hourlyData": [dict(row) for row in forecast["hourlyData"]]}
+    if terminal:
+        forecast["terminal"] = terminal
+    forecast["contentHash"] = content_hash(forecast)
+    return forecast
+
+
+def parse_airport_html(html, date_param=None, backend=None, terminal=DEFAULT_TERMINAL, check_terminal=True):
+    """Parse the 883 page HTML into the PassengerForecast JSON schema.
+
+    check_terminal=False skips check_page_terminal, for saved table exports
+    whose terminal the caller states.
+    """
+    if check_terminal:
+        check_page_terminal(html, terminal)
+    start = time.perf_counter()
+    hourly_rows = parse_rows(extract_table_rows(html, backend))
+    metrics.PARSE_DURATION.observe(time.perf_counter() - start, page="883")
+    metrics.PARSE_ROWS.inc(len(hourly_rows), page="883")
+    metrics.PARSE_LAST_ROWS.set(len(hourly_rows), page="883")
+    log.info("Parsed %d rows", len(hourly_rows))
+
+    forecast = {
+        "date": format_date(date_param),
+        "terminal": terminal,
+        "lastUpdated": datetime.now().isoformat(),
+        "hourlyData": [row.to_dict() for row in hourly_rows],
+    }
+    forecast["contentHash"] = content_hash(forecast)
+    return forecast
+
+
+def parse_passenger_page(html, date_param=None, terminal=DEFAULT_TERMINAL):
+    """parse_airport_html with (date, terminal) as its extra arguments, as ParseCache and PageJob pass them."""
+    return parse_airport_html(html, date_param, terminal=terminal)
@@ -0,0 +1,169 @@
+"""Refresh jobs for the local data daemon (scripts/refresh_daemon.py, server.py --refresh).
+
+Passenger and parking data are refreshed by separate scheduler tasks, so each
+has its own interval and backoff. Every write goes through atomic_write_json,
+so the dev server and browsers only ever see a complete latest_data.json or
+parking_data.json. A failed fetch raises (triggering backoff) and leaves the
+previous file in place.
+
+With several terminals, every terminal's 883 page is fetched concurrently
+in one passenger run and written to its own partition (see iqm.terminals).
+
+Pages are revalidated with If-None-Match / If-Modified-Since when upstream
+sends validators, and a page whose table (or parking container) hashes the
+same as last time reuses the previous parse result. stats() counts both.
+"""
+
+import logging
+import os
+from datetime import datetime
+
+from iqm import metrics
+from iqm.fetch import (PARKING_LONG_PATH, PARKING_SHORT_PATH, PASSENGER_PATH, ConditionalGet, PageJob, ParseCache,
+                       atomic_write_json, fetch_all, make_session, upstream_base)
+from iqm.history import terminal_history
+from iqm.parking import (long_term_fragment, new_parking_result, parse_long_term, parse_short_term,
+                         short_term_fragment)
+from iqm.parking_series import ParkingSeries
+from iqm.parser import parse_passenger_page, restamp_forecast, table_fragment
+from iqm.scheduler import Scheduler, Task
+from iqm.terminals import DEFAULT_TERMINAL, normalize_terminal, partition_dir, passenger_params
+
+try:
+    from iqm import staffing
+except ImportError:  # NumPy not installed
+    staffing = None
+
+log = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT_DIR = os.path.join(ROOT_DIR, "src", "data")
+
+PASSENGER_INTERVAL = 300   # seconds; the forecast changes a few times per hour
+PARKING_INTERVAL = 120     # seconds; availability changes continuously
+SLOW_AFTER = 10.0          # a run slower than this counts towards backoff
+COMPACT_INTERVAL = 3600    # seconds between parking time-series compactions
+
+
+class DataRefresher:
+    """Fetch-and-write jobs; on_forecast / on_parking are called after each successful write.
+
+    `history` is True (each terminal's default store), a {terminal: HistoryStore}
+    dict, or False.
+    """
+
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, session=None, timeout=None,
+                 history=True, parking_series=True, precompute=True, on_forecast=None, on_parking=None,
+                 upstream=None, terminals=None):
+        self.output_dir = output_dir
+        self.terminals = tuple(normalize_terminal(t) for t in terminals or (DEFAULT_TERMINAL,))
+        self.session = session or make_session(pool_size=len(self.terminals) + 2)
+        self.timeout = timeout
+        self.upstream = upstream_base(upstream)
+        if history is True:
+            history = {terminal: terminal_history(terminal) for terminal in self.terminals}
+        self.history = history or None
+        self.parking_series = ParkingSeries() if parking_series is True else (parking_series or None)
+        self.precompute = precompute and staffing is not None
+        self.on_forecast = on_forecast
+        self.on_parking = on_parking
+        self.conditional = ConditionalGet()
+        self.parsers = {
+            "airport": ParseCache(parse_passenger_page, table_fragment, restamp_forecast, name="883"),
+            "shortTerm": ParseCache(parse_short_term, short_term_fragment, name="964"),
+            "longTerm": ParseCache(parse_long_term, long_term_fragment, name="965"),
+        }
+
+    def passenger_path(self, terminal=DEFAULT_TERMINAL):
+        return os.path.join(partition_dir(self.output_dir, terminal), "latest_data.json")
+
+    @property
+    def parking_path(self):
+        return os.path.join(self.output_dir, "parking_data.json")
+
+    def _timeout_kwargs(self):
+        return {"timeout": self.timeout} if self.timeout else {}
+
+    @metrics.STAGE_DURATION.timed(stage="refresh.passenger")
+    def refresh_passenger(self):
+        parse = self.parsers["airport"]
+        jobs = {
+            terminal: PageJob(self.upstream + PASSENGER_PATH, passenger_params(terminal=terminal),
+                              lambda html, terminal=terminal: parse(html, None, terminal))
+            for terminal in self.terminals
+        }
+        results = fetch_all(self.session, jobs, conditional=self.conditional, **self._timeout_kwargs())
+
+        forecasts, errors = {}, []
+        for terminal in self.terminals:
+            res = results[terminal]
+            if res.error is None and not res.value["hourlyData"]:
+                res = res._replace(error=ValueError("Passenger table is empty"), stage="parse")
+            if res.error is not None:
+                errors.append(f"{terminal}: {res.stage} failed: {res.error}")
+                continue
+            self.save_forecast(res.value, terminal)
+            forecasts[terminal] = res.value
+        if errors:
+            # Terminals that worked were still written; back off until all do
+            raise RuntimeError("; ".join(errors))
+        return forecasts
+
+    def save_forecast(self, forecast, terminal=DEFAULT_TERMINAL):
+        atomic_write_json(forecast, self.passenger_path(terminal))
+        store = self.history.get(terminal) if self.history is not None else None
+        if store is not None and store.append(forecast):
+            log.info("Appended %s %s to history", terminal, forecast["date"])
+        if self.precompute:
+            staffing.save_precomputed(forecast, os.path.join(partition_dir(self.output_dir, terminal),
+                                                             "latest_requirements.json"))
+        if self.on_forecast is not None:
+            self.on_forecast(forecast)
+
+    @metrics.STAGE_DURATION.timed(stage="refresh.parking")
+    def refresh_parking(self):
+        jobs = {
+            "shortTerm": PageJob(self.upstream + PARKING_SHORT_PATH, None, self.parsers["shortTerm"]),
+            "longTerm": PageJob(self.upstream + PARKING_LONG_PATH, None, self.parsers["longTerm"]),
+        }
+        results = fetch_all(self.session, jobs, conditional=self.conditional, **self._timeout_kwargs())
+        parking = new_parking_result(datetime.now())
+        for key, label in (("shortTerm", "Short-term"), ("longTerm", "Long-term")):
+            res = results[key]
+            if res.error is None:
+                parking[key] = res.value
+            else:
+                parking["errors"].append(f"{label}: {res.error}")
+
+        if parking["shortTerm"] is None and parking["longTerm"] is None:
+            # Keep the last good file rather than replacing it with nothing
+            raise RuntimeError("; ".join(parking["errors"]))
+        atomic_write_json(parking, self.parking_path)
+        if self.parking_series is not None:
+            self.parking_series.append(parking)
+        if self.on_parking is not None:
+            self.on_parking(parking)
+        if parking["errors"]:
+            # Partial result was written, but back off until both pages work
+            raise RuntimeError("; ".join(parking["errors"]))
+        return parking
+
+    def stats(self):
+        return {"conditional": self.conditional.stats(),
+                "parse": {name: cache.stats() for name, cache in self.parsers.items()}}
+
+
+def make_scheduler(refresher, passenger_interval=PASSENGER_INTERVAL, parking_interval=PARKING_INTERVAL,
+                   jitter=0.1, slow_after=SLOW_AFTER, max_backoff=None):
+    """Scheduler with independent passenger and parking tasks (an interval of 0 disables one)."""
+    tasks = []
+    if passenger_interval > 0:
+        tasks.append(Task("passenger", refresher.refresh_passenger, passenger_interval,
+                          jitter=jitter, slow_after=slow_after, max_interval=max_backoff))
+    if parking_interval > 0:
+        tasks.append(Task("parking", refresher.refresh_parking, parking_interval,
+                          jitter=jitter, slow_after=slow_after, max_interval=max_backoff))
+        if refresher.parking_series is not None:
+            tasks.append(Task("parking-compact", refresher.parking_series.compact, COMPACT_INTERVAL,
+                              jitter=jitter, run_at_start=False))
+    return Scheduler(tasks)
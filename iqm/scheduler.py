@@ -0,0 +1,162 @@
+"""Interval scheduler for periodic background jobs (used by the refresh daemon).
+
+Each Task runs on its own interval with random jitter, so jobs started
+together drift apart instead of hitting upstream in lockstep. A run that
+fails, or succeeds but takes longer than `slow_after` seconds, raises the
+task's backoff level; the next delay is
+
+    min(max_interval, interval * backoff_factor ** level) * (1 +/- jitter)
+
+and the first fast success resets the level. Runs of the same task never
+overlap; different tasks run concurrently on a small thread pool.
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+
+class Task:
+    def __init__(self, name, func, interval, jitter=0.1, slow_after=None,
+                 backoff_factor=2.0, max_interval=None, run_at_start=True):
+        self.name = name
+        self.func = func
+        self.interval = float(interval)
+        self.jitter = jitter
+        self.slow_after = slow_after
+        self.backoff_factor = backoff_factor
+        self.max_interval = float(max_interval) if max_interval else self.interval * 16
+        self.run_at_start = run_at_start
+
+        self.level = 0            # backoff level; 0 = normal interval
+        self.runs = 0
+        self.failures = 0
+        self.slow_runs = 0
+        self.last_duration = None
+        self.last_error = None
+        self.last_success = None  # wall clock
+        self.next_delay = self.interval
+
+    def record(self, duration, error=None):
+        """Update state after a run and return the delay until the next one."""
+        self.runs += 1
+        self.last_duration = duration
+        self.last_error = None if error is None else f"{type(error).__name__}: {error}"
+        slow = self.slow_after is not None and duration > self.slow_after
+        if error is not None:
+            self.failures += 1
+        else:
+            self.last_success = time.time()
+        if slow:
+            self.slow_runs += 1
+        self.level = self.level + 1 if (error is not None or slow) else 0
+
+        delay = min(self.max_interval, self.interval * self.backoff_factor ** self.level)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.next_delay = delay
+        return delay
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "nextDelay": round(self.next_delay, 2),
+            "backoffLevel": self.level,
+            "runs": self.runs,
+            "failures": self.failures,
+            "slowRuns": self.slow_runs,
+            "lastDuration": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "lastError": self.last_error,
+            "lastSuccess": self.last_success,
+        }
+
+
+class Scheduler(threading.Thread):
+    def __init__(self, tasks, clock=time.monotonic):
+        super().__init__(name="scheduler", daemon=True)
+        self.tasks = {task.name: task for task in tasks}
+        self.clock = clock
+        self._queue = []          # (due, seq, name)
+        self._seq = 0
+        self._current = {}        # name -> seq of its live queue entry (older ones are stale)
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(tasks)), thread_name_prefix="job")
+
+        now = self.clock()
+        for task in tasks:
+            first = 0.0 if task.run_at_start else task.interval
+            if task.jitter:
+                # Spread the first runs too
+                first += random.uniform(0, task.interval * task.jitter)
+            self._push(now + first, task.name)
+
+    def _push(self, due, name):
+        with self._lock:
+            self._seq += 1
+            self._current[name] = self._seq
+            heapq.heappush(self._queue, (due, self._seq, name))
+        self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Clear before reading the queue so a push in between still wakes us
+            self._wake.clear()
+            with self._lock:
+                now = self.clock()
+                ready = []
+                while self._queue and self._queue[0][0] <= now:
+                    _, seq, name = heapq.heappop(self._queue)
+                    if self._current.get(name) == seq:
+                        ready.append(name)
+                due = self._queue[0][0] if self._queue else None
+            for name in ready:
+                self._start(name)
+            if not ready:
+                self._wake.wait(None if due is None else max(0.0, due - now))
+
+    def _start(self, name):
+        with self._lock:
+            if name in self._running:
+                return  # still running; it reschedules itself when done
+            self._running.add(name)
+        try:
+            self._pool.submit(self._run_task, self.tasks[name])
+        except RuntimeError:
+            pass  # shutting down
+
+    def _run_task(self, task):
+        start = time.perf_counter()
+        error = None
+        try:
+            task.func()
+        except Exception as e:
+            error = e
+            log.warning("Job %s failed: %s", task.name, e)
+        duration = time.perf_counter() - start
+        delay = task.record(duration, error)
+        if task.level:
+            log.info("Job %s backing off: next run in %.0fs (level %d)", task.name, delay, task.level)
+        with self._lock:
+            self._running.discard(task.name)
+        if not self._stop_event.is_set():
+            self._push(self.clock() + delay, task.name)
+
+    def run_now(self, name):
+        """Run a task now instead of at its scheduled time (no-op while it is running)."""
+        self._push(self.clock(), name)
+
+    def stop(self, wait=False):
+        self._stop_event.set()
+        self._wake.set()
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        return {name: task.stats() for name, task in self.tasks.items()}
@@ -0,0 +1,343 @@
+"""Monte Carlo discrete-event simulation of the immigration booth queues (requires NumPy).
+
+Each direction x zone is simulated as its own FCFS queue over the forecast's
+hours:
+
+- arrivals:  Poisson within each hour at passengers x (1 - autoGateRatio)
+             per hour; auto-gate passengers never reach a booth
+- service:   exponential, at the Korean or foreign rate of the direction,
+             each passenger being foreign with probability foreignRatio
+- booths:    hour h opens booths 0..c_h-1 (by default `required` from
+             compute_requirements); a booth that closes finishes its current
+             passenger first, and after the last hour the last hour's
+             booths stay open until the queue is empty
+
+Unlike the M/M/c figures (steady state, one weighted service rate), this
+captures queues carried over from busy hours and the two service-time
+populations. Waits are reported per arrival hour as mean, percentiles and
+the share over targetWaitTime, with the M/M/c expectedWait alongside.
+
+Replications are simulated side by side: every booth keeps the earliest
+time it could start its next passenger (already moved past hours it is
+closed), so a passenger's start is just the smallest of those, found for
+all replications with one argmin. (queue, replication chunk) tasks run
+across a process pool; each chunk has its own seed from one SeedSequence,
+so a given seed gives the same result with any number of workers.
+
+Usage: python -m iqm.simulate src/data/latest_data.json [settings.json] [--replications 1000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from iqm.staffing import (DIRECTIONS, MAX_SERVERS, ZONES, effective_service_rates, forecast_arrays, merge_settings,
+                          min_servers_for_wait, required_staff, wait_minutes_table)
+
+BOOTH_PLANS = ("required", "requiredForWait")
+PERCENTILES = (50, 90, 95, 99)
+# A full day (8 zones) costs about 13-14 ms of CPU per replication: the
+# default is ~14 s on one core, the maximum ~2.5 min (divided by --workers).
+# Keep it out of request threads; it holds a whole process pool meanwhile.
+DEFAULT_REPLICATIONS = 1000
+MAX_REPLICATIONS = 10_000
+REPLICATION_CHUNK = 250        # replications per task (fixed, so seeds don't depend on workers)
+BIN_MINUTES = 0.25            # wait histogram resolution
+MAX_BIN_MINUTES = 480         # longer waits share the last bin
+SERVICE_RATE_KEYS = {"arrival": ("arrivalKorean", "arrivalForeign"),
+                     "departure": ("departureKorean", "departureForeign")}
+
+
+def booth_plan(forecast, settings=None, booths="required"):
+    """(hours, 2, 4) open booths per hour x direction x zone.
+
+    `booths` is "required", "requiredForWait", or {direction: {zone: count or
+    [count per hour]}} with unspecified zones taken from "required".
+    """
+    settings = merge_settings(settings)
+    passengers, _ = forecast_arrays(forecast)
+    rates = effective_service_rates(settings)[None, :, None]
+    required = required_staff(passengers, rates, settings["targetUtilization"], settings["autoGateRatio"])
+    if booths is None or booths == "required":
+        return required
+    if booths == "requiredForWait":
+        lam = passengers * (1 - settings["autoGateRatio"])
+        return min_servers_for_wait(lam, np.broadcast_to(rates, lam.shape), settings["targetWaitTime"])
+    if not isinstance(booths, dict):
+        raise ValueError(f"booths must be one of {', '.join(BOOTH_PLANS)} or a {{direction: {{zone: count}}}} plan")
+
+    plan = required.copy()
+    for direction, zones in booths.items():
+        if direction not in DIRECTIONS or not isinstance(zones, dict):
+            raise ValueError(f"Unknown direction in booth plan: {direction!r}")
+        for zone, counts in zones.items():
+            if zone not in ZONES:
+                raise ValueError(f"Unknown zone in booth plan: {direction}.{zone}")
+            values = np.asarray(counts)
+            if values.ndim > 1 or (values.ndim == 1 and len(values) != len(plan)):
+                raise ValueError(f"{direction}.{zone}: give one count or {len(plan)} hourly counts")
+            if values.dtype.kind not in "iu" or (values < 0).any() or (values > MAX_SERVERS).any():
+                raise ValueError(f"{direction}.{zone}: booth counts must be integers in [0, {MAX_SERVERS}]")
+            plan[:, DIRECTIONS.index(direction), ZONES.index(zone)] = values
+    return plan
+
+
+def next_open_table(booths):
+    """(hours + 1, C) earliest time (in hours) at or after the start of each hour that booth j is open.
+
+    Row `hours` stands for everything after the forecast, where the last
+    hour's booths (at least one) stay open so the queue drains.
+    """
+    booths = np.asarray(booths, dtype=np.int64)
+    hours = len(booths)
+    extended = np.append(booths, max(int(booths[-1]) if hours else 0, 1))
+    width = max(int(extended.max()), 1)
+    table = np.full((hours + 1, width), np.inf)
+    is_open = np.arange(width)[None, :] < extended[:, None]
+    table[hours] = np.where(is_open[hours], hours, np.inf)
+    for h in range(hours - 1, -1, -1):
+        table[h] = np.where(is_open[h], h, table[h + 1])
+    return table
+
+
+def empty_stats(hours):
+    # Bin 0 holds passengers who did not wait at all
+    bins = int(MAX_BIN_MINUTES / BIN_MINUTES) + 2
+    return {
+        "histogram": np.zeros((hours, bins), dtype=np.int64),
+        "waitSum": np.zeros(hours),
+        "maxWait": np.zeros(hours),
+        "served": np.zeros(hours, dtype=np.int64),
+        "unserved": np.zeros(hours, dtype=np.int64),
+        "overTarget": np.zeros(hours, dtype=np.int64),
+    }
+
+
+def simulate_queue(lam, booths, korean_rate, foreign_rate, foreign_ratio, replications, seed,
+                   target_wait=None):
+    """Simulate one queue for `replications` days; returns per-hour wait statistics.
+
+    lam and booths are per-hour arrival rates and open booths. Waits are in
+    minutes and binned by arrival hour into BIN_MINUTES histograms (plus a
+    bin for no wait).
+    """
+    rng = np.random.default_rng(seed)
+    lam = np.asarray(lam, dtype=np.float64)
+    hours = len(lam)
+    stats = empty_stats(hours)
+    bins = stats["histogram"].shape[1]
+    if hours == 0 or not lam.any():
+        return stats
+
+    next_open = next_open_table(booths)
+    last, width_booths = next_open.shape[0] - 1, next_open.shape[1]
+    next_open_flat = next_open.reshape(-1)
+    # Earliest time each booth can start its next passenger
+    ready = np.zeros((replications, width_booths))
+    offsets = np.arange(replications) * width_booths
+    cell, hour, done = np.empty(replications, dtype=np.int64), np.empty(replications, dtype=np.int64), \
+        np.empty(replications)
+    for h in range(hours):
+        np.maximum(ready, next_open[h], out=ready)
+        ready_flat = ready.reshape(-1)
+        counts = rng.poisson(lam[h], replications)
+        width = int(counts.max())
+        if width == 0:
+            continue
+        arrivals = h + rng.random((replications, width))
+        foreign = rng.random((replications, width)) < foreign_ratio
+        service = rng.standard_exponential((replications, width)) / np.where(foreign, foreign_rate, korean_rate)
+        # Replications with fewer arrivals are padded with zero-length services
+        # at the end of the hour, which cannot delay anyone arriving later
+        arrived = np.arange(width)[None, :] < counts[:, None]
+        arrivals[~arrived] = h + 1
+        service[~arrived] = 0
+        arrivals.sort(axis=1)
+        # Passenger-major, so each step reads contiguous rows
+        arrivals, service, arrived = arrivals.T.copy(), service.T.copy(), arrived.T
+
+        starts = np.empty((width, replications))
+        for k in range(width):
+            # Flat take/put indexes: (replication, booth) and (hour done, booth)
+            booth = ready.argmin(axis=1)
+            np.add(offsets, booth, out=cell)
+            np.maximum(ready_flat.take(cell), arrivals[k], out=starts[k])
+            np.add(starts[k], service[k], out=done)
+            np.minimum(done, last, out=hour, casting="unsafe")
+            np.multiply(hour, width_booths, out=hour)
+            np.add(hour, booth, out=hour)
+            ready_flat[cell] = np.maximum(done, next_open_flat.take(hour))
+
+        served = arrived & np.isfinite(starts)
+        waits = (starts[served] - arrivals[served]) * 60
+        index = np.where(waits > 0, np.minimum((waits / BIN_MINUTES).astype(np.int64) + 1, bins - 1), 0)
+        stats["histogram"][h] = np.bincount(index, minlength=bins)
+        stats["waitSum"][h] = waits.sum()
+        stats["maxWait"][h] = waits.max(initial=0.0)
+        stats["served"][h] = len(waits)
+        stats["unserved"][h] = int(arrived.sum()) - len(waits)
+        if target_wait is not None:
+            stats["overTarget"][h] = int((waits > target_wait).sum())
+    return stats
+
+
+def _run_task(task):
+    return task[0], simulate_queue(*task[1:])
+
+
+def histogram_percentiles(histogram, percentiles=PERCENTILES):
+    """Wait (minutes) at each percentile, interpolated within BIN_MINUTES bins; None when empty.
+
+    Percentiles in the last bin are reported as MAX_BIN_MINUTES ("at least").
+    """
+    total = histogram.sum()
+    if total == 0:
+        return [None] * len(percentiles)
+    cumulative = np.cumsum(histogram)
+    result = []
+    for p in percentiles:
+        rank = total * p / 100
+        b = int(np.searchsorted(cumulative, rank, side="left"))
+        if b == 0:
+            result.append(0.0)
+            continue
+        fraction = (rank - cumulative[b - 1]) / histogram[b]
+        result.append(round(float(min((b - 1 + fraction) * BIN_MINUTES, MAX_BIN_MINUTES)), 2))
+    return result
+
+
+def _cell(stats, replications, percentiles, **extra):
+    served = int(stats["served"].sum())
+    arrived = served + int(stats["unserved"].sum())
+    cell = dict(extra)
+    cell["arrivals"] = round(arrived / replications, 1)
+    cell["meanWait"] = round(float(stats["waitSum"].sum()) / served, 2) if served else None
+    for p, value in zip(percentiles, histogram_percentiles(stats["histogram"].sum(axis=0), percentiles)):
+        cell[f"p{p:g}"] = value
+    cell["maxWait"] = round(float(stats["maxWait"].max()), 2) if served else None
+    cell["overTarget"] = round(int(stats["overTarget"].sum()) / served, 4) if served else None
+    cell["unserved"] = round((arrived - served) / replications, 2)
+    return cell
+
+
+def _finite(value):
+    return round(float(value), 2) if np.isfinite(value) else None
+
+
+def simulate(forecast, settings=None, booths="required", replications=DEFAULT_REPLICATIONS, seed=None,
+             workers=None, percentiles=PERCENTILES):
+    """Simulate every direction x zone of `forecast` for `replications` days.
+
+    workers=None uses one process per CPU; 1 (or a single task) runs
+    in-process. Returns per-hour and whole-day wait statistics per zone.
+    """
+    if not 1 <= replications <= MAX_REPLICATIONS:
+        raise ValueError(f"replications must be in [1, {MAX_REPLICATIONS}]")
+    started = time.perf_counter()
+    settings = merge_settings(settings)
+    plan = booth_plan(forecast, settings, booths)
+    passengers, _ = forecast_arrays(forecast)
+    lam = passengers * (1 - settings["autoGateRatio"])
+    rates = effective_service_rates(settings)[None, :, None]
+    mmc = np.take_along_axis(wait_minutes_table(lam, np.broadcast_to(rates, lam.shape)),
+                             np.minimum(plan, MAX_SERVERS)[None], axis=0)[0]
+    seed = int(np.random.SeedSequence(seed).entropy) if seed is None else int(seed)
+
+    queues = [(d, z) for d in range(len(DIRECTIONS)) for z in range(len(ZONES))]
+    chunks = [min(REPLICATION_CHUNK, replications - lo) for lo in range(0, replications, REPLICATION_CHUNK)]
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(queues) * len(chunks)))
+    tasks = []
+    for d, z in queues:
+        korean_key, foreign_key = SERVICE_RATE_KEYS[DIRECTIONS[d]]
+        for size in chunks:
+            tasks.append(((d, z), lam[:, d, z], plan[:, d, z], settings["serviceRates"][korean_key],
+                          settings["serviceRates"][foreign_key], settings["foreignRatio"][DIRECTIONS[d]],
+                          size, next(seeds), settings["targetWaitTime"]))
+    tasks = [task for task in tasks if task[1].any()]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_run_task, tasks))
+    else:
+        outputs = [_run_task(task) for task in tasks]
+
+    merged = {}
+    for key, stats in outputs:
+        if key not in merged:
+            merged[key] = stats
+            continue
+        total = merged[key]
+        for name, values in stats.items():
+            total[name] = np.maximum(total[name], values) if name == "maxWait" else total[name] + values
+    empty = empty_stats(len(lam))
+
+    hourly = []
+    for i, hour_data in enumerate(forecast["hourlyData"]):
+        entry = {"hour": hour_data["hour"], "hourStart": hour_data.get("hourStart")}
+        for d, direction in enumerate(DIRECTIONS):
+            entry[direction] = {
+                zone: _cell({name: values[i:i + 1] for name, values in merged.get((d, z), empty).items()},
+                            replications, percentiles, booths=int(plan[i, d, z]),
+                            expectedArrivals=round(float(lam[i, d, z]), 1), mmcWait=_finite(mmc[i, d, z]))
+                for z, zone in enumerate(ZONES)
+            }
+        hourly.append(entry)
+    summary = {
+        direction: {
+            zone: _cell(merged.get((d, z), empty), replications, percentiles,
+                        boothHours=int(plan[:, d, z].sum()), peakBooths=int(plan[:, d, z].max(initial=0)))
+            for z, zone in enumerate(ZONES)
+        }
+        for d, direction in enumerate(DIRECTIONS)
+    }
+    return {
+        "date": forecast.get("date"),
+        "replications": replications,
+        "seed": seed,
+        "booths": booths if isinstance(booths, str) else "custom",
+        "workers": workers,
+        "parameters": settings,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+        "hourly": hourly,
+        "summary": summary,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of booth queue waits")
+    parser.add_argument("forecast", help="forecast JSON (e.g. src/data/latest_data.json)")
+    parser.add_argument("settings", nargs="?", help="settings JSON merged over the defaults")
+    parser.add_argument("--replications", type=int, default=DEFAULT_REPLICATIONS)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--booths", default="required",
+                        help="required, requiredForWait, or a JSON file of {direction: {zone: counts}}")
+    args = parser.parse_args(argv)
+
+    with open(args.forecast, encoding="utf-8") as f:
+        forecast = json.load(f)
+    settings = None
+    if args.settings:
+        with open(args.settings, encoding="utf-8") as f:
+            settings = json.load(f)
+    booths = args.booths
+    if booths not in BOOTH_PLANS:
+        with open(booths, encoding="utf-8") as f:
+            booths = json.load(f)
+    try:
+        result = simulate(forecast, settings, booths, args.replications, args.seed, args.workers)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    json.dump(result, sys.stdout, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
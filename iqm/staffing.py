@@ -0,0 +1,314 @@
+"""Server-side staffing engine mirroring src/js/core/calculator.js,
+queueModel.js and alertSystem.js (requires NumPy).
+
+Every hour x direction x zone of a forecast is computed in one batched pass:
+
+- required:        ceil(manual passengers / (targetUtilization x effective rate)),
+                   minimum 1 when there are passengers (calculateRequiredStaff)
+- requiredForWait: fewest booths whose M/M/c mean queue wait is within
+                   targetWaitTime (findMinimumServers), using the Erlang-B
+                   recurrence instead of factorials and a bisection over c
+- expectedWait:    M/M/c mean queue wait in minutes when `required` booths open
+- alert levels:    determineAlertLevel + the consecutive-hour rules of
+                   determineConsecutiveAlerts, on the forecast's hourly totals
+
+precompute() wraps the default-settings result with the forecast's content
+hash; the update scripts write it to src/data/latest_requirements.json so
+dashboards can skip the calculation when their forecast and settings match.
+
+Usage: python -m iqm.staffing src/data/latest_data.json [settings.json]
+"""
+
+import copy
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from iqm.fetch import atomic_write_json
+from iqm.parser import content_hash
+
+# Mirrors DefaultSettings in src/js/config.js
+DEFAULT_SETTINGS = {
+    "serviceRates": {
+        "arrivalKorean": 60,
+        "arrivalForeign": 40,
+        "departureKorean": 70,
+        "departureForeign": 50,
+        "autoGate": 120
+    },
+    "targetWaitTime": 15,
+    "targetUtilization": 0.85,
+    "autoGateRatio": 0.3,
+    "foreignRatio": {
+        "arrival": 0.6,
+        "departure": 0.3
+    },
+    "theme": "dark",
+    "language": "ko",
+    "alertThresholds": {
+        "blue": 7000,
+        "yellow": 7600,
+        "orange": 8200,
+        "red": 8600
+    }
+}
+
+DIRECTIONS = ("arrival", "departure")
+ZONES = ("AB", "C", "D", "EF")
+ALERT_LEVELS = ("normal", "blue", "yellow", "orange", "red")
+MAX_SERVERS = 100  # findMinimumServers search limit
+PRECOMPUTED_VERSION = 1
+PRECOMPUTED_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "src", "data", "latest_requirements.json")
+
+
+def merge_settings(overrides=None, base=None):
+    """Deep-merge user settings over DEFAULT_SETTINGS (like the settings UI does)."""
+    merged = copy.deepcopy(base or DEFAULT_SETTINGS)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_settings(value, merged[key])
+        else:
+            merged[key] = value
+    return merged
+
+
+def effective_service_rates(settings):
+    """(2,) weighted booth service rate for [arrival, departure]."""
+    rates = settings["serviceRates"]
+    foreign = settings["foreignRatio"]
+    return np.array([
+        rates["arrivalKorean"] * (1 - foreign["arrival"]) + rates["arrivalForeign"] * foreign["arrival"],
+        rates["departureKorean"] * (1 - foreign["departure"]) + rates["departureForeign"] * foreign["departure"],
+    ])
+
+
+def required_staff(passengers, service_rate, target_utilization, auto_gate_ratio):
+    """Vectorised calculateRequiredStaff; all arguments broadcast together."""
+    passengers = np.asarray(passengers, dtype=np.float64)
+    # Same operation order as calculator.js so float results match exactly
+    manual = passengers * (1 - np.asarray(auto_gate_ratio, dtype=np.float64))
+    raw = manual / (np.asarray(target_utilization, dtype=np.float64) * service_rate)
+    return np.where(passengers <= 0, 0, np.maximum(1, np.ceil(raw))).astype(np.int64)
+
+
+def erlang_b_table(a, max_servers=MAX_SERVERS):
+    """Erlang-B blocking probability for c = 0..max_servers, shape (max_servers + 1, *a.shape).
+
+    B(0) = 1, B(c) = a B(c-1) / (c + a B(c-1)) stays within [0, 1] for any
+    load, unlike a^c / c! which overflows.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    table = np.empty((max_servers + 1,) + a.shape)
+    table[0] = 1.0
+    for c in range(1, max_servers + 1):
+        prev = table[c - 1]
+        table[c] = a * prev / (c + a * prev)
+    return table
+
+
+def wait_minutes_table(lam, mu, max_servers=MAX_SERVERS):
+    """M/M/c mean queue wait Wq (minutes) for c = 0..max_servers; inf when c <= a."""
+    lam = np.asarray(lam, dtype=np.float64)
+    mu = np.broadcast_to(np.asarray(mu, dtype=np.float64), lam.shape)
+    a = lam / mu
+    blocking = erlang_b_table(a, max_servers)
+    c = np.arange(max_servers + 1, dtype=np.float64).reshape((-1,) + (1,) * lam.ndim)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Erlang C from Erlang B, then Wq = C / (c mu - lambda)
+        erlang_c = c * blocking / (c - a * (1 - blocking))
+        wq = erlang_c / (c * mu - lam) * 60
+    return np.where((a < c) & (lam > 0), wq, np.where(lam > 0, np.inf, 0.0))
+
+
+def min_servers_for_wait(lam, mu, target_wait, max_servers=MAX_SERVERS, table=None):
+    """Vectorised findMinimumServers: smallest c >= ceil(lambda/mu) with Wq <= target.
+
+    Wq falls monotonically with c, so each cell is found by bisection over
+    its precomputed wait column. Returns max_servers when no c below it
+    qualifies, and ceil(lambda/mu) when that already exceeds the limit.
+    """
+    lam = np.asarray(lam, dtype=np.float64)
+    mu = np.broadcast_to(np.asarray(mu, dtype=np.float64), lam.shape)
+    if table is None:
+        table = wait_minutes_table(lam, mu, max_servers)
+    start = np.maximum(1, np.ceil(lam / mu)).astype(np.int64)
+
+    lo = np.minimum(start, max_servers)
+    hi = np.full(lam.shape, max_servers, dtype=np.int64)
+    target = np.broadcast_to(np.asarray(target_wait, dtype=np.float64), lam.shape)
+    while True:
+        active = lo < hi
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        ok = np.take_along_axis(table, mid[None], axis=0)[0] <= target
+        hi = np.where(active & ok, mid, hi)
+        lo = np.where(active & ~ok, mid + 1, lo)
+
+    result = np.where(start >= max_servers, start, lo)
+    return np.where(lam <= 0, 0, result)
+
+
+def alert_levels(totals, thresholds):
+    """Vectorised determineConsecutiveAlerts over a sequence of hourly totals.
+
+    Returns indexes into ALERT_LEVELS.
+    """
+    totals = np.asarray(totals, dtype=np.float64)
+    cuts = np.array([thresholds["blue"], thresholds["yellow"], thresholds["orange"], thresholds["red"]])
+    levels = np.searchsorted(cuts, totals, side="right")
+    if len(totals) > 1:
+        prev, curr = totals[:-1], totals[1:]
+        over_yellow = (prev > thresholds["yellow"]) & (curr > thresholds["yellow"])
+        over_orange = (prev > thresholds["orange"]) & (curr > thresholds["orange"])
+        rest = levels[1:]
+        rest = np.where(over_yellow & (rest < 2), 2, rest)
+        rest = np.where(over_orange, 4, rest)
+        levels = np.concatenate([levels[:1], rest])
+    return levels
+
+
+def forecast_arrays(forecast):
+    """(hours, 2, 4) zone passengers and (hours, 2) source totals for one forecast."""
+    hourly = forecast["hourlyData"]
+    passengers = np.zeros((len(hourly), len(DIRECTIONS), len(ZONES)), dtype=np.float64)
+    totals = np.zeros((len(hourly), len(DIRECTIONS)), dtype=np.float64)
+    for i, hour_data in enumerate(hourly):
+        for d, direction in enumerate(DIRECTIONS):
+            zones = hour_data.get(direction) or {}
+            passengers[i, d] = [zones.get(zone) or 0 for zone in ZONES]
+            totals[i, d] = zones.get("total") or 0
+    return passengers, totals
+
+
+def compute_requirements(forecast, settings=None):
+    """Batched equivalent of calculateAllRequirements(forecast, settings)."""
+    settings = merge_settings(settings)
+    passengers, source_totals = forecast_arrays(forecast)
+    rates = effective_service_rates(settings)[None, :, None]          # (1, 2, 1)
+
+    required = required_staff(passengers, rates, settings["targetUtilization"], settings["autoGateRatio"])
+    lam = passengers * (1 - settings["autoGateRatio"])
+    mu = np.broadcast_to(rates, lam.shape)
+    waits = wait_minutes_table(lam, mu)
+    required_for_wait = min_servers_for_wait(lam, mu, settings["targetWaitTime"], table=waits)
+    at_required = np.take_along_axis(waits, np.minimum(required, MAX_SERVERS)[None], axis=0)[0]
+
+    zone_sums = passengers.sum(axis=2)                                 # (hours, 2)
+    # `total || sum(zones)` in calculator.js
+    hour_passengers = np.where(source_totals != 0, source_totals, zone_sums)
+    levels = alert_levels(source_totals.sum(axis=1), settings["alertThresholds"])
+    staff_totals = required.sum(axis=2)                                # (hours, 2)
+
+    hourly_requirement = []
+    for i, hour_data in enumerate(forecast["hourlyData"]):
+        entry = {"hour": hour_data["hour"], "hourStart": hour_data.get("hourStart")}
+        for d, direction in enumerate(DIRECTIONS):
+            entry[direction] = {
+                zone: {
+                    "passengers": int(passengers[i, d, z]),
+                    "required": int(required[i, d, z]),
+                    "serviceRate": float(rates[0, d, 0]),
+                    "alertLevel": "normal",
+                    "requiredForWait": int(required_for_wait[i, d, z]),
+                    "expectedWait": _finite(at_required[i, d, z]),
+                }
+                for z, zone in enumerate(ZONES)
+            }
+        entry["totalArrival"] = int(staff_totals[i, 0])
+        entry["totalDeparture"] = int(staff_totals[i, 1])
+        entry["arrivalPassengers"] = int(hour_passengers[i, 0])
+        entry["departurePassengers"] = int(hour_passengers[i, 1])
+        entry["alertLevel"] = ALERT_LEVELS[levels[i]]
+        hourly_requirement.append(entry)
+
+    return {
+        "id": str(uuid.uuid4()),
+        "forecastId": forecast.get("id"),
+        "date": forecast.get("date"),
+        "lastUpdated": forecast.get("lastUpdated"),
+        "calculatedAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "parameters": settings,
+        "hourlyRequirement": hourly_requirement,
+        "summary": summarize(forecast, zone_sums, staff_totals, levels),
+    }
+
+
+def summarize(forecast, zone_sums, staff_totals, levels):
+    combined = zone_sums.sum(axis=1)
+    summary = {
+        "totalDailyArrival": int(zone_sums[:, 0].sum()),
+        "totalDailyDeparture": int(zone_sums[:, 1].sum()),
+        "maxArrivalStaff": int(staff_totals[:, 0].max(initial=0)),
+        "maxDepartureStaff": int(staff_totals[:, 1].max(initial=0)),
+        "peakHour": None,
+        "maxTotalPassengers": 0,
+        "alertHours": [forecast["hourlyData"][i]["hour"] for i in np.flatnonzero(levels > 0)],
+    }
+    if len(combined) and combined.max() > 0:
+        peak = int(combined.argmax())  # first maximum, like the strict > in calculator.js
+        summary["peakHour"] = forecast["hourlyData"][peak]["hour"]
+        summary["maxTotalPassengers"] = int(combined[peak])
+    return summary
+
+
+def precompute(forecast, settings=None):
+    """Requirements for the default (or given) settings, tagged with the forecast hash."""
+    forecast_hash = forecast.get("contentHash") or content_hash(forecast)
+    requirement = compute_requirements(forecast, settings)
+    requirement["forecastHash"] = forecast_hash
+    return {
+        "version": PRECOMPUTED_VERSION,
+        "forecastHash": forecast_hash,
+        "requirement": requirement,
+    }
+
+
+def is_current(precomputed, forecast, settings=None):
+    """True if a previously written precompute() result still applies."""
+    if not precomputed or precomputed.get("version") != PRECOMPUTED_VERSION:
+        return False
+    forecast_hash = forecast.get("contentHash") or content_hash(forecast)
+    requirement = precomputed.get("requirement") or {}
+    return (precomputed.get("forecastHash") == forecast_hash
+            and requirement.get("parameters") == merge_settings(settings))
+
+
+def save_precomputed(forecast, filepath=PRECOMPUTED_FILE):
+    """Write precompute(forecast) unless the file already matches. Returns True if written."""
+    try:
+        with open(filepath, encoding="utf-8") as f:
+            if is_current(json.load(f), forecast):
+                return False
+    except (OSError, ValueError):
+        pass
+    atomic_write_json(precompute(forecast), filepath, indent=None)
+    return True
+
+
+def _finite(value):
+    return round(float(value), 4) if np.isfinite(value) else None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python -m iqm.staffing <forecast.json> [settings.json]", file=sys.stderr)
+        return 2
+    with open(argv[0], encoding="utf-8") as f:
+        forecast = json.load(f)
+    settings = None
+    if len(argv) > 1:
+        with open(argv[1], encoding="utf-8") as f:
+            settings = json.load(f)
+    json.dump(compute_requirements(forecast, settings), sys.stdout, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
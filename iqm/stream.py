@@ -0,0 +1,293 @@
+"""Server-Sent Events fan-out for /api/stream.
+
+One LiveRefresher thread fetches the (default terminal's) passenger and parking pages on a fixed
+interval while at least one client is connected (one upstream fetch per
+interval, however many dashboards are listening), diffs each result against
+the previous snapshot and publishes only what changed to a Broadcaster. Every connected client owns a bounded
+queue on the broadcaster; a client too slow to drain it is dropped and
+reconnects (EventSource retries automatically) to receive a fresh snapshot.
+
+Events:
+    snapshot  {"forecast": {...}, "parking": {...}}      sent first on connect
+    forecast  {"date", "lastUpdated", "contentHash", "hours": [changed rows], "removed": [hourStart]}
+              or {"full": {...}} when the date changed / there was no snapshot
+    parking   {"lastUpdated", "errors", "changes": {"shortTerm.floor1": 113, ...}}
+    alert     {"series", "scope", "time", "level", "previous", "rules", "revised"}
+              (level transitions from the alert engine, see iqm/alerts.py)
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from iqm import metrics
+from iqm.fetch import (PARKING_LONG_PATH, PARKING_SHORT_PATH, PASSENGER_PATH, ConditionalGet, PageJob, ParseCache,
+                       fetch_all, make_session, upstream_base)
+from iqm.parking import (flatten_available, long_term_fragment, new_parking_result, parse_long_term,
+                         parse_short_term, short_term_fragment)
+from iqm.parser import parse_passenger_page, restamp_forecast, table_fragment
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 60      # seconds between refreshes
+CLIENT_QUEUE_SIZE = 32     # events buffered per client before it is dropped
+KEEPALIVE_INTERVAL = 15    # seconds between ": keepalive" comments
+
+
+def format_event(event, data, event_id=None):
+    """Encode one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    lines.extend("data: " + line for line in payload.split("\n"))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def diff_forecast(previous, current):
+    """Changed hourly rows between two forecasts, or None if nothing changed.
+
+    A row is reported whole when any of its counts changed; rows are matched
+    by hourStart.
+    """
+    if previous is None or previous.get("date") != current.get("date"):
+        return {"full": current}
+    before = {row["hourStart"]: row for row in previous.get("hourlyData", [])}
+    after = {row["hourStart"]: row for row in current.get("hourlyData", [])}
+    hours = [row for start, row in after.items() if before.get(start) != row]
+    removed = sorted(start for start in before if start not in after)
+    if not hours and not removed:
+        return None
+    return {
+        "date": current.get("date"),
+        "lastUpdated": current.get("lastUpdated"),
+        "contentHash": current.get("contentHash"),
+        "hours": hours,
+        "removed": removed,
+    }
+
+
+def diff_parking(previous, current):
+    """Changed `available` counts keyed by dotted path, or None if nothing changed."""
+    if previous is None:
+        return {"full": current}
+    before = flatten_available(previous)
+    after = flatten_available(current)
+    if set(before) != set(after):
+        # A section appeared or failed: send it whole
+        return {"full": current}
+    changes = {path: value for path, value in after.items() if before[path] != value}
+    if not changes and previous.get("errors") == current.get("errors"):
+        return None
+    return {"lastUpdated": current.get("lastUpdated"), "errors": current.get("errors"), "changes": changes}
+
+
+class Subscriber:
+    def __init__(self, maxsize=CLIENT_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def get(self, timeout):
+        """Next encoded message, or None on timeout. Raises EOFError once dropped."""
+        try:
+            message = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None:
+            raise EOFError
+        return message
+
+
+class Broadcaster:
+    """Fan-out of encoded SSE messages to connected clients, plus the latest snapshot."""
+
+    def __init__(self, max_clients=None):
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._snapshot = {"forecast": None, "parking": None}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        """Register a client; returns None when max_clients are already connected."""
+        with self._lock:
+            if self.max_clients is not None and len(self._subscribers) >= self.max_clients:
+                return None
+            sub = Subscriber()
+            # The snapshot goes first so the client never applies a diff to nothing
+            sub.queue.put_nowait(format_event("snapshot", self._snapshot, self._next_id - 1))
+            self._subscribers.add(sub)
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def has_snapshot(self):
+        with self._lock:
+            return self._snapshot["forecast"] is not None
+
+    def update_snapshot(self, key, value):
+        with self._lock:
+            self._snapshot[key] = value
+
+    def publish(self, event, data):
+        with self._lock:
+            message = format_event(event, data, self._next_id)
+            self._next_id += 1
+            self.published += 1
+            for sub in list(self._subscribers):
+                try:
+                    sub.queue.put_nowait(message)
+                except queue.Full:
+                    # Too slow to keep up: drop it, the client reconnects for a fresh snapshot
+                    self._subscribers.discard(sub)
+                    sub.dropped = True
+                    self.dropped += 1
+                    _force_put(sub.queue, None)
+
+    def close(self):
+        with self._lock:
+            for sub in self._subscribers:
+                _force_put(sub.queue, None)
+            self._subscribers.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "maxClients": self.max_clients,
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+def _force_put(q, item):
+    # Make room for the close sentinel in a full queue
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class LiveRefresher(threading.Thread):
+    """Daemon thread: fetch passenger + parking pages every `interval` seconds and publish diffs.
+
+    on_forecast(forecast) is called with each successfully parsed forecast
+    (server.py uses it to refresh the /api/airport-data cache).
+    """
+
+    def __init__(self, broadcaster, interval=DEFAULT_INTERVAL, session=None, timeout=None,
+                 on_forecast=None, upstream=None):
+        super().__init__(name="live-refresher", daemon=True)
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.session = session or make_session(pool_size=3)
+        self.timeout = timeout
+        self.on_forecast = on_forecast
+        self.upstream = upstream_base(upstream)
+        self.conditional = ConditionalGet()
+        self.parsers = {
+            "airport": ParseCache(parse_passenger_page, table_fragment, restamp_forecast, name="883"),
+            "shortTerm": ParseCache(parse_short_term, short_term_fragment, name="964"),
+            "longTerm": ParseCache(parse_long_term, long_term_fragment, name="965"),
+        }
+        self.forecast = None
+        self.parking = None
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+
+    def jobs(self):
+        return {
+            "airport": PageJob(self.upstream + PASSENGER_PATH, None, self.parsers["airport"]),
+            "shortTerm": PageJob(self.upstream + PARKING_SHORT_PATH, None, self.parsers["shortTerm"]),
+            "longTerm": PageJob(self.upstream + PARKING_LONG_PATH, None, self.parsers["longTerm"]),
+        }
+
+    @metrics.STAGE_DURATION.timed(stage="stream.refresh")
+    def refresh(self):
+        kwargs = {"timeout": self.timeout} if self.timeout else {}
+        results = fetch_all(self.session, self.jobs(), conditional=self.conditional, **kwargs)
+        self.runs += 1
+        self.last_run = time.time()
+
+        airport = results["airport"]
+        if airport.error is None and airport.value["hourlyData"]:
+            self.apply_forecast(airport.value)
+        else:
+            self.failures += 1
+            log.warning("Live refresh: passenger page %s failed: %s", airport.stage, airport.error)
+
+        parking = new_parking_result(datetime.now())
+        for key, label in (("shortTerm", "Short-term"), ("longTerm", "Long-term")):
+            res = results[key]
+            if res.error is None:
+                parking[key] = res.value
+            else:
+                parking["errors"].append(f"{label}: {res.error}")
+        if parking["shortTerm"] is not None or parking["longTerm"] is not None:
+            self.apply_parking(parking)
+
+    def apply_forecast(self, forecast):
+        change = diff_forecast(self.forecast, forecast)
+        self.forecast = forecast
+        self.broadcaster.update_snapshot("forecast", forecast)
+        if self.on_forecast is not None:
+            self.on_forecast(forecast)
+        if change is not None:
+            self.broadcaster.publish("forecast", change)
+
+    def apply_parking(self, parking):
+        change = diff_parking(self.parking, parking)
+        self.parking = parking
+        self.broadcaster.update_snapshot("parking", parking)
+        if change is not None:
+            self.broadcaster.publish("parking", change)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Nobody listening: don't scrape upstream until a client connects
+            if self.broadcaster.client_count():
+                try:
+                    self.refresh()
+                except Exception:
+                    self.failures += 1
+                    log.exception("Live refresh failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def wake(self):
+        """Refresh now instead of at the next interval (e.g. first client connected)."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "lastRun": datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            "conditional": self.conditional.stats(),
+            "parse": {name: cache.stats() for name, cache in self.parsers.items()},
+        }
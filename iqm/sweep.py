@@ -0,0 +1,247 @@
+"""What-if staffing sweeps: evaluate a grid of settings against one or more days (requires NumPy).
+
+A grid maps settings paths to candidate values, e.g.
+
+    {"targetUtilization": {"start": 0.7, "stop": 0.95, "step": 0.05},
+     "autoGateRatio": [0.2, 0.3, 0.4],
+     "foreignRatio.arrival": [0.5, 0.6, 0.7]}
+
+and every combination (the Cartesian product, first path varying slowest)
+is evaluated against the forecast hours in one batched pass instead of one
+compute_requirements() call per combination:
+
+- required staff: required_staff() broadcast over (combination, hour,
+  direction, zone), with the same arithmetic as calculator.js
+- wait-based staff: the M/M/c wait table depends only on the arrival rate
+  and service rate, so it is built once per distinct (autoGateRatio,
+  service rates) and searched for every targetWaitTime sharing it
+- alert hours: depend only on the thresholds, so each distinct threshold
+  set is evaluated once per day
+
+Nothing of size combinations x hours is kept: required staff is evaluated
+COMBINATION_CELLS at a time and each wait table is reduced to its
+per-direction totals and peaks straight away, so a request stays under
+about 200 MB (RSS) at MAX_COMBINATIONS and server.py's MAX_SWEEP_DAYS.
+
+Usage: python -m iqm.sweep src/data/latest_data.json grid.json [settings.json]
+"""
+
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+from iqm.staffing import (DIRECTIONS, MAX_SERVERS, alert_levels, forecast_arrays, merge_settings, min_servers_for_wait,
+                          required_staff, wait_minutes_table)
+
+# Path -> (lowest, highest) accepted value; None leaves that side open
+SWEEPABLE = {
+    "targetUtilization": (0.01, 1.0),
+    "autoGateRatio": (0.0, 0.99),
+    "targetWaitTime": (0.1, None),
+    "foreignRatio.arrival": (0.0, 1.0),
+    "foreignRatio.departure": (0.0, 1.0),
+    "serviceRates.arrivalKorean": (1.0, None),
+    "serviceRates.arrivalForeign": (1.0, None),
+    "serviceRates.departureKorean": (1.0, None),
+    "serviceRates.departureForeign": (1.0, None),
+    "alertThresholds.blue": (0, None),
+    "alertThresholds.yellow": (0, None),
+    "alertThresholds.orange": (0, None),
+    "alertThresholds.red": (0, None),
+}
+MAX_COMBINATIONS = 5000
+MAX_VALUES = 200              # per path
+TABLE_CELLS = 4_000_000       # wait-table elements built per chunk (~32 MB)
+COMBINATION_CELLS = 1_000_000 # combination x hour x zone cells of required staff per chunk
+
+
+def _setting(settings, path):
+    value = settings
+    for key in path.split("."):
+        value = value[key]
+    return value
+
+
+def expand_values(path, spec):
+    """Candidate values for one path: a list, a single number, or {"start", "stop", "step"} (stop inclusive)."""
+    if path not in SWEEPABLE:
+        raise ValueError(f"Cannot sweep {path!r} (sweepable: {', '.join(SWEEPABLE)})")
+    if isinstance(spec, dict):
+        try:
+            start, stop, step = float(spec["start"]), float(spec["stop"]), float(spec["step"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{path}: range needs numeric start, stop and step")
+        if step <= 0 or stop < start:
+            raise ValueError(f"{path}: need step > 0 and stop >= start")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_VALUES:
+            raise ValueError(f"{path}: {count} values (max {MAX_VALUES})")
+        # Rounded so 0.7 + 3 * 0.05 is 0.85, not 0.8500000000000001
+        values = [round(start + i * step, 10) for i in range(count)]
+    else:
+        values = spec if isinstance(spec, list) else [spec]
+        if not values or len(values) > MAX_VALUES:
+            raise ValueError(f"{path}: give 1..{MAX_VALUES} values")
+    low, high = SWEEPABLE[path]
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{path}: {value!r} is not a number")
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f"{path}: {value} outside [{low}, {high if high is not None else 'inf'}]")
+    return values
+
+
+def expand_grid(grid):
+    """({path: values}, combination count) for a grid spec; raises ValueError when invalid or too large."""
+    if not isinstance(grid, dict) or not grid:
+        raise ValueError("grid must be a non-empty object of {settings path: values}")
+    axes = {path: expand_values(path, spec) for path, spec in grid.items()}
+    count = int(np.prod([len(values) for values in axes.values()]))
+    if count > MAX_COMBINATIONS:
+        raise ValueError(f"{count} combinations (max {MAX_COMBINATIONS})")
+    return axes, count
+
+
+def _columns(axes, settings, count):
+    # Every sweepable path as a length-`count` array, grid order (first path slowest)
+    columns = {path: np.full(count, float(_setting(settings, path))) for path in SWEEPABLE}
+    if axes:
+        mesh = np.meshgrid(*[np.asarray(values, dtype=np.float64) for values in axes.values()], indexing="ij")
+        for path, values in zip(axes, mesh):
+            columns[path] = values.ravel()
+    return columns
+
+
+def _service_rates(columns):
+    # (K, 2) effective rates, same formula as effective_service_rates()
+    arrival_foreign = columns["foreignRatio.arrival"]
+    departure_foreign = columns["foreignRatio.departure"]
+    return np.stack([
+        columns["serviceRates.arrivalKorean"] * (1 - arrival_foreign)
+        + columns["serviceRates.arrivalForeign"] * arrival_foreign,
+        columns["serviceRates.departureKorean"] * (1 - departure_foreign)
+        + columns["serviceRates.departureForeign"] * departure_foreign,
+    ], axis=1)
+
+
+def _staff_for_wait(passengers, auto_gate, rates, target_wait):
+    """(K, 2) staff-hours and (K, 2) peak of findMinimumServers, sharing wait tables between combinations."""
+    queue_keys = np.column_stack([auto_gate, rates])
+    unique_queues, queue_index = np.unique(queue_keys, axis=0, return_inverse=True)
+    unique_targets, target_index = np.unique(target_wait, return_inverse=True)
+    queue_index = queue_index.reshape(-1)
+    target_index = target_index.reshape(-1)
+
+    cells = passengers.size
+    # The table and the bisection over every target both scale with the chunk
+    chunk = max(1, TABLE_CELLS // (cells * (MAX_SERVERS + 1 + len(unique_targets))))
+    totals = np.empty((len(unique_targets), len(unique_queues), len(DIRECTIONS)), dtype=np.int64)
+    peaks = np.empty_like(totals)
+    targets = unique_targets.reshape((-1, 1) + (1,) * passengers.ndim)
+    for lo in range(0, len(unique_queues), chunk):
+        queues = unique_queues[lo:lo + chunk]
+        lam = passengers[None] * (1 - queues[:, 0]).reshape((-1,) + (1,) * passengers.ndim)
+        mu = np.broadcast_to(queues[:, None, 1:, None], lam.shape)
+        table = wait_minutes_table(lam, mu)                       # (c, U, hours, 2, 4)
+        shape = (len(unique_targets),) + lam.shape
+        # One table per queue, searched for every target without copying it
+        staff = min_servers_for_wait(
+            np.broadcast_to(lam, shape), np.broadcast_to(mu, shape), np.broadcast_to(targets, shape),
+            table=np.broadcast_to(table[:, None], (table.shape[0],) + shape)).sum(axis=-1)   # (T, U, hours, 2)
+        totals[:, lo:lo + chunk] = staff.sum(axis=2)
+        peaks[:, lo:lo + chunk] = staff.max(axis=2, initial=0)
+    return totals[target_index, queue_index], peaks[target_index, queue_index]
+
+
+def _alert_hours(days, columns):
+    # Alert-hour count per combination, computed once per distinct threshold set
+    keys = ("blue", "yellow", "orange", "red")
+    thresholds = np.column_stack([columns[f"alertThresholds.{key}"] for key in keys])
+    unique, index = np.unique(thresholds, axis=0, return_inverse=True)
+    counts = np.array([
+        sum(int((alert_levels(totals, dict(zip(keys, row))) > 0).sum()) for totals in days)
+        for row in unique
+    ], dtype=np.int64)
+    return counts[index.reshape(-1)]
+
+
+def _pair(values):
+    return {direction: int(value) for direction, value in zip(DIRECTIONS, values)}
+
+
+def sweep(forecasts, grid, settings=None):
+    """Evaluate every grid combination against `forecasts` (one or more days).
+
+    Per combination: staffHours (sum over the hours of the required booths),
+    peakStaff (busiest hour), the same two for the wait-based requirement
+    (requiredForWait), and alertHours, each per direction where applicable.
+    """
+    if isinstance(forecasts, dict):
+        forecasts = [forecasts]
+    if not forecasts:
+        raise ValueError("No forecast to sweep")
+    started = time.perf_counter()
+    settings = merge_settings(settings)
+    axes, count = expand_grid(grid)
+    columns = _columns(axes, settings, count)
+
+    arrays = [forecast_arrays(forecast) for forecast in forecasts]
+    passengers = np.concatenate([zones for zones, _ in arrays])     # (hours, 2, 4) over all days
+    day_totals = [totals.sum(axis=1) for _, totals in arrays]
+
+    rates = _service_rates(columns)                                  # (K, 2)
+    staff_hours = np.empty((count, len(DIRECTIONS)), dtype=np.int64)
+    peak = np.empty_like(staff_hours)
+    chunk = max(1, COMBINATION_CELLS // passengers.size)
+    for lo in range(0, count, chunk):
+        part = slice(lo, lo + chunk)
+        # Same broadcast and arithmetic as compute_requirements(), with K in front
+        staff = required_staff(passengers[None], rates[part, None, :, None],
+                               columns["targetUtilization"][part, None, None, None],
+                               columns["autoGateRatio"][part, None, None, None]).sum(axis=3)   # (k, hours, 2)
+        staff_hours[part] = staff.sum(axis=1)
+        peak[part] = staff.max(axis=1, initial=0)
+    wait_hours, wait_peak = _staff_for_wait(passengers, columns["autoGateRatio"], rates, columns["targetWaitTime"])
+    alert_hours = _alert_hours(day_totals, columns)
+
+    values = list(itertools.product(*axes.values()))
+    results = [
+        {
+            "settings": dict(zip(axes, combo)),
+            "staffHours": _pair(staff_hours[k]),
+            "peakStaff": _pair(peak[k]),
+            "staffHoursForWait": _pair(wait_hours[k]),
+            "peakStaffForWait": _pair(wait_peak[k]),
+            "alertHours": int(alert_hours[k]),
+        }
+        for k, combo in enumerate(values)
+    ]
+    return {
+        "dates": [forecast.get("date") for forecast in forecasts],
+        "hours": int(passengers.shape[0]),
+        "parameters": {path: list(values) for path, values in axes.items()},
+        "baseSettings": settings,
+        "combinations": count,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: python -m iqm.sweep <forecast.json> <grid.json> [settings.json]", file=sys.stderr)
+        return 2
+    loaded = []
+    for path in argv[:3]:
+        with open(path, encoding="utf-8") as f:
+            loaded.append(json.load(f))
+    json.dump(sweep(*loaded), sys.stdout, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Passenger terminals and how their data is partitioned.
+
+The 883 page serves one terminal per request. TERMINAL_PARAM is assumed
+to be its search form's `terminal` select; this has not been confirmed
+against the live site (documented requests only use `pday`), so the
+parser rejects any page whose selected terminal isn't the one requested
+(iqm.parser.check_page_terminal) rather than storing T1's numbers as T2.
+T1 keeps the original, unpartitioned locations so
+existing dashboards and history stores keep working; every other terminal
+gets a subdirectory named after it:
+
+    src/data/latest_data.json        T1
+    src/data/T2/latest_data.json     T2
+    data/history/2026-07.jsonl       T1
+    data/history/T2/2026-07.jsonl    T2
+
+Parking pages (964/965) cover T1's lots only and are not partitioned.
+"""
+
+import os
+
+TERMINALS = ("T1", "T2")
+DEFAULT_TERMINAL = "T1"
+TERMINAL_NAMES = {"T1": "제1여객터미널", "T2": "제2여객터미널"}
+TERMINAL_PARAM = "terminal"
+
+
+def normalize_terminal(value=None):
+    """"T2", "t2" or "2" -> "T2"; None/"" -> DEFAULT_TERMINAL. Raises ValueError otherwise."""
+    if not value:
+        return DEFAULT_TERMINAL
+    terminal = str(value).strip().upper()
+    if terminal.isdigit():
+        terminal = "T" + terminal
+    if terminal not in TERMINALS:
+        raise ValueError(f"Unknown terminal: {value} (expected one of {', '.join(TERMINALS)})")
+    return terminal
+
+
+def parse_terminals(value):
+    """Comma-separated list ("T1,T2") or "all" -> tuple of terminals, duplicates removed."""
+    if value is None:
+        return (DEFAULT_TERMINAL,)
+    if str(value).strip().lower() == "all":
+        return TERMINALS
+    terminals = []
+    for part in str(value).split(","):
+        terminal = normalize_terminal(part)
+        if terminal not in terminals:
+            terminals.append(terminal)
+    return tuple(terminals)
+
+
+def partition_dir(root, terminal=None):
+    """`root` for the default terminal, `root/<terminal>` for the others."""
+    terminal = normalize_terminal(terminal)
+    return root if terminal == DEFAULT_TERMINAL else os.path.join(root, terminal)
+
+
+def passenger_params(date_param=None, terminal=None):
+    """Query parameters for the 883 page.
+
+    The default terminal is requested without a terminal parameter, exactly
+    as before terminals were supported.
+    """
+    params = {}
+    if date_param:
+        params["pday"] = date_param
+    terminal = normalize_terminal(terminal)
+    if terminal != DEFAULT_TERMINAL:
+        params[TERMINAL_PARAM] = terminal
+    return params
@@ -0,0 +1,85 @@
+"""Fetch a range of days from airport.kr into the history store.
+
+Usage (from the project root):
+    python scripts/backfill.py --start 2026-07-01 --end 2026-07-31
+    python scripts/backfill.py --start 20260801 --end 20260803 --rate 0.5 --refetch
+    python scripts/backfill.py --start 2026-07-01 --end 2026-07-31 --terminal T2
+
+Days already in the store are skipped unless --refetch is given. Requests
+run concurrently but are rate-limited so airport.kr isn't hammered.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iqm.fetch import PASSENGER_PATH, PageJob, RateLimiter, fetch_all, make_session, upstream_url
+from iqm.history import DEFAULT_HISTORY_DIR, iter_dates, terminal_history
+from iqm.parser import parse_passenger_page
+from iqm.terminals import DEFAULT_TERMINAL, normalize_terminal, passenger_params
+
+
+def day_job(day, upstream=None, terminal=DEFAULT_TERMINAL):
+    pday = day.replace("-", "")
+    return PageJob(upstream_url(PASSENGER_PATH, upstream), passenger_params(pday, terminal),
+                   lambda html: parse_passenger_page(html, pday, terminal))
+
+
+def backfill(store, start, end, concurrency=4, rate=1.0, refetch=False, session=None, upstream=None,
+             terminal=DEFAULT_TERMINAL):
+    days = [day for day in iter_dates(start, end) if refetch or not store.has(day)]
+    if not days:
+        print("Nothing to fetch: all days already stored.")
+        return 0
+
+    print(f"Fetching {len(days)} day(s) with {concurrency} workers at <= {rate} req/s...")
+    started = time.perf_counter()
+    results = fetch_all(
+        session or make_session(pool_size=concurrency),
+        {day: day_job(day, upstream, terminal) for day in days},
+        max_workers=concurrency,
+        limiter=RateLimiter(rate, burst=concurrency),
+    )
+
+    failed = 0
+    for day in days:
+        res = results[day]
+        if res.error is not None:
+            failed += 1
+            print(f"  {day}: {res.stage} failed: {res.error}")
+        elif not res.value["hourlyData"]:
+            failed += 1
+            print(f"  {day}: no hourly rows, not stored")
+        else:
+            stored = store.append(res.value)
+            print(f"  {day}: {len(res.value['hourlyData'])} rows, {'stored' if stored else 'unchanged'}")
+
+    print(f"Done in {time.perf_counter() - started:.1f}s: {len(days) - failed} ok, {failed} failed")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill passenger forecast history")
+    parser.add_argument("--start", required=True, help="first day (YYYY-MM-DD or YYYYMMDD)")
+    parser.add_argument("--end", help="last day, inclusive (default: same as --start)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="max requests per second to airport.kr")
+    parser.add_argument("--refetch", action="store_true", help="fetch days already in the store")
+    parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR,
+                        help="history root; T2 is stored in its T2/ subdirectory")
+    parser.add_argument("--terminal", type=normalize_terminal, default=DEFAULT_TERMINAL)
+    parser.add_argument("--upstream", default=None,
+                        help="base URL to fetch from (default: $IQM_UPSTREAM or https://www.airport.kr)")
+    args = parser.parse_args(argv)
+
+    store = terminal_history(args.terminal, args.history_dir)
+    failed = backfill(store, args.start, args.end or args.start,
+                      args.concurrency, args.rate, args.refetch, upstream=args.upstream, terminal=args.terminal)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
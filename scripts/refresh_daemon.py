@@ -0,0 +1,85 @@
+"""Keep src/data/latest_data.json and parking_data.json fresh from a local process.
+
+Usage (from the project root):
+    python scripts/refresh_daemon.py
+    python scripts/refresh_daemon.py --passenger-interval 300 --parking-interval 60 --jitter 0.2
+    python scripts/refresh_daemon.py --terminals T1,T2
+
+Passenger and parking pages are polled on independent intervals with jitter.
+Failed or slow runs back off exponentially (up to --max-backoff seconds) and
+recover on the next fast success. With --terminals, every terminal's
+forecast is fetched concurrently in each passenger run (T2 is written to
+src/data/T2/). Files are swapped atomically. The same jobs
+can run inside the dev server with `python server.py --refresh`.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iqm import log as iqm_log
+from iqm.refresh import (DEFAULT_OUTPUT_DIR, PARKING_INTERVAL, PASSENGER_INTERVAL, SLOW_AFTER,
+                         DataRefresher, make_scheduler)
+from iqm.terminals import DEFAULT_TERMINAL, parse_terminals
+
+log = logging.getLogger("iqm.daemon")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Background refresh of airport data files")
+    parser.add_argument("--passenger-interval", type=float, default=PASSENGER_INTERVAL,
+                        help="seconds between passenger forecast fetches (0 disables)")
+    parser.add_argument("--parking-interval", type=float, default=PARKING_INTERVAL,
+                        help="seconds between parking fetches (0 disables)")
+    parser.add_argument("--jitter", type=float, default=0.1,
+                        help="random +/- fraction applied to every interval")
+    parser.add_argument("--slow-after", type=float, default=SLOW_AFTER,
+                        help="runs slower than this many seconds back off like failures")
+    parser.add_argument("--max-backoff", type=float, default=None,
+                        help="longest delay between runs while backing off (default 16x the interval)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="per-request timeout in seconds")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--terminals", type=parse_terminals, default=(DEFAULT_TERMINAL,),
+                        help="passenger terminals to refresh, e.g. T1,T2 or all (default: T1)")
+    parser.add_argument("--upstream", default=None,
+                        help="base URL to fetch from (default: $IQM_UPSTREAM or https://www.airport.kr)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="don't append forecasts to data/history or parking samples to data/parking")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-dir", default="logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    iqm_log.setup_logging(args.log_level, args.log_dir)
+    refresher = DataRefresher(args.output_dir, timeout=args.timeout, history=not args.no_history,
+                              parking_series=not args.no_history, upstream=args.upstream,
+                              terminals=args.terminals)
+    scheduler = make_scheduler(refresher, args.passenger_interval, args.parking_interval,
+                               jitter=args.jitter, slow_after=args.slow_after, max_backoff=args.max_backoff)
+    if not scheduler.tasks:
+        print("Both intervals are 0: nothing to do.")
+        return 1
+
+    log.info("Refreshing %s every %ss / %ss into %s", ", ".join(scheduler.tasks),
+             args.passenger_interval, args.parking_interval, args.output_dir)
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        iqm_log.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,136 +1,55 @@
-import json
+import argparse
 import os
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import sys
 
-def fetch_airport_data():
-    base_url = "https://www.airport.kr/ap_ko/883/subview.do"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iqm.fetch import PASSENGER_PATH, atomic_write_json, fetch_text, make_session, upstream_url
+from iqm.parser import parse_airport_html
+from iqm.terminals import DEFAULT_TERMINAL, normalize_terminal, partition_dir, passenger_params
+
+try:
+    from iqm import staffing
+except ImportError:  # NumPy not installed
+    staffing = None
+
+def fetch_airport_data(terminal=DEFAULT_TERMINAL):
+    base_url = upstream_url(PASSENGER_PATH)  # IQM_UPSTREAM overrides the site
     
-    print(f"Fetching from: {base_url}")
+    print(f"Fetching from: {base_url} ({terminal})")
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7'
-    }
-
     try:
-        response = requests.get(base_url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        data = parse_airport_html(soup)
+        html = fetch_text(make_session(), base_url, passenger_params(terminal=terminal))
+        data = parse_airport_html(html, terminal=terminal)
         
         return data
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
 
-def parse_airport_html(soup):
-    # User specified table id="userEx"
-    target_table = soup.find('table', id='userEx')
-    
-    if not target_table:
-        # Fallback logic
-        tables = soup.find_all('table')
-        for table in tables:
-            if table.get('id') == 'userEx':
-                target_table = table
-                break
-    
-    if not target_table:
-            # Fallback: look for table with enough rows
-        tables = soup.find_all('table')
-        for table in tables:
-            tbody = table.find('tbody') or table
-            if len(tbody.find_all('tr')) > 10:
-                target_table = table
-                break
-
-    if not target_table:
-        raise ValueError("Could not find valid data table (id='userEx') in HTML")
-    
-    tbody = target_table.find('tbody') or target_table
-    rows = tbody.find_all('tr')
-    hourly_data = []
-    
-    for row in rows:
-        cells = row.find_all(['td', 'th'])
-        # Clean text: remove tags, whitespace, commas
-        cell_texts = [cell.get_text(strip=True).replace(',', '') for cell in cells]
-        
-        if len(cell_texts) < 12: 
-            continue
-
-        try:
-            hour = cell_texts[0].replace('시', '')
-            
-            # Exclude "Total" row (합계)
-            if "합" in hour or "계" in hour or "Total" in hour:
-                continue
-
-            def to_int(val):
-                return int(val) if val.isdigit() else 0
-
-            arrival = {
-                "AB": to_int(cell_texts[1]),
-                "C": to_int(cell_texts[2]),
-                "D": to_int(cell_texts[3]),
-                "EF": to_int(cell_texts[4]),
-                "total": to_int(cell_texts[5])
-            }
-            
-            departure = {
-                "AB": to_int(cell_texts[6]) + to_int(cell_texts[7]), 
-                "C": to_int(cell_texts[8]),
-                "D": to_int(cell_texts[9]),
-                "EF": to_int(cell_texts[10]),
-                "total": to_int(cell_texts[11])
-            }
-            
-            # Parse start hour (e.g., "00~01" -> 0)
-            hour_start = 0
-            try:
-                import re
-                match = re.search(r'(\d+)', hour)
-                if match:
-                    hour_start = int(match.group(1))
-            except:
-                pass
-
-            hourly_data.append({
-                "hour": hour,
-                "hourStart": hour_start,
-                "arrival": arrival,
-                "departure": departure
-            })
-        except Exception as e:
-            print(f"Row parsing error: {e} for row: {cell_texts}")
-            continue
-
-    print(f"Parsed {len(hourly_data)} rows")
-    
-    return {
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "terminal": "T1",
-        "lastUpdated": datetime.now().isoformat(),
-        "hourlyData": hourly_data
-    }
-
 def save_data(data, filepath):
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    atomic_write_json(data, filepath)
     print(f"Data saved to {filepath}")
 
 if __name__ == "__main__":
-    data = fetch_airport_data()
+    parser = argparse.ArgumentParser(description="Fetch the passenger forecast into src/data")
+    parser.add_argument("--terminal", type=normalize_terminal, default=DEFAULT_TERMINAL,
+                        help="T1 (default, src/data/) or T2 (src/data/T2/)")
+    args = parser.parse_args()
+
+    data = fetch_airport_data(args.terminal)
     if data:
-        # Save to src/data/latest_data.json
+        # Save to src/data/latest_data.json (src/data/T2/ for T2)
         # Assuming script is run from root or scripts dir, we need to handle paths carefully
         # We'll assume it's run from project root
-        output_path = os.path.join("src", "data", "latest_data.json")
+        data_dir = partition_dir(os.path.join("src", "data"), args.terminal)
+        output_path = os.path.join(data_dir, "latest_data.json")
         save_data(data, output_path)
+        if staffing is not None:
+            requirements_path = os.path.join(data_dir, "latest_requirements.json")
+            if staffing.save_precomputed(data, requirements_path):
+                print(f"Requirements saved to {requirements_path}")
+        else:
+            print("numpy not installed; skipping precomputed requirements")
     else:
         exit(1)
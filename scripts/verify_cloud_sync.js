@@ -0,0 +1,130 @@
+// Checks the batched Supabase sync (src/js/data/cloudSync.js) against an
+// in-memory fake client: no network needed. Usage: node scripts/verify_cloud_sync.js
+
+import { CloudSync } from '../src/js/data/cloudSync.js';
+
+// Minimal stand-in for supabase.from(table): records every round trip
+function fakeClient(rows = []) {
+    const tables = { staff: new Map(rows.map(r => [r.id, { ...r }])), settings: new Map() };
+    const calls = [];
+    let failNext = 0;
+    const result = (data) => {
+        if (failNext > 0) {
+            failNext--;
+            return Promise.resolve({ data: null, error: { message: 'offline' } });
+        }
+        return Promise.resolve({ data, error: null });
+    };
+    return {
+        tables,
+        calls,
+        fail(n = 1) { failNext = n; },
+        from(table) {
+            return {
+                select() {
+                    calls.push(['select', table]);
+                    return result([...tables[table].values()]);
+                },
+                upsert(list) {
+                    calls.push(['upsert', table, list.length]);
+                    const res = result(null);
+                    return res.then(r => {
+                        if (!r.error) list.forEach(row => tables[table].set(row.id, { ...row }));
+                        return r;
+                    });
+                },
+                delete() {
+                    return {
+                        in(_, ids) {
+                            calls.push(['delete', table, ids.length]);
+                            return result(null).then(r => {
+                                if (!r.error) ids.forEach(id => tables[table].delete(id));
+                                return r;
+                            });
+                        }
+                    };
+                }
+            };
+        }
+    };
+}
+
+let failures = 0;
+function check(label, expected, actual) {
+    const e = JSON.stringify(expected);
+    const a = JSON.stringify(actual);
+    if (e !== a) {
+        failures++;
+        console.log(`FAIL ${label}: expected ${e}, got ${a}`);
+    } else {
+        console.log(`ok   ${label}`);
+    }
+}
+
+const staff = (n) => Array.from({ length: n }, (_, i) => ({ id: `s${i}`, name: `Staff ${i}`, status: 'idle', assignment: null }));
+
+// 1. Rapid edits collapse into one batch with only the changed rows
+{
+    const roster = staff(200);
+    const client = fakeClient(roster);
+    const sync = new CloudSync(client, { delay: 20 });
+    sync.markStaffSynced(roster);
+
+    let list = roster.map(s => ({ ...s }));
+    const results = [];
+    for (let i = 0; i < 10; i++) {
+        list = list.map(s => (s.id === `s${i}` ? { ...s, status: 'assigned', assignment: { type: 'arrival', zone: 'A', booth: i } } : s));
+        results.push(sync.queueStaff(list));
+    }
+    list = list.filter(s => s.id !== 's199');
+    results.push(sync.queueStaff(list));
+
+    const oks = await Promise.all(results);
+    check('all callers resolved true', true, oks.every(Boolean));
+    check('one upsert of 10 rows + one delete', [['upsert', 'staff', 10], ['delete', 'staff', 1]], client.calls);
+    check('remote matches local', list.length, client.tables.staff.size);
+    check('remote row updated', 'assigned', client.tables.staff.get('s3').status);
+}
+
+// 2. Unknown baseline: one select, then a diff (no full upsert)
+{
+    const client = fakeClient(staff(5));
+    const sync = new CloudSync(client, { delay: 5 });
+    const list = staff(4);
+    list[0].name = 'Renamed';
+    await sync.queueStaff(list);
+    check('baseline fetched once', [['select', 'staff'], ['upsert', 'staff', 1], ['delete', 'staff', 1]], client.calls);
+    client.calls.length = 0;
+    await sync.queueStaff(list);
+    check('no-op edit sends nothing', [], client.calls);
+}
+
+// 3. Failed batch is retried and the error reported once
+{
+    const client = fakeClient(staff(3));
+    let errors = 0;
+    const sync = new CloudSync(client, { delay: 5, onError: () => errors++ });
+    sync.markStaffSynced(staff(3));
+    client.fail(2);
+    const list = staff(3).map(s => ({ ...s, status: 'break' }));
+    check('failed batch resolves false', false, await sync.queueStaff(list));
+    await new Promise(resolve => setTimeout(resolve, 200));
+    check('error reported once', 1, errors);
+    check('retried until applied', 'break', client.tables.staff.get('s2').status);
+}
+
+// 4. Settings: only the last of several changes is sent, unchanged settings skipped
+{
+    const client = fakeClient();
+    const sync = new CloudSync(client, { delay: 5 });
+    sync.markSettingsSynced({ targetWaitTime: 15 });
+    sync.queueSettings({ targetWaitTime: 10 });
+    await sync.queueSettings({ targetWaitTime: 12 });
+    check('settings coalesced', [['upsert', 'settings', 1]], client.calls);
+    check('latest settings stored', 12, client.tables.settings.get('global_settings').config.targetWaitTime);
+    await sync.queueSettings({ targetWaitTime: 12 });
+    check('unchanged settings skipped', 1, client.calls.length);
+}
+
+console.log(failures ? `\n${failures} check(s) failed` : '\nAll checks passed');
+process.exit(failures ? 1 : 0);
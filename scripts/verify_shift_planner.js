@@ -0,0 +1,110 @@
+// Checks the shift planner (src/js/core/shiftPlanner.js): coverage is optimal per hour,
+// booths don't collide, and one officer's status change re-solves in well under 100 ms
+// without reshuffling everyone else. Usage: node scripts/verify_shift_planner.js [forecast.json]
+
+import { readFileSync } from 'fs';
+import { dirname, join } from 'path';
+import { fileURLToPath } from 'url';
+
+import { calculateAllRequirements } from '../src/js/core/calculator.js';
+import { ShiftPlanner, planShifts, demandTable, isOnShift } from '../src/js/core/shiftPlanner.js';
+import { DefaultSettings } from '../src/js/config.js';
+
+const ROOT = join(dirname(fileURLToPath(import.meta.url)), '..');
+const forecastPath = process.argv[2] || join(ROOT, 'src', 'data', 'latest_data.json');
+const forecast = JSON.parse(readFileSync(forecastPath, 'utf-8'));
+const requirement = calculateAllRequirements(forecast, DefaultSettings);
+
+let failures = 0;
+function check(label, expected, actual) {
+    const ok = expected === actual;
+    if (!ok) failures++;
+    console.log(`${ok ? 'ok  ' : 'FAIL'} ${label}: expected=${expected} actual=${actual}`);
+}
+
+// 3교대 + 주간 근무 혼합 명단
+const SHIFTS = [{ start: 6, end: 14 }, { start: 14, end: 22 }, { start: 22, end: 6 }, { start: 9, end: 18 }, null];
+const roster = (count) => Array.from({ length: count }, (_, i) => ({
+    id: `staff-${i}`,
+    name: `직원${i}`,
+    status: 'idle',
+    assignment: null,
+    ...(SHIFTS[i % SHIFTS.length] ? { shift: SHIFTS[i % SHIFTS.length] } : {})
+}));
+
+function lowerBound(staffList, fromIndex = 0) {
+    const { hours } = demandTable(requirement);
+    return hours.reduce((sum, { hourStart, demand }, i) => {
+        if (i < fromIndex) return sum;
+        const available = staffList.filter(s => s.status !== 'off' && isOnShift(s, hourStart)).length;
+        const needed = Object.values(demand).reduce((a, b) => a + b, 0);
+        return sum + Math.max(0, needed - available);
+    }, 0);
+}
+
+function boothCollisions(plan) {
+    let collisions = 0;
+    plan.hours.forEach((_, i) => {
+        const seen = new Set();
+        Object.keys(plan.assignments).forEach(id => {
+            const key = plan.assignments[id][i];
+            if (!key) return;
+            const seat = `${key}#${plan.booths[id][i]}`;
+            if (seen.has(seat) || !plan.booths[id][i]) collisions++;
+            seen.add(seat);
+        });
+    });
+    return collisions;
+}
+
+const peak = Math.max(...demandTable(requirement).hours.map(h => Object.values(h.demand).reduce((a, b) => a + b, 0)));
+console.log(`${requirement.date}: ${requirement.hourlyRequirement.length} hours, peak demand ${peak} officers`);
+
+for (const size of [40, 150, 300]) {
+    const staff = roster(size);
+    const plan = planShifts(requirement, staff);
+    check(`${size} staff: shortage is the per-hour lower bound`, lowerBound(staff), plan.shortageHours);
+    check(`${size} staff: no booth collisions`, 0, boothCollisions(plan));
+    const overfilled = plan.coverage.flatMap(c => Object.values(c)).filter(c => c.assigned > c.required).length;
+    check(`${size} staff: no zone over-filled`, 0, overfilled);
+    console.log(`     shortage=${plan.shortageHours} staff-hours, switches=${plan.switches}, ${plan.elapsedMs} ms`);
+}
+
+// 실시간 재계산: 12시에 한 명씩 부재 처리
+const staff = roster(300);
+const planner = new ShiftPlanner();
+const fromIndex = requirement.hourlyRequirement.findIndex(r => r.hourStart === 12);
+const first = planner.solve(requirement, staff, 0);
+check('re-solving unchanged inputs changes nothing', 0, planner.update(staff, { fromIndex }).changed);
+
+const busy = Object.keys(first.assignments).filter(id => first.assignments[id][fromIndex]).slice(0, 20);
+let slowest = 0;
+let maxChanged = 0;
+busy.forEach(id => {
+    staff.find(s => s.id === id).status = 'off';
+    const before = planner.plan;
+    const plan = planner.update(staff, { fromIndex });
+    slowest = Math.max(slowest, plan.elapsedMs);
+    maxChanged = Math.max(maxChanged, plan.changed);
+    const past = Object.keys(plan.assignments).every(sid =>
+        plan.assignments[sid].slice(0, fromIndex).every((key, i) => key === before.assignments[sid][i]));
+    if (!past) check(`hours before ${fromIndex} frozen after ${id} goes off`, true, past);
+    if (plan.assignments[id].slice(fromIndex).some(Boolean)) check(`${id} unassigned after going off`, true, false);
+});
+console.log(`     20 status changes: slowest re-solve ${slowest} ms, at most ${maxChanged} cells changed`);
+check('re-solve under 100 ms', true, slowest < 100);
+check('one status change moves only a few cells', true, maxChanged <= 4 * requirement.hourlyRequirement.length);
+check('shortage still optimal after changes', lowerBound(staff, fromIndex),
+    planner.plan.shortageByHour.slice(fromIndex).reduce((a, b) => a + b, 0));
+
+// 연속 근무 제한
+const limited = planShifts(requirement, roster(150), { maxConsecutiveHours: 4 });
+const longest = Math.max(...Object.values(limited.assignments).map(row => {
+    let run = 0;
+    let best = 0;
+    row.forEach(key => { run = key ? run + 1 : 0; best = Math.max(best, run); });
+    return best;
+}));
+check('maxConsecutiveHours respected', true, longest <= 4);
+
+process.exit(failures ? 1 : 0);
@@ -0,0 +1,87 @@
+
+// Cross-checks the Python staffing engine (iqm/staffing.py) against the browser
+// calculator. Usage: node scripts/verify_staffing_engine.js [forecast.json]
+
+import { execFileSync } from 'child_process';
+import { readFileSync } from 'fs';
+import { dirname, join } from 'path';
+import { fileURLToPath } from 'url';
+
+import { calculateAllRequirements } from '../src/js/core/calculator.js';
+import { findMinimumServers, calculateMMcMetrics } from '../src/js/core/queueModel.js';
+import { determineConsecutiveAlerts } from '../src/js/core/alertSystem.js';
+import { DefaultSettings } from '../src/js/config.js';
+
+const ROOT = join(dirname(fileURLToPath(import.meta.url)), '..');
+const forecastPath = process.argv[2] || join(ROOT, 'src', 'data', 'latest_data.json');
+const forecast = JSON.parse(readFileSync(forecastPath, 'utf-8'));
+
+// Stress settings too, so the queue search exercises high loads and the 100 cap
+const variants = [
+    ['default', DefaultSettings],
+    ['tight', { ...DefaultSettings, targetWaitTime: 1, targetUtilization: 0.95, autoGateRatio: 0.05 }],
+    ['alerts', { ...DefaultSettings, alertThresholds: { blue: 3000, yellow: 4000, orange: 5000, red: 6000 } }],
+    ['slow', { ...DefaultSettings, serviceRates: { ...DefaultSettings.serviceRates, arrivalForeign: 5, departureForeign: 5 } }],
+];
+
+let failures = 0;
+function check(label, expected, actual) {
+    if (expected !== actual) {
+        failures++;
+        if (failures <= 20) console.error(`❌ ${label}: JS=${expected} Python=${actual}`);
+    }
+}
+
+function runPython(settings) {
+    const out = execFileSync('python', ['-c',
+        'import json, sys; from iqm.staffing import compute_requirements; ' +
+        'args = json.load(sys.stdin); ' +
+        'json.dump(compute_requirements(args["forecast"], args["settings"]), sys.stdout)'],
+        { cwd: ROOT, input: JSON.stringify({ forecast, settings }), maxBuffer: 64 * 1024 * 1024 });
+    return JSON.parse(out);
+}
+
+for (const [name, settings] of variants) {
+    const js = calculateAllRequirements(forecast, settings);
+    const py = runPython(settings);
+    const alerts = determineConsecutiveAlerts(forecast.hourlyData, settings.alertThresholds);
+
+    js.hourlyRequirement.forEach((jsHour, i) => {
+        const pyHour = py.hourlyRequirement[i];
+        const tag = `${name} ${jsHour.hour}`;
+        for (const direction of ['arrival', 'departure']) {
+            for (const [zone, jsZone] of Object.entries(jsHour[direction])) {
+                const pyZone = pyHour[direction][zone];
+                check(`${tag} ${direction}.${zone}.required`, jsZone.required, pyZone.required);
+                check(`${tag} ${direction}.${zone}.passengers`, jsZone.passengers, pyZone.passengers);
+
+                const lambda = jsZone.passengers * (1 - settings.autoGateRatio);
+                check(`${tag} ${direction}.${zone}.requiredForWait`,
+                    findMinimumServers(lambda, jsZone.serviceRate, settings.targetWaitTime), pyZone.requiredForWait);
+
+                const metrics = lambda > 0 ? calculateMMcMetrics(lambda, jsZone.serviceRate, jsZone.required) : { stable: true, Wq: 0 };
+                const jsWait = metrics.stable ? metrics.Wq : null;
+                const close = jsWait === null ? pyZone.expectedWait === null
+                    : Math.abs(jsWait - pyZone.expectedWait) <= 1e-3 * Math.max(1, jsWait);
+                check(`${tag} ${direction}.${zone}.expectedWait`, true, close);
+            }
+        }
+        for (const field of ['totalArrival', 'totalDeparture', 'arrivalPassengers', 'departurePassengers']) {
+            check(`${tag} ${field}`, jsHour[field], pyHour[field]);
+        }
+        check(`${tag} alertLevel`, jsHour.alertLevel, pyHour.alertLevel);
+        check(`${tag} alertLevel (rules)`, alerts[jsHour.hour], pyHour.alertLevel);
+    });
+
+    check(`${name} summary.alertHours`, js.summary.alertHours.join(','), py.summary.alertHours.join(','));
+    for (const field of ['totalDailyArrival', 'totalDailyDeparture', 'maxArrivalStaff', 'maxDepartureStaff', 'peakHour', 'maxTotalPassengers']) {
+        check(`${name} summary.${field}`, js.summary[field], py.summary[field]);
+    }
+    console.log(`${name}: ${js.hourlyRequirement.length} hours compared`);
+}
+
+if (failures) {
+    console.error(`❌ ${failures} mismatches`);
+    process.exit(1);
+}
+console.log('✅ Python staffing engine matches the JS calculator');
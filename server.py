@@ -4,194 +4,831 @@ import urllib.request
 import json
 import re
 import os
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+
+from iqm import importer
+from iqm.alerts import AlertEngine, load_rules
+from iqm import log as iqm_log
+from iqm import metrics
+from iqm.cache import TTLCache
+from iqm.fetch import DEFAULT_UPSTREAM, PASSENGER_PATH, ConditionalGet, ParseCache, upstream_base
+from iqm.history import iter_dates, terminal_history
+from iqm.http_cache import AssetManifest, Representation, StaticFileCache, compact_json, negotiate_encoding
+from iqm.parking_series import RETENTION_DAYS, ParkingSeries
+from iqm.parser import parse_passenger_page, restamp_forecast, table_fragment
+from iqm.refresh import PARKING_INTERVAL, PASSENGER_INTERVAL, DataRefresher, make_scheduler
+from iqm.stream import KEEPALIVE_INTERVAL, Broadcaster, LiveRefresher
+from iqm.terminals import DEFAULT_TERMINAL, TERMINALS, normalize_terminal, parse_terminals, passenger_params
+
+try:
+    from iqm import staffing, sweep
+except ImportError:  # NumPy not installed
+    staffing = sweep = None
 
 PORT = 8080
 DIRECTORY = "src"
 
+# Concurrency / timeout defaults (overridable from the command line)
+MAX_WORKERS = 32          # bounded pool of request handler threads
+UPSTREAM_TIMEOUT = 10.0   # seconds per airport.kr request (connect and read)
+CLIENT_TIMEOUT = 30       # seconds before an idle client socket is dropped
+
+# /api/airport-data cache (keyed by terminal and requested pday)
+CACHE_TTL = 300           # seconds a parsed forecast is reused
+CACHE_MAX_ENTRIES = 32    # distinct (terminal, date) pairs kept, least recently used evicted first
+
+# /api/stream live push
+STREAM_INTERVAL = 60      # seconds between background refreshes (0 disables /api/stream)
+
+LOG_DIR = "logs"
+MAX_HISTORY_DAYS = 366    # per /api/history request
+MAX_SERIES_POINTS = 10000 # per lot per /api/parking-history request
+MAX_SWEEP_DAYS = 31       # history days per /api/sweep request
+MAX_IMPORT_BYTES = 64 * 1024 * 1024  # per /api/import upload
+MAX_ALERT_SAMPLES = 10000  # per POST /api/alerts
+
+log = logging.getLogger("iqm.server")
+access_log = logging.getLogger("iqm.access")
+
+
+def log_request_error(client_address):
+    # socketserver's default handle_error prints the traceback to stderr,
+    # bypassing the log files and the queue handler
+    log.exception("Unhandled error serving %s", client_address[0])
+
+
+class PooledHTTPServer(socketserver.TCPServer):
+    # Hands every accepted connection to a fixed-size worker pool, so a slow
+    # upstream fetch only ties up one worker while static files under src/
+    # keep being served by the others.
+    allow_reuse_address = True
+    # Listen backlog; socketserver's default of 5 drops connections (1s SYN
+    # retry) when a dashboard burst opens many at once
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=MAX_WORKERS,
+                 upstream_timeout=UPSTREAM_TIMEOUT):
+        super().__init__(server_address, handler_class)
+        self.upstream_timeout = upstream_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="http-worker")
+        # Bound the backlog of accepted-but-not-started connections; once it is
+        # full the accept loop blocks and the kernel listen queue absorbs the rest.
+        self.pending = threading.BoundedSemaphore(max_workers * 2)
+
+    def process_request(self, request, client_address):
+        self.pending.acquire()
+        try:
+            self.executor.submit(self.process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down
+            self.pending.release()
+            self.shutdown_request(request)
+
+    def process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.pending.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+    def handle_error(self, request, client_address):
+        log_request_error(client_address)
+
+
+class SingleThreadHTTPServer(socketserver.TCPServer):
+    # Legacy behaviour: one request at a time
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, upstream_timeout=UPSTREAM_TIMEOUT):
+        super().__init__(server_address, handler_class)
+        self.upstream_timeout = upstream_timeout
+
+    def handle_error(self, request, client_address):
+        log_request_error(client_address)
+
+
+# Metrics route labels; everything else is "static"
+API_ROUTES = ('/api/airport-data', '/api/staffing', '/api/sweep', '/api/import', '/api/stream',
+              '/api/alerts', '/api/parking-history', '/api/history', '/api/cache-stats', '/api/logging', '/metrics',
+              '/asset-manifest.json')
+
+
+def check_staffing_body(body):
+    # merge_settings and forecast_arrays call .items()/.get() on these; a list
+    # there would raise AttributeError (a 500) instead of a 400
+    settings = body.get('settings')
+    if settings is not None and not isinstance(settings, dict):
+        raise ValueError("settings must be a JSON object")
+    forecast = body.get('forecast')
+    if forecast is None:
+        return
+    if not isinstance(forecast, dict) or not isinstance(forecast.get('hourlyData'), list):
+        raise ValueError("forecast must be a JSON object with an hourlyData list")
+    for row in forecast['hourlyData']:
+        if not isinstance(row, dict) or not all(isinstance(row.get(d) or {}, dict) for d in ('arrival', 'departure')):
+            raise ValueError("forecast.hourlyData rows must be objects with arrival/departure objects")
+
+
+def route_label(path):
+    for route in API_ROUTES:
+        if path.startswith(route):
+            return route
+    return 'static'
+
+
 class ProxyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Per-connection socket timeout so a stalled client can't pin a worker
+    timeout = CLIENT_TIMEOUT
+
     def __init__(self, *args, **kwargs):
+        self.status_code = None
+        self.response_bytes = None
         super().__init__(*args, directory=DIRECTORY, **kwargs)
 
+    def send_response(self, code, message=None):
+        self.status_code = code
+        super().send_response(code, message)
+
+    def instrumented(self, dispatch):
+        # Per-route request count, latency and payload size for /metrics
+        route = route_label(self.path)
+        self.status_code = self.response_bytes = None
+        start = time.perf_counter()
+        try:
+            dispatch()
+        finally:
+            if route != '/api/stream':  # long-lived; would swamp the histogram
+                metrics.HTTP_DURATION.observe(time.perf_counter() - start, route=route)
+            metrics.HTTP_REQUESTS.inc(route=route, method=self.command, status=self.status_code or 0)
+            if self.response_bytes is not None:
+                metrics.HTTP_RESPONSE_BYTES.observe(self.response_bytes, route=route)
+
     def do_GET(self):
+        self.instrumented(self.route_get)
+
+    def do_POST(self):
+        self.instrumented(self.route_post)
+
+    def route_get(self):
         if self.path.startswith('/api/airport-data'):
             self.handle_airport_data()
+        elif self.path.startswith('/api/staffing'):
+            self.handle_staffing()
+        elif self.path.startswith('/api/stream'):
+            self.handle_stream()
+        elif self.path.startswith('/api/alerts'):
+            self.handle_alerts()
+        elif self.path.startswith('/api/parking-history'):
+            self.handle_parking_history()
+        elif self.path.startswith('/api/history'):
+            self.handle_history()
+        elif self.path.startswith('/api/cache-stats'):
+            self.handle_cache_stats()
+        elif self.path.startswith('/api/logging'):
+            self.send_json(200, iqm_log.get_state())
+        elif urlparse(self.path).path == '/asset-manifest.json':
+            # Content hashes of src/ for the service worker (sw.js)
+            self.send_representation(self.server.asset_manifest.get(), cache_control='no-cache')
+        elif self.path.startswith('/metrics'):
+            self.handle_metrics()
+        else:
+            self.handle_static()
+
+    def route_post(self):
+        if self.path.startswith('/api/staffing'):
+            self.handle_staffing()
+        elif self.path.startswith('/api/sweep'):
+            self.handle_sweep()
+        elif self.path.startswith('/api/import'):
+            self.handle_import()
+        elif self.path.startswith('/api/alerts'):
+            self.handle_alert_samples()
+        elif self.path.startswith('/api/logging'):
+            self.handle_logging_update()
         else:
-            super().do_GET()
+            self.send_json_error(404, "Not found")
+
+    def log_message(self, format, *args):
+        # Route http.server's access log through the queue instead of stderr
+        access_log.info("%s %s", self.address_string(), format % args)
 
     def handle_airport_data(self):
         try:
             # Parse query parameters
-            from urllib.parse import urlparse, parse_qs
+            import requests
             query_components = parse_qs(urlparse(self.path).query)
             date_param = query_components.get('date', [None])[0]
+            try:
+                terminal = normalize_terminal(query_components.get('terminal', [None])[0])
+            except ValueError as e:
+                self.send_json_error(400, str(e))
+                return
 
-            # 1. Fetch data from airport.kr
-            base_url = "https://www.airport.kr/ap_ko/883/subview.do"
-            params = {}
-            if date_param:
-                # User specified name="pday"
-                params['pday'] = date_param
+            try:
+                with metrics.STAGE_DURATION.time(stage="airport_data.load"):
+                    rep = self.load_forecast(date_param, terminal)
+            except requests.Timeout:
+                self.send_upstream_timeout(date_param)
+                return
 
-            print(f"Fetching from: {base_url} with params {params}")
-            
-            # Use requests for better header/cookie handling
-            import requests
-            from bs4 import BeautifulSoup
-
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-
-            response = requests.get(base_url, params=params, headers=headers)
-            response.raise_for_status()
-            
-            # 2. Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            data = self.parse_airport_html(soup, date_param)
-
-            # 3. Send JSON response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(data).encode('utf-8'))
+            # Send JSON response (304 when the client's ETag still matches)
+            with metrics.STAGE_DURATION.time(stage="airport_data.send"):
+                self.send_representation(rep, cache_control='no-cache')
 
         except Exception as e:
-            with open("server_error.log", "a", encoding="utf-8") as f:
-                f.write(f"Request error: {e}\n")
-            print(f"Error handling request: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
+            log.exception("Request error: %s", e)
+            self.send_json_error(500, str(e))
+
+    def load_forecast(self, date_param=None, terminal=DEFAULT_TERMINAL):
+        # Forecast for a given terminal and pday only changes a few times per
+        # hour, so serve it from the cache; concurrent misses share one fetch.
+        cache_key = (terminal, date_param or datetime.now().strftime("%Y%m%d"))
+        # The cache holds the serialized/compressed response (and its dict)
+        def load():
+            forecast = self.fetch_airport_data(date_param, terminal)
+            with metrics.STAGE_DURATION.time(stage="airport_data.serialize"):
+                return Representation.from_json(forecast, time.time())
+
+        return self.server.airport_cache.get_or_load(cache_key, load)
+
+    def send_upstream_timeout(self, date_param):
+        timeout = getattr(self.server, 'upstream_timeout', UPSTREAM_TIMEOUT)
+        log.warning("Upstream timed out after %ss (date=%s)", timeout, date_param)
+        self.send_json_error(504, f"Upstream request timed out after {timeout}s")
+
+    def fetch_airport_data(self, date_param=None, terminal=DEFAULT_TERMINAL):
+        # 1. Fetch data from airport.kr (pday / terminal as the page's search form sends them)
+        base_url = self.server.upstream + PASSENGER_PATH
+        params = passenger_params(date_param, terminal)
+
+        log.info("Fetching from: %s with params %s", base_url, params)
+
+        # Use requests for better header/cookie handling
+        import requests
+
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7'
+        }
+
+        timeout = getattr(self.server, 'upstream_timeout', UPSTREAM_TIMEOUT)
+        # Revalidates with ETag / Last-Modified when upstream offered them
+        with metrics.STAGE_DURATION.time(stage="airport_data.fetch"):
+            html = self.server.conditional_get.fetch(requests, base_url, params, timeout, headers=headers)
+
+        # 2. Parse the forecast table (skipped when the table is unchanged)
+        with metrics.STAGE_DURATION.time(stage="airport_data.parse"):
+            return self.server.forecast_parser(html, date_param, terminal)
+
+    def handle_static(self):
+        # Regular files get ETag/304 handling and gzip/deflate from an
+        # in-memory copy; directories, large files and errors fall back to
+        # SimpleHTTPRequestHandler.
+        path = self.translate_path(self.path)
+        if not urlparse(self.path).path.endswith('/') and os.path.isfile(path):
+            rep = self.server.static_cache.get(path)
+            if rep is not None:
+                is_data = rep.content_type.startswith('application/json')
+                self.send_representation(rep, cache_control='no-cache' if is_data else None)
+                return
+        super().do_GET()
+
+    def send_representation(self, rep, cache_control=None):
+        if rep.is_not_modified(self.headers):
+            self.response_bytes = 0
+            self.send_response(304)
+            self.send_header('ETag', rep.etag)
+            if cache_control:
+                self.send_header('Cache-Control', cache_control)
+            if rep.vary:
+                self.send_header('Vary', 'Accept-Encoding')
             self.end_headers()
-            error_response = {"error": str(e)}
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
-
-    def parse_airport_html(self, soup, date_param=None):
-        # User specified table id="userEx"
-        target_table = soup.find('table', id='userEx')
-        
-        if not target_table:
-            # Fallback logic if id changes, but prioritize user input
-            tables = soup.find_all('table')
-            for table in tables:
-                if table.get('id') == 'userEx':
-                    target_table = table
-                    break
-        
-        if not target_table:
-             # Fallback: look for table with enough rows
-            tables = soup.find_all('table')
-            for table in tables:
-                tbody = table.find('tbody') or table
-                if len(tbody.find_all('tr')) > 10:
-                    target_table = table
-                    break
-
-        if not target_table:
-            raise ValueError("Could not find valid data table (id='userEx') in HTML")
-        
-        tbody = target_table.find('tbody') or target_table
-        rows = tbody.find_all('tr')
-        hourly_data = []
-        
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            # Clean text: remove tags, whitespace, commas
-            cell_texts = [cell.get_text(strip=True).replace(',', '') for cell in cells]
-            
-            # Log for debug
-            with open("server_debug.log", "a", encoding="utf-8") as f:
-                f.write(f"Row len: {len(cell_texts)}, Content: {cell_texts}\n")
-
-            if len(cell_texts) < 12: 
-                continue
+            return
 
+        encoding = negotiate_encoding(self.headers.get('Accept-Encoding'), rep.encoded)
+        body = rep.body_for(encoding)
+        self.send_response(200)
+        self.send_header('Content-Type', rep.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', rep.etag_for(encoding))
+        last_modified = rep.last_modified_header()
+        if last_modified:
+            self.send_header('Last-Modified', last_modified)
+        if cache_control:
+            self.send_header('Cache-Control', cache_control)
+        if rep.vary:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+        self.response_bytes = len(body)
+
+    def handle_staffing(self):
+        # GET  /api/staffing?date=YYYYMMDD -> requirements for the cached forecast, default settings
+        # POST /api/staffing {"date"?, "forecast"?, "settings"?} -> same with custom settings
+        if staffing is None:
+            self.send_json_error(501, "Staffing engine requires numpy")
+            return
+        import requests
+        body = {}
+        if self.command == 'POST':
             try:
-                hour = cell_texts[0].replace('시', '')
-                
-                # Exclude "Total" row (합계)
-                if "합" in hour or "계" in hour or "Total" in hour:
-                    continue
-
-                def to_int(val):
-                    return int(val) if val.isdigit() else 0
-
-                # User requested to exclude totals from the graph.
-                # We will exclude them from the API response to ensure they aren't plotted.
-                # Indices:
-                # 0: Time
-                # 1: Arr AB
-                # 2: Arr C
-                # 3: Arr D
-                # 4: Arr EF
-                # 5: Arr Total (EXCLUDE) -> INCLUDE
-                # 6: Dep 1
-                # 7: Dep 2
-                # 8: Dep 3
-                # 9: Dep 4
-                # 10: Dep 5,6
-                # 11: Dep Total (EXCLUDE) -> INCLUDE
-
-                arrival = {
-                    "AB": to_int(cell_texts[1]),
-                    "C": to_int(cell_texts[2]),
-                    "D": to_int(cell_texts[3]),
-                    "EF": to_int(cell_texts[4]),
-                    "total": to_int(cell_texts[5])
-                }
-                
-                departure = {
-                    "AB": to_int(cell_texts[6]) + to_int(cell_texts[7]), 
-                    "C": to_int(cell_texts[8]),
-                    "D": to_int(cell_texts[9]),
-                    "EF": to_int(cell_texts[10]),
-                    "total": to_int(cell_texts[11])
-                }
-                
-                # Parse start hour (e.g., "00~01" -> 0)
-                hour_start = 0
-                try:
-                    # Extract first number found in the string
-                    import re
-                    match = re.search(r'(\d+)', hour)
-                    if match:
-                        hour_start = int(match.group(1))
-                except:
-                    pass
-
-                hourly_data.append({
-                    "hour": hour,
-                    "hourStart": hour_start,
-                    "arrival": arrival,
-                    "departure": departure
-                })
-            except Exception as e:
-                with open("server_error.log", "a", encoding="utf-8") as f:
-                    f.write(f"Row parsing error: {e} for row: {cell_texts}\n")
-                continue
-
-        print(f"Parsed {len(hourly_data)} rows")
-        
-        # Use requested date if available, otherwise today
-        response_date = datetime.now().strftime("%Y-%m-%d")
-        if date_param:
-            # date_param is YYYYMMDD, convert to YYYY-MM-DD
-            try:
-                response_date = f"{date_param[:4]}-{date_param[4:6]}-{date_param[6:]}"
-            except:
-                pass
-
-        return {
-            "date": response_date,
-            "terminal": "T1",
-            "lastUpdated": datetime.now().isoformat(),
-            "hourlyData": hourly_data
-        }
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(body, dict):
+                    raise ValueError("Body must be a JSON object")
+                check_staffing_body(body)
+            except (ValueError, TypeError) as e:
+                self.send_json_error(400, str(e))
+                return
+        query = parse_qs(urlparse(self.path).query)
+        date_param = body.get('date') or query.get('date', [None])[0]
+        try:
+            terminal = normalize_terminal(body.get('terminal') or query.get('terminal', [None])[0])
+        except ValueError as e:
+            self.send_json_error(400, str(e))
+            return
+
+        try:
+            forecast = body.get('forecast')
+            if forecast is None:
+                forecast_rep = self.load_forecast(date_param, terminal)
+                forecast = forecast_rep.data
+            settings = body.get('settings')
+
+            def compute():
+                with metrics.STAGE_DURATION.time(stage="staffing.compute"):
+                    return Representation.from_json(staffing.compute_requirements(forecast, settings), time.time())
+
+            if settings is None and 'forecast' not in body:
+                # Default settings on a cached forecast: reuse the result
+                # until the forecast itself changes
+                rep = self.server.staffing_cache.get_or_load(forecast_rep.etag, compute)
+            else:
+                rep = compute()
+        except requests.Timeout:
+            self.send_upstream_timeout(date_param)
+            return
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json_error(400, f"Invalid forecast or settings: {e}")
+            return
+        except Exception as e:
+            log.exception("Staffing error: %s", e)
+            self.send_json_error(500, str(e))
+            return
+        self.send_representation(rep, cache_control='no-cache')
+
+    def handle_sweep(self):
+        # POST /api/sweep {"grid": {path: values}, "settings"?, "terminal"?,
+        #                  "date"? | "start" + "end"? (history) | "forecast"?}
+        # -> staff totals, peaks and alert hours for every combination
+        if sweep is None:
+            self.send_json_error(501, "Staffing engine requires numpy")
+            return
+        import requests
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError("Body must be a JSON object")
+            terminal = normalize_terminal(body.get('terminal'))
+            check_staffing_body(body)
+            sweep.expand_grid(body.get('grid'))  # reject bad grids before fetching anything
+        except (ValueError, TypeError) as e:
+            self.send_json_error(400, str(e))
+            return
+
+        try:
+            if body.get('forecast') is not None:
+                forecasts = [body['forecast']]
+            elif body.get('start'):
+                days = list(iter_dates(body['start'], body.get('end') or body['start']))
+                if not days:
+                    raise ValueError("start must not be after end")
+                if len(days) > MAX_SWEEP_DAYS:
+                    raise ValueError(f"Range too long (max {MAX_SWEEP_DAYS} days)")
+                forecasts = list(self.server.history[terminal].range(days[0], days[-1]))
+                if not forecasts:
+                    raise ValueError("No stored forecasts in that range (see /api/history)")
+            else:
+                forecasts = [self.load_forecast(body.get('date'), terminal).data]
+            with metrics.STAGE_DURATION.time(stage="sweep.compute"):
+                result = sweep.sweep(forecasts, body['grid'], body.get('settings'))
+        except requests.Timeout:
+            self.send_upstream_timeout(body.get('date'))
+            return
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json_error(400, f"Invalid sweep: {e}")
+            return
+        except Exception as e:
+            log.exception("Sweep error: %s", e)
+            self.send_json_error(500, str(e))
+            return
+        result["terminal"] = terminal
+        # Large grids give large bodies: send compressed when the client accepts it
+        self.send_representation(Representation.from_json(result), cache_control='no-cache')
+
+    def handle_import(self):
+        # POST /api/import[?terminal=T2][&date=YYYY-MM-DD][&format=csv|xlsx|html][&dryRun=1]
+        # body: the file itself (curl --data-binary @forecast.csv) -> days written into history
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            terminal = normalize_terminal(query.get('terminal', [None])[0])
+            file_format = query.get('format', [None])[0]
+            if file_format is not None and file_format not in importer.FORMATS:
+                raise ValueError(f"Unknown format {file_format!r} (expected one of {', '.join(importer.FORMATS)})")
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError as e:
+            self.close_connection = True
+            self.send_json_error(400, str(e))
+            return
+        if length <= 0:
+            self.close_connection = True
+            self.send_json_error(411, "Send the file as the request body with a Content-Length")
+            return
+        if length > MAX_IMPORT_BYTES:
+            self.close_connection = True
+            self.send_json_error(413, f"File too large (max {MAX_IMPORT_BYTES // (1024 * 1024)} MB)")
+            return
+
+        # Read straight from the socket; only the parsed rows are kept
+        body = importer.BoundedReader(self.rfile, length)
+        try:
+            with metrics.STAGE_DURATION.time(stage="import"):
+                report = importer.import_forecasts(body, self.server.history, query.get('date', [None])[0],
+                                                   terminal, file_format,
+                                                   dry_run=query.get('dryRun', ['0'])[0] in ('1', 'true'))
+        except ValueError as e:
+            self.close_connection = True  # the rest of the body is unread
+            self.send_json_error(400, f"Invalid file: {e}")
+            return
+        except Exception as e:
+            self.close_connection = True
+            log.exception("Import error: %s", e)
+            self.send_json_error(500, str(e))
+            return
+        log.info("Imported %d day(s), %d stored, %d row error(s)",
+                 report["days"], report["stored"], report["errorCount"])
+        self.send_json(200, report)
+
+    def handle_stream(self):
+        # Server-Sent Events: a snapshot first, then forecast/parking diffs as
+        # the background refresher finds changes. Each client holds one worker
+        # thread, so the number of streams is capped below the pool size.
+        refresher = getattr(self.server, 'refresher', None)
+        if refresher is None:
+            self.send_json_error(503, "Live stream disabled (requires --mode thread and --stream-interval > 0)")
+            return
+        sub = self.server.broadcaster.subscribe()
+        if sub is None:
+            self.send_json_error(503, "Too many stream clients")
+            return
+        if not self.server.broadcaster.has_snapshot():
+            refresher.wake()
+
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.end_headers()
+            self.wfile.write(b"retry: 5000\n\n")
+            while True:
+                message = sub.get(KEEPALIVE_INTERVAL)
+                self.wfile.write(message if message is not None else b": keepalive\n\n")
+                self.wfile.flush()
+        except EOFError:
+            log.info("Stream client %s dropped (queue full or shutdown)", self.address_string())
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass  # client went away
+        finally:
+            self.server.broadcaster.unsubscribe(sub)
+
+    def handle_alerts(self):
+        # /api/alerts[?series=T1][&scope=total] -> rules, current level and alert slots per series/scope
+        query = parse_qs(urlparse(self.path).query)
+        self.send_json(200, self.server.alerts.state(query.get('series', [None])[0], query.get('scope', [None])[0]))
+
+    def handle_alert_samples(self):
+        # POST /api/alerts {"series": "T1-gates", "resolution"?: 15,
+        #                   "samples": [{"time": "2026-10-17T08:15", "values": {"total": 2100, ...}}]}
+        # -> transitions caused (also published on /api/stream as "alert" events).
+        # Terminal names (T1, T2) are fed hourly from the forecasts and can't be
+        # posted to; other feeds need a series of their own. The batch is applied
+        # all or nothing.
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError("Body must be a JSON object")
+            series = body.get('series')
+            if not isinstance(series, str) or not series:
+                raise ValueError("series is required, e.g. \"T1-gates\"")
+            if series.upper() in TERMINALS:
+                raise ValueError(f"series {series} is fed by the forecasts; use a name of its own, e.g. \"{series}-gates\"")
+            samples = body.get('samples')
+            if not isinstance(samples, list) or not samples:
+                raise ValueError("samples must be a non-empty list")
+            if len(samples) > MAX_ALERT_SAMPLES:
+                raise ValueError(f"Too many samples (max {MAX_ALERT_SAMPLES})")
+            if not all(isinstance(sample, dict) and 'time' in sample and 'values' in sample for sample in samples):
+                raise ValueError("Each sample must be an object with time and values")
+            resolution = int(body.get('resolution') or 60)
+            with metrics.STAGE_DURATION.time(stage="alerts.push"):
+                transitions = self.server.alerts.push_many(
+                    series, [(sample['time'], sample['values']) for sample in samples], resolution)
+        except (TypeError, ValueError) as e:
+            self.send_json_error(400, f"Invalid samples: {e}")
+            return
+        self.send_json(200, {"series": series, "samples": len(samples), "transitions": transitions})
+
+    def handle_history(self):
+        # /api/history?start=YYYY-MM-DD&end=YYYY-MM-DD[&terminal=T2] -> stored days in range
+        query = parse_qs(urlparse(self.path).query)
+        start = query.get('start', [None])[0]
+        end = query.get('end', [start])[0]
+        try:
+            terminal = normalize_terminal(query.get('terminal', [None])[0])
+        except ValueError as e:
+            self.send_json_error(400, str(e))
+            return
+        history = self.server.history[terminal]
+        if not start:
+            self.send_json(200, {"terminal": terminal, "dates": history.dates()})
+            return
+        try:
+            days = list(iter_dates(start, end))
+        except ValueError as e:
+            self.send_json_error(400, str(e))
+            return
+        if len(days) > MAX_HISTORY_DAYS:
+            self.send_json_error(400, f"Range too long (max {MAX_HISTORY_DAYS} days)")
+            return
+        records = list(history.range(start, end))
+        self.send_representation(Representation.from_json({"terminal": terminal, "start": start, "end": end,
+                                                           "days": records}),
+                                 cache_control='no-cache')
+
+    def handle_parking_history(self):
+        # /api/parking-history?lot=shortTerm.floor1&lot=...&hours=6&resolution=300
+        # -> last N hours at fixed resolution; all lots when no lot is given
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            hours = float(query.get('hours', ['6'])[0])
+            resolution = int(query.get('resolution', ['300'])[0])
+        except ValueError as e:
+            self.send_json_error(400, str(e))
+            return
+        if not 0 < hours <= RETENTION_DAYS * 24 or resolution <= 0:
+            self.send_json_error(400, f"hours must be in (0, {RETENTION_DAYS * 24}] and resolution > 0")
+            return
+        if hours * 3600 / resolution > MAX_SERIES_POINTS:
+            self.send_json_error(400, f"Too many points (max {MAX_SERIES_POINTS}); use a coarser resolution")
+            return
+        series = self.server.parking_series.series(query.get('lot'), hours, resolution)
+        self.send_representation(Representation.from_json(series), cache_control='no-cache')
+
+    def handle_cache_stats(self):
+        stats = {"airportData": self.server.airport_cache.stats(),
+                 "staffing": self.server.staffing_cache.stats(),
+                 "stream": self.server.broadcaster.stats(),
+                 "alerts": self.server.alerts.stats()}
+        stats["upstream"] = {"conditional": self.server.conditional_get.stats(),
+                             "parse": self.server.forecast_parser.stats()}
+        if self.server.scheduler is not None:
+            stats["refresh"] = self.server.scheduler.stats()
+            stats["refresh"]["upstream"] = self.server.data_refresher.stats()
+        elif self.server.refresher is not None:
+            stats["stream"]["refresher"] = self.server.refresher.stats()
+        self.send_json(200, stats)
+
+    def handle_logging_update(self):
+        # Body: {"level": "DEBUG", "rowDump": true}; either key is optional
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError("Body must be a JSON object")
+            if 'level' in body:
+                iqm_log.set_level(body['level'])
+            if 'rowDump' in body:
+                iqm_log.set_row_dump(bool(body['rowDump']))
+        except (ValueError, TypeError) as e:
+            self.send_json_error(400, str(e))
+            return
+        log.info("Logging updated: %s", iqm_log.get_state())
+        self.send_json(200, iqm_log.get_state())
+
+    def handle_metrics(self):
+        body = metrics.REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.response_bytes = len(body)
+
+    def send_json(self, status, data):
+        body = compact_json(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.response_bytes = len(body)
+
+    def send_json_error(self, status, message):
+        self.send_json(status, {"error": message})
+
+
+def collect_metrics(httpd):
+    # Read at /metrics scrape time from the stats the caches/scheduler already keep
+    caches = {"airport_data": httpd.airport_cache.stats(), "staffing": httpd.staffing_cache.stats()}
+    stream = httpd.broadcaster.stats()
+    out = [
+        ("iqm_cache_requests_total", "counter", "Cache lookups by result.",
+         [({"cache": name, "result": result}, st[result])
+          for name, st in caches.items() for result in ("hits", "misses", "stale", "coalesced")]),
+        ("iqm_cache_hit_ratio", "gauge", "Share of lookups served without a new load (hits + coalesced).",
+         [({"cache": name}, st["hitRatio"]) for name, st in caches.items()]),
+        ("iqm_cache_entries", "gauge", "Entries currently cached.",
+         [({"cache": name}, st["entries"]) for name, st in caches.items()]),
+        ("iqm_cache_evictions_total", "counter", "Entries evicted to stay under the size limit.",
+         [({"cache": name}, st["evictions"]) for name, st in caches.items()]),
+        ("iqm_stream_clients", "gauge", "Connected /api/stream clients.", [({}, stream["clients"])]),
+        ("iqm_stream_events_published_total", "counter", "Events published to /api/stream.",
+         [({}, stream["published"])]),
+        ("iqm_stream_clients_dropped_total", "counter", "Stream clients dropped for falling behind.",
+         [({}, stream["dropped"])]),
+    ]
+    if httpd.scheduler is not None:
+        tasks = httpd.scheduler.stats()
+        out += [
+            ("iqm_refresh_runs_total", "counter", "Refresh job runs.",
+             [({"task": name}, st["runs"]) for name, st in tasks.items()]),
+            ("iqm_refresh_failures_total", "counter", "Refresh job failures.",
+             [({"task": name}, st["failures"]) for name, st in tasks.items()]),
+            ("iqm_refresh_backoff_level", "gauge", "Current backoff level (0 = normal interval).",
+             [({"task": name}, st["backoffLevel"]) for name, st in tasks.items()]),
+            ("iqm_refresh_last_success_timestamp_seconds", "gauge", "Unix time of the last successful run.",
+             [({"task": name}, st["lastSuccess"]) for name, st in tasks.items() if st["lastSuccess"]]),
+        ]
+    return out
+
+
+def make_server(port=PORT, mode="thread", workers=MAX_WORKERS, upstream_timeout=UPSTREAM_TIMEOUT,
+                cache_ttl=CACHE_TTL, cache_size=CACHE_MAX_ENTRIES, stream_interval=STREAM_INTERVAL,
+                stream_clients=None, refresh=False, passenger_interval=PASSENGER_INTERVAL,
+                parking_interval=PARKING_INTERVAL, upstream=None, terminals=None, alert_rules=None):
+    if mode == "single":
+        httpd = SingleThreadHTTPServer(("", port), ProxyHTTPRequestHandler,
+                                       upstream_timeout=upstream_timeout)
+    else:
+        httpd = PooledHTTPServer(("", port), ProxyHTTPRequestHandler,
+                                 max_workers=workers, upstream_timeout=upstream_timeout)
+    httpd.upstream = upstream_base(upstream)
+    httpd.airport_cache = TTLCache(ttl=cache_ttl, max_entries=cache_size)
+    httpd.staffing_cache = TTLCache(ttl=cache_ttl, max_entries=cache_size)
+    httpd.static_cache = StaticFileCache()
+    httpd.asset_manifest = AssetManifest(DIRECTORY, httpd.static_cache)
+    httpd.history = {terminal: terminal_history(terminal) for terminal in TERMINALS}
+    httpd.parking_series = ParkingSeries()
+    # Shared by on-demand /api/airport-data fetches (any date)
+    httpd.conditional_get = ConditionalGet()
+    httpd.forecast_parser = ParseCache(parse_passenger_page, table_fragment, restamp_forecast,
+                                       max_entries=8 * len(TERMINALS), name="883")
+
+    # Leave at least half the pool for ordinary requests
+    httpd.broadcaster = Broadcaster(max_clients=stream_clients or max(1, workers // 2))
+    httpd.refresher = None
+    httpd.scheduler = None
+    httpd.data_refresher = None
+    # Every refreshed forecast (all terminals) feeds the alert windows; transitions go out on /api/stream
+    httpd.alerts = AlertEngine(alert_rules)
+    httpd.alerts.subscribe(lambda event: httpd.broadcaster.publish("alert", event))
+
+    def cache_forecast(forecast):
+        # Keeps /api/airport-data (today) and the alert windows as fresh as the background fetches
+        httpd.airport_cache.put((forecast.get("terminal", DEFAULT_TERMINAL), datetime.now().strftime("%Y%m%d")),
+                                Representation.from_json(forecast, time.time()))
+        try:
+            httpd.alerts.push_forecast(forecast)
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning("Alert engine skipped forecast %s: %s", forecast.get("date"), e)
+
+    def on_refreshed_forecast(forecast):
+        # /api/stream carries the default terminal; others only refresh the cache
+        if httpd.refresher is not None and forecast.get("terminal", DEFAULT_TERMINAL) == DEFAULT_TERMINAL:
+            httpd.refresher.apply_forecast(forecast)
+        else:
+            cache_forecast(forecast)
+
+    if mode == "thread" and (stream_interval > 0 or refresh):
+        httpd.refresher = LiveRefresher(httpd.broadcaster, interval=stream_interval,
+                                        timeout=upstream_timeout, on_forecast=cache_forecast, upstream=upstream)
+    if refresh:
+        # The daemon's fetches also feed the stream, so the stream refresher
+        # thread isn't started and upstream is polled only once
+        stream = httpd.refresher
+        data_refresher = httpd.data_refresher = DataRefresher(
+            timeout=upstream_timeout,
+            upstream=upstream,
+            terminals=terminals,
+            on_forecast=on_refreshed_forecast,
+            on_parking=stream.apply_parking if stream else None)
+        httpd.scheduler = make_scheduler(data_refresher, passenger_interval, parking_interval)
+    metrics.REGISTRY.set_collector("server", lambda: collect_metrics(httpd))
+    return httpd
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Immigration Queue Manager server")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mode", choices=["thread", "single"], default="thread",
+                        help="thread: bounded worker pool (default), single: one request at a time")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="maximum concurrent requests in thread mode")
+    parser.add_argument("--upstream-timeout", type=float, default=UPSTREAM_TIMEOUT,
+                        help="timeout in seconds for each airport.kr request")
+    parser.add_argument("--upstream", default=None,
+                        help="base URL of the airport.kr pages (default: $IQM_UPSTREAM or https://www.airport.kr), "
+                             "e.g. the mock in benchmarks/upstream.py")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL,
+                        help="seconds to reuse a parsed /api/airport-data response (0 disables)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_MAX_ENTRIES,
+                        help="maximum number of dates kept in the cache")
+    parser.add_argument("--stream-interval", type=float, default=STREAM_INTERVAL,
+                        help="seconds between background refreshes for /api/stream (0 disables)")
+    parser.add_argument("--stream-clients", type=int, default=None,
+                        help="maximum concurrent /api/stream clients (default: half of --workers)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="run the data refresh daemon in-process (keeps src/data/*.json fresh)")
+    parser.add_argument("--passenger-interval", type=float, default=PASSENGER_INTERVAL,
+                        help="with --refresh: seconds between passenger fetches")
+    parser.add_argument("--parking-interval", type=float, default=PARKING_INTERVAL,
+                        help="with --refresh: seconds between parking fetches")
+    parser.add_argument("--terminals", type=parse_terminals, default=None,
+                        help="with --refresh: terminals to keep fresh, e.g. T1,T2 or all (default: T1)")
+    parser.add_argument("--alert-rules", type=load_rules, default=None,
+                        help="JSON file of alert rules (default: the dashboard's thresholds, see iqm/alerts.py)")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-dir", default=LOG_DIR,
+                        help="directory for server.log, server_error.log and server_debug.log")
+    parser.add_argument("--log-max-bytes", type=int, default=iqm_log.DEFAULT_MAX_BYTES,
+                        help="rotate each log file at this size")
+    parser.add_argument("--log-backups", type=int, default=iqm_log.DEFAULT_BACKUP_COUNT,
+                        help="rotated files kept per log")
+    parser.add_argument("--debug-rows", action="store_true",
+                        help="dump every parsed table row to server_debug.log (toggle at runtime via POST /api/logging)")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    with socketserver.TCPServer(("", PORT), ProxyHTTPRequestHandler) as httpd:
-        print(f"Serving at port {PORT}")
-        print(f"Proxy endpoint available at /api/airport-data")
-        httpd.serve_forever()
+    args = parse_args()
+    iqm_log.setup_logging(args.log_level, args.log_dir, args.log_max_bytes,
+                          args.log_backups, row_dump=args.debug_rows)
+    with make_server(args.port, args.mode, args.workers, args.upstream_timeout,
+                     args.cache_ttl, args.cache_size, args.stream_interval,
+                     args.stream_clients, args.refresh, args.passenger_interval,
+                     args.parking_interval, args.upstream, args.terminals, args.alert_rules) as httpd:
+        log.info("Serving at port %d (%s mode, %d workers)",
+                 args.port, args.mode, args.workers if args.mode == 'thread' else 1)
+        log.info("Proxy endpoint available at /api/airport-data")
+        if httpd.upstream != DEFAULT_UPSTREAM:
+            log.info("Upstream: %s", httpd.upstream)
+        if staffing is None:
+            log.warning("numpy not installed: /api/staffing and /api/sweep disabled")
+        if httpd.scheduler is not None:
+            httpd.scheduler.start()
+            log.info("Refreshing data files every %ss (passenger) / %ss (parking)",
+                     args.passenger_interval, args.parking_interval)
+        elif httpd.refresher is not None:
+            httpd.refresher.start()
+            log.info("Live stream at /api/stream (refresh every %ss while clients are connected)",
+                     args.stream_interval)
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if httpd.scheduler is not None:
+                httpd.scheduler.stop()
+            if httpd.refresher is not None:
+                httpd.refresher.stop()
+            httpd.broadcaster.close()
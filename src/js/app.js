@@ -9,10 +9,13 @@ import { Storage } from './data/storage.js';
 import { AirportDataImporter } from './data/importer.js';
 import { SampleForecast } from './data/sampleData.js';
 import { calculateAllRequirements } from './core/calculator.js';
+import { ShiftPlanner, UNAVAILABLE_STATUSES, currentHourIndex } from './core/shiftPlanner.js';
+import { PrecomputedRequirements } from './data/precomputed.js';
 import { Dashboard } from './ui/dashboard.js';
 import { StaffUI } from './ui/staff.js';
 import { ParkingUI } from './ui/parking.js';
 import { ParkingDataFetcher } from './data/parkingFetch.js';
+import { LiveStream } from './data/liveStream.js';
 
 // --- EventBus Implementation ---
 class EventBus {
@@ -44,12 +47,14 @@ class App {
     this.dashboard = new Dashboard(this.eventBus);
     this.staffUI = new StaffUI(this.eventBus);
     this.parkingUI = new ParkingUI(this.eventBus);
+    this.shiftPlanner = new ShiftPlanner();
 
     this.state = {
       settings: DefaultSettings,
       forecast: null,
       requirement: null,
       staffList: [],
+      shiftPlan: null,
       parkingData: null
     };
 
@@ -89,6 +94,8 @@ class App {
       this.bindEvents();
 
       // 4. 데이터 로드
+      // 미리 계산된 결과는 백그라운드로 받아 두고 이후 계산에서 재사용
+      PrecomputedRequirements.load();
       const savedForecast = Storage.load(STORAGE_KEYS.CURRENT_FORECAST);
       if (savedForecast) {
         console.log('Loaded saved forecast');
@@ -98,6 +105,16 @@ class App {
         this.updateForecast(SampleForecast);
       }
 
+      // 서버 실시간 업데이트 (server.py 실행 시에만 연결됨)
+      this.liveStream = new LiveStream({
+        onForecast: (forecast) => this.applyLiveForecast(forecast),
+        onParking: (parkingData) => {
+          this.state.parkingData = parkingData;
+          this.parkingUI.setData(parkingData);
+        }
+      });
+      this.liveStream.start();
+
       // 5. 직원 데이터 로드 (Local + Remote)
       const localStaff = Storage.load(STORAGE_KEYS.STAFF);
       if (localStaff && Array.isArray(localStaff)) {
@@ -197,6 +214,11 @@ class App {
     // Staff Updates (New)
     this.eventBus.on('staff:updated', (updatedList) => {
       this.state.staffList = updatedList;
+      if (this.state.shiftPlan) {
+        // 직원 추가/삭제 시 현재 시간대부터 다시 배정 (저장/렌더링은 applyShiftPlan에서)
+        this.updateShiftPlan();
+        return;
+      }
       Storage.save(STORAGE_KEYS.STAFF, updatedList);
       this.staffUI.setStaffList(updatedList);
       // Also update dashboard if needed (for assignment dropdowns)
@@ -235,18 +257,56 @@ class App {
       }
     });
 
+    // 자동 배정: 현재 시간대부터 배정표를 만들고 지금 배정을 직원 목록에 반영
+    this.eventBus.on('staff:plan', () => {
+      if (!this.state.requirement) {
+        alert('승객예고 데이터가 없어 배정할 수 없습니다.');
+        return;
+      }
+      if (this.state.staffList.length === 0) {
+        alert('등록된 직원이 없습니다.');
+        return;
+      }
+      const index = currentHourIndex(this.state.requirement);
+      this.state.shiftPlan = this.shiftPlanner.solve(this.state.requirement, this.state.staffList, index);
+      this.applyShiftPlan(index);
+    });
+
+    // 부재/복귀: 배정표가 있으면 이전 배정을 기준으로 증분 재배정
+    this.eventBus.on('staff:status', ({ staffId, status }) => {
+      const staff = this.state.staffList.find(s => s.id === staffId);
+      if (!staff) return;
+      staff.status = status;
+      if (UNAVAILABLE_STATUSES.includes(status)) staff.assignment = null;
+
+      if (this.state.shiftPlan) {
+        this.updateShiftPlan();
+        return;
+      }
+      Storage.save(STORAGE_KEYS.STAFF, this.state.staffList);
+      this.staffUI.setStaffList(this.state.staffList);
+      this.dashboard.updateStaffList(this.state.staffList);
+    });
+
     // Staff Save (New)
     this.eventBus.on('staff:save', () => {
-      if (Storage.save(STORAGE_KEYS.STAFF, this.state.staffList)) {
-        alert('직원 및 배정 데이터가 저장되었습니다.');
-      } else {
-        alert('저장에 실패했습니다.');
-      }
+      const saved = Storage.save(STORAGE_KEYS.STAFF, this.state.staffList);
+      Storage.flush();
+      saved.then(ok => {
+        if (ok) {
+          alert('직원 및 배정 데이터가 저장되었습니다.');
+        } else {
+          alert('저장에 실패했습니다.');
+        }
+      });
     });
 
     // Staff Reset (New)
     this.eventBus.on('staff:reset', () => {
       this.state.staffList = [];
+      this.state.shiftPlan = null;
+      this.shiftPlanner.clear();
+      this.staffUI.setPlan(null);
       Storage.remove(STORAGE_KEYS.STAFF);
       this.staffUI.setStaffList([]);
       this.dashboard.updateStaffList([]);
@@ -472,16 +532,65 @@ class App {
     this.recalculate();
   }
 
+  applyLiveForecast(forecast) {
+    // 직접 입력/CSV 데이터나 다른 날짜를 보고 있을 때는 덮어쓰지 않음
+    const current = this.state.forecast;
+    if (current && ['manual', 'csv'].includes(current.source)) return;
+    if (current && current.source !== 'sample' && current.date !== forecast.date) return;
+    this.updateForecast(forecast);
+  }
+
   recalculate() {
     if (!this.state.forecast) return;
 
-    console.log('Calculating requirements...');
-    const requirement = calculateAllRequirements(this.state.forecast, this.state.settings);
+    // 같은 승객예고(contentHash)와 설정이면 이전/미리 계산된 결과 재사용
+    const { forecast, settings } = this.state;
+    let requirement = PrecomputedRequirements.find(forecast, settings, [
+      this.state.requirement,
+      Storage.load(STORAGE_KEYS.CURRENT_REQUIREMENT)
+    ]);
+    if (requirement) {
+      console.log('Reusing precomputed requirements');
+    } else {
+      console.log('Calculating requirements...');
+      requirement = calculateAllRequirements(forecast, settings);
+      requirement.forecastHash = forecast.contentHash || null;
+    }
     this.state.requirement = requirement;
 
     Storage.save(STORAGE_KEYS.CURRENT_REQUIREMENT, requirement);
     this.dashboard.render(requirement);
     this.dashboard.updateManualInputTable(requirement);
+
+    // 필요 인원이 바뀌면 배정표도 현재 시간대부터 다시 계산 (날짜가 바뀌면 새로)
+    if (this.state.shiftPlan) {
+      this.updateShiftPlan();
+    }
+  }
+
+  updateShiftPlan() {
+    const { requirement, staffList } = this.state;
+    const index = currentHourIndex(requirement);
+    this.state.shiftPlan = this.shiftPlanner.update(staffList, { requirement, fromIndex: index });
+    this.applyShiftPlan(index);
+  }
+
+  applyShiftPlan(index) {
+    const current = this.shiftPlanner.assignmentsAt(index);
+    this.state.staffList.forEach(staff => {
+      if (UNAVAILABLE_STATUSES.includes(staff.status)) {
+        staff.assignment = null;
+        return;
+      }
+      const assignment = current.get(staff.id);
+      staff.status = assignment ? 'assigned' : 'idle';
+      staff.assignment = assignment || null;
+    });
+
+    Storage.save(STORAGE_KEYS.STAFF, this.state.staffList);
+    this.staffUI.setStaffList(this.state.staffList);
+    this.staffUI.setPlan(this.state.shiftPlan, index);
+    this.dashboard.updateStaffList(this.state.staffList);
   }
 
   updateActiveNav(viewName) {
@@ -132,8 +132,8 @@ export function calculateAllRequirements(forecast, settings) {
         };
     });
 
-    // 2. 연속 시간 고려한 경보 레벨 결정
-    const alertLevels = determineConsecutiveAlerts(hourlyRequirement, settings.alertThresholds);
+    // 2. 연속 시간 고려한 경보 레벨 결정 (원본 승객예고의 시간대별 total 기준)
+    const alertLevels = determineConsecutiveAlerts(forecast.hourlyData, settings.alertThresholds);
 
     // 3. 경보 레벨 병합
     hourlyRequirement.forEach(req => {
@@ -0,0 +1,291 @@
+/**
+ * src/js/core/shiftPlanner.js
+ * 심사관 구역 배정 최적화
+ *
+ * calculateAllRequirements 결과(시간대 × 구역 필요 인원)와 직원 명단으로
+ * 직원별 시간대 배정표를 만듭니다. 우선순위는
+ *   1. 부족 인원(인시) 최소화
+ *   2. 구역 이동 최소화
+ *   3. 다시 계산할 때 이미 알린 배정 유지
+ *
+ * 시간대마다 한 번 훑는 탐욕 배정입니다. 근무 가능한 직원은 어느 구역에나
+ * 설 수 있으므로 각 시간대의 부족 인원은 최소가 되고, 직전 시간대 구역 유지 →
+ * 이전 배정표 유지 → 새로 투입 → 구역 이동 순서로 채워 이동을 줄입니다.
+ * 한 직원의 상태가 바뀌면 현재 시간대부터 이전 배정표를 기준으로 다시 풀어
+ * 나머지 직원의 배정은 대부분 그대로 둡니다 (직원 수백 명도 수 ms).
+ */
+
+// 'off'(부재)는 남은 시간 전체, 'break'(휴식)는 현재 시간대만 배정하지 않음
+export const UNAVAILABLE_STATUSES = ['off', 'break'];
+export const DIRECTIONS = ['arrival', 'departure'];
+
+const now = () => (typeof performance !== 'undefined' ? performance.now() : Date.now());
+
+export function zoneKey(type, zone) {
+    return `${type}:${zone}`;
+}
+
+export function parseZoneKey(key) {
+    const [type, zone] = key.split(':');
+    return { type, zone };
+}
+
+/**
+ * 근무 시간 확인. shift = { start, end } (시, end 미포함, 자정을 넘겨도 됨)
+ * shift가 없으면 종일 근무로 봅니다.
+ */
+export function isOnShift(staff, hourStart) {
+    const shift = staff.shift;
+    if (!shift || shift.start == null || shift.end == null || shift.start === shift.end) return true;
+    return shift.start < shift.end
+        ? hourStart >= shift.start && hourStart < shift.end
+        : hourStart >= shift.start || hourStart < shift.end;
+}
+
+/**
+ * 시간대별 구역 필요 인원표
+ * @param {Object} requirement - calculateAllRequirements 결과
+ * @param {string} field - 'required' 또는 'requiredForWait' (서버 계산 결과)
+ */
+export function demandTable(requirement, field = 'required') {
+    const zones = [];
+    const hours = requirement.hourlyRequirement.map((req, index) => {
+        const demand = {};
+        DIRECTIONS.forEach(type => {
+            Object.entries(req[type] || {}).forEach(([zone, value]) => {
+                const key = zoneKey(type, zone);
+                if (!zones.includes(key)) zones.push(key);
+                const needed = value ? (value[field] ?? value.required) : 0;
+                demand[key] = Math.max(0, needed || 0);
+            });
+        });
+        return { hour: req.hour, hourStart: req.hourStart ?? index, demand };
+    });
+    return { hours, zones };
+}
+
+/**
+ * 지금 시각에 해당하는 시간대 인덱스 (없으면 0)
+ */
+export function currentHourIndex(requirement, date = new Date()) {
+    const index = requirement.hourlyRequirement.findIndex(req => req.hourStart === date.getHours());
+    return index === -1 ? 0 : index;
+}
+
+/**
+ * 배정표 계산
+ *
+ * @param {Object} requirement - calculateAllRequirements 결과
+ * @param {Array} staffList - 직원 명단 ({ id, status, shift? })
+ * @param {Object} options
+ *   fromIndex: 이 시간대부터 배정 (이전 시간대는 previous 배정 유지)
+ *   previous: 이전 planShifts 결과 (같은 날짜일 때만 사용)
+ *   maxConsecutiveHours: 연속 근무 최대 시간 (0이면 제한 없음), 넘으면 한 시간 쉼
+ *   demandField: 'required' | 'requiredForWait'
+ * @returns {Object} 배정표 (직원별 시간대 구역/부스, 시간대별 충원 현황, 부족 인시, 이동 횟수)
+ */
+export function planShifts(requirement, staffList, options = {}) {
+    const started = now();
+    const { fromIndex = 0, maxConsecutiveHours = 0, demandField = 'required' } = options;
+    const previous = options.previous && options.previous.date === requirement.date ? options.previous : null;
+    const { hours, zones } = demandTable(requirement, demandField);
+    const from = Math.min(Math.max(0, fromIndex), hours.length);
+
+    const assignments = {};
+    const booths = {};
+    const worked = new Map();
+    const streak = new Map();
+    staffList.forEach(staff => {
+        const oldZones = previous?.assignments[staff.id];
+        const oldBooths = previous?.booths[staff.id];
+        // 지난 시간대는 이전 배정 그대로
+        assignments[staff.id] = hours.map((_, i) => (i < from && oldZones?.[i]) || null);
+        booths[staff.id] = hours.map((_, i) => (i < from && oldBooths?.[i]) || null);
+        let count = 0;
+        let run = 0;
+        for (let i = 0; i < from; i++) {
+            if (assignments[staff.id][i]) {
+                count++;
+                run++;
+            } else {
+                run = 0;
+            }
+        }
+        worked.set(staff.id, count);
+        streak.set(staff.id, run);
+    });
+    const order = new Map(staffList.map((staff, i) => [staff.id, i]));
+
+    for (let i = from; i < hours.length; i++) {
+        const { hourStart, demand } = hours[i];
+        const remaining = { ...demand };
+        const placed = new Set();
+        const oldAt = (staff) => previous?.assignments[staff.id]?.[i] || null;
+        const prevAt = (staff) => (i > 0 ? assignments[staff.id][i - 1] : null);
+
+        const available = staffList.filter(staff =>
+            staff.status !== 'off' &&
+            !(staff.status === 'break' && i === from) &&
+            isOnShift(staff, hourStart) &&
+            !(maxConsecutiveHours > 0 && streak.get(staff.id) >= maxConsecutiveHours));
+        // 이전 배정표에 있던 직원 먼저, 그다음 근무 시간이 적은 직원
+        available.sort((a, b) =>
+            (oldAt(a) ? 0 : 1) - (oldAt(b) ? 0 : 1) ||
+            worked.get(a.id) - worked.get(b.id) ||
+            order.get(a.id) - order.get(b.id));
+
+        const place = (staff, key) => {
+            assignments[staff.id][i] = key;
+            remaining[key]--;
+            placed.add(staff.id);
+        };
+        const mostNeeded = () => {
+            let best = null;
+            zones.forEach(key => {
+                if (remaining[key] > 0 && (best === null || remaining[key] > remaining[best])) best = key;
+            });
+            return best;
+        };
+
+        // 1. 직전 시간대 구역 유지 (이전 배정표도 같은 구역인 직원 우선)
+        const continuing = available.filter(staff => prevAt(staff));
+        continuing.sort((a, b) => (oldAt(a) === prevAt(a) ? 0 : 1) - (oldAt(b) === prevAt(b) ? 0 : 1));
+        continuing.forEach(staff => {
+            if (remaining[prevAt(staff)] > 0) place(staff, prevAt(staff));
+        });
+        // 2. 이전 배정표 유지
+        available.forEach(staff => {
+            const old = oldAt(staff);
+            if (!placed.has(staff.id) && old && remaining[old] > 0) place(staff, old);
+        });
+        // 3. 새로 투입 (직전 시간대 비번) → 가장 부족한 구역
+        // 4. 그래도 부족하면 다른 구역에서 이동
+        [false, true].forEach(moving => {
+            available.forEach(staff => {
+                if (placed.has(staff.id) || Boolean(prevAt(staff)) !== moving) return;
+                const key = mostNeeded();
+                if (key) place(staff, key);
+            });
+        });
+
+        // 부스 번호: 같은 구역이면 직전(또는 이전 배정표의) 부스 유지, 아니면 빈 부스 중 가장 앞
+        const taken = new Map(zones.map(key => [key, new Set()]));
+        const keepBooth = (staff) => {
+            const key = assignments[staff.id][i];
+            if (i > 0 && assignments[staff.id][i - 1] === key && booths[staff.id][i - 1]) return booths[staff.id][i - 1];
+            if (oldAt(staff) === key && previous?.booths[staff.id]?.[i]) return previous.booths[staff.id][i];
+            return null;
+        };
+        const working = available.filter(staff => placed.has(staff.id));
+        const unseated = [];
+        working.forEach(staff => {
+            const booth = keepBooth(staff);
+            const used = taken.get(assignments[staff.id][i]);
+            if (booth && !used.has(booth)) {
+                used.add(booth);
+                booths[staff.id][i] = booth;
+            } else {
+                unseated.push(staff);
+            }
+        });
+        unseated.forEach(staff => {
+            const used = taken.get(assignments[staff.id][i]);
+            let booth = 1;
+            while (used.has(booth)) booth++;
+            used.add(booth);
+            booths[staff.id][i] = booth;
+        });
+
+        staffList.forEach(staff => {
+            if (placed.has(staff.id)) {
+                worked.set(staff.id, worked.get(staff.id) + 1);
+                streak.set(staff.id, streak.get(staff.id) + 1);
+            } else {
+                streak.set(staff.id, 0);
+            }
+        });
+    }
+
+    return summarizePlan({ requirement, hours, zones, from, assignments, booths, previous, started });
+}
+
+function summarizePlan({ requirement, hours, zones, from, assignments, booths, previous, started }) {
+    const coverage = hours.map(({ demand }) => {
+        const hourCoverage = {};
+        zones.forEach(key => {
+            hourCoverage[key] = { required: demand[key] || 0, assigned: 0 };
+        });
+        return hourCoverage;
+    });
+    let switches = 0;
+    let changed = 0;
+    Object.entries(assignments).forEach(([id, row]) => {
+        row.forEach((key, i) => {
+            if (key) coverage[i][key].assigned++;
+            if (key && i > 0 && row[i - 1] && row[i - 1] !== key) switches++;
+            if (previous && i >= from && (previous.assignments[id]?.[i] || null) !== key) changed++;
+        });
+    });
+    const shortageByHour = coverage.map(hourCoverage =>
+        Object.values(hourCoverage).reduce((sum, c) => sum + Math.max(0, c.required - c.assigned), 0));
+
+    return {
+        date: requirement.date,
+        hours: hours.map(h => h.hour),
+        zones,
+        fromIndex: from,
+        assignments,
+        booths,
+        coverage,
+        shortageByHour,
+        shortageHours: shortageByHour.reduce((sum, n) => sum + n, 0),
+        switches,
+        changed: previous ? changed : null,
+        elapsedMs: Math.round((now() - started) * 100) / 100
+    };
+}
+
+/**
+ * 실시간 사용용 래퍼: 마지막 배정표를 기억해 두고, 직원 상태가 바뀌면
+ * 현재 시간대부터 그 배정표를 기준으로 다시 풉니다.
+ */
+export class ShiftPlanner {
+    constructor(options = {}) {
+        this.options = options;
+        this.requirement = null;
+        this.plan = null;
+    }
+
+    solve(requirement, staffList, fromIndex = 0) {
+        this.requirement = requirement;
+        this.plan = planShifts(requirement, staffList, { ...this.options, fromIndex });
+        return this.plan;
+    }
+
+    update(staffList, { requirement = this.requirement, fromIndex = 0 } = {}) {
+        if (!requirement) return null;
+        this.requirement = requirement;
+        this.plan = planShifts(requirement, staffList, { ...this.options, fromIndex, previous: this.plan });
+        return this.plan;
+    }
+
+    clear() {
+        this.requirement = null;
+        this.plan = null;
+    }
+
+    /**
+     * 시간대 하나의 배정 (staff.assignment 형식)
+     * @returns {Map} staffId → { type, zone, booth }
+     */
+    assignmentsAt(index) {
+        const result = new Map();
+        if (!this.plan) return result;
+        Object.entries(this.plan.assignments).forEach(([id, row]) => {
+            if (row[index]) {
+                result.set(id, { ...parseZoneKey(row[index]), booth: this.plan.booths[id][index] });
+            }
+        });
+        return result;
+    }
+}
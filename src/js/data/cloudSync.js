@@ -0,0 +1,217 @@
+/**
+ * src/js/data/cloudSync.js
+ * Supabase 일괄 동기화 (직원 목록 / 설정)
+ *
+ * 변경이 생길 때마다 전체 목록을 올리지 않고, 마지막으로 서버와 맞춘 상태
+ * (기준 상태)와 비교해 바뀐 행과 삭제된 ID만 보냅니다. 짧은 시간 안에 이어진
+ * 편집은 하나의 묶음으로 합쳐서 한 번에 전송합니다.
+ */
+
+export const STAFF_TABLE = 'staff';
+export const SETTINGS_TABLE = 'settings';
+export const SETTINGS_ID = 'global_settings';
+
+const STAFF_FIELDS = ['name', 'status', 'assignment'];
+const MAX_RETRY_DELAY = 30000;
+
+/**
+ * 비교용 직렬화 (동기화 대상 필드만)
+ * @param {Object} staff
+ * @returns {string}
+ */
+function staffSignature(staff) {
+    return JSON.stringify(STAFF_FIELDS.map(field => staff[field] ?? null));
+}
+
+export class CloudSync {
+    /**
+     * @param {Object} client - Supabase 클라이언트 (from/upsert/delete/select)
+     * @param {Object} options
+     * @param {number} options.delay - 마지막 변경 후 전송까지 대기 시간(ms)
+     * @param {Function} options.onError - 전송 실패 시 호출 (연속 실패 중에는 처음 한 번만)
+     */
+    constructor(client, { delay = 800, onError = null } = {}) {
+        this.client = client;
+        this.delay = delay;
+        this.onError = onError || (() => {});
+
+        this.remoteStaff = null;      // id -> 서명, 서버에 반영된 상태 (null: 아직 모름)
+        this.remoteSettings = null;   // 서버에 반영된 설정 JSON
+        this.pendingStaff = null;     // 보낼 최신 직원 목록
+        this.pendingSettings = null;  // 보낼 최신 설정
+
+        this.timer = null;
+        this.flushing = null;         // 진행 중인 전송 Promise
+        this.waiters = [];            // 다음 전송 결과를 기다리는 resolve 함수
+        this.failures = 0;
+        this.stats = { flushes: 0, upserted: 0, deleted: 0, skipped: 0, failures: 0 };
+    }
+
+    /**
+     * 서버에서 읽은 직원 목록을 기준 상태로 기록
+     * @param {Array} staffList
+     */
+    markStaffSynced(staffList) {
+        this.remoteStaff = new Map(staffList.map(s => [s.id, staffSignature(s)]));
+    }
+
+    /**
+     * @param {Object} config
+     */
+    markSettingsSynced(config) {
+        this.remoteSettings = JSON.stringify(config);
+    }
+
+    /**
+     * 아직 보내지 않았거나 전송 중인 직원 변경이 있는지
+     * @returns {boolean}
+     */
+    hasPendingStaff() {
+        return this.pendingStaff !== null || this.flushing !== null;
+    }
+
+    /**
+     * 직원 목록 변경 예약 (이전에 예약된 목록은 덮어씀)
+     * @param {Array} staffList
+     * @returns {Promise<boolean>} 이 변경이 포함된 전송의 성공 여부
+     */
+    queueStaff(staffList) {
+        this.pendingStaff = staffList.map(s => ({ ...s }));
+        return this.schedule();
+    }
+
+    /**
+     * @param {Object} config
+     * @returns {Promise<boolean>}
+     */
+    queueSettings(config) {
+        this.pendingSettings = config;
+        return this.schedule();
+    }
+
+    schedule(delay = this.delay) {
+        const done = new Promise(resolve => this.waiters.push(resolve));
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.flush(), delay);
+        return done;
+    }
+
+    /**
+     * 예약된 변경을 즉시 전송
+     * @returns {Promise<boolean>}
+     */
+    async flush() {
+        clearTimeout(this.timer);
+        this.timer = null;
+        // 전송은 한 번에 하나씩: 진행 중이면 끝난 뒤 남은 변경을 이어서 보냄
+        while (this.flushing) await this.flushing;
+        if (!this.pendingStaff && this.pendingSettings === null) {
+            this.resolveWaiters(true);
+            return true;
+        }
+
+        const waiters = this.waiters;
+        this.waiters = [];
+        this.flushing = this.send();
+        const ok = await this.flushing;
+        this.flushing = null;
+        waiters.forEach(resolve => resolve(ok));
+        return ok;
+    }
+
+    resolveWaiters(ok) {
+        const waiters = this.waiters;
+        this.waiters = [];
+        waiters.forEach(resolve => resolve(ok));
+    }
+
+    async send() {
+        const staffList = this.pendingStaff;
+        const settings = this.pendingSettings;
+        this.pendingStaff = null;
+        this.pendingSettings = null;
+
+        try {
+            if (staffList) await this.sendStaff(staffList);
+            if (settings !== null) await this.sendSettings(settings);
+            this.stats.flushes++;
+            this.failures = 0;
+            return true;
+        } catch (error) {
+            // 전송하지 못한 변경은 더 새로운 변경이 없을 때만 되돌려 재시도
+            if (staffList && !this.pendingStaff) this.pendingStaff = staffList;
+            if (settings !== null && this.pendingSettings === null) this.pendingSettings = settings;
+            this.stats.failures++;
+            if (this.failures++ === 0) this.onError(error);
+            const retryDelay = Math.min(MAX_RETRY_DELAY, this.delay * 2 ** this.failures);
+            clearTimeout(this.timer);
+            this.timer = setTimeout(() => this.flush(), retryDelay);
+            return false;
+        }
+    }
+
+    async sendStaff(staffList) {
+        if (this.remoteStaff === null) {
+            // 기준 상태를 모르면 한 번만 서버 목록을 읽어 옴
+            const { data, error } = await this.client.from(STAFF_TABLE).select('id, ' + STAFF_FIELDS.join(', '));
+            if (error) throw error;
+            this.markStaffSynced(data || []);
+        }
+
+        const { upserts, deletes, signatures } = diffStaff(this.remoteStaff, staffList);
+        this.stats.skipped += staffList.length - upserts.length;
+
+        if (upserts.length > 0) {
+            const now = new Date().toISOString();
+            const rows = upserts.map(s => ({
+                id: s.id,
+                name: s.name,
+                status: s.status,
+                assignment: s.assignment,
+                updated_at: now
+            }));
+            const { error } = await this.client.from(STAFF_TABLE).upsert(rows);
+            if (error) throw error;
+            upserts.forEach(s => this.remoteStaff.set(s.id, signatures.get(s.id)));
+            this.stats.upserted += rows.length;
+        }
+
+        if (deletes.length > 0) {
+            const { error } = await this.client.from(STAFF_TABLE).delete().in('id', deletes);
+            if (error) throw error;
+            deletes.forEach(id => this.remoteStaff.delete(id));
+            this.stats.deleted += deletes.length;
+        }
+    }
+
+    async sendSettings(config) {
+        const serialized = JSON.stringify(config);
+        if (serialized === this.remoteSettings) return;
+        const { error } = await this.client
+            .from(SETTINGS_TABLE)
+            .upsert([{ id: SETTINGS_ID, config, updated_at: new Date().toISOString() }]);
+        if (error) throw error;
+        this.remoteSettings = serialized;
+    }
+}
+
+/**
+ * 기준 상태와 현재 목록 비교 (Map/Set 조회, O(n))
+ * @param {Map<string, string>} remote - id -> 서명
+ * @param {Array} staffList
+ * @returns {{upserts: Array, deletes: Array<string>, signatures: Map<string, string>}}
+ */
+export function diffStaff(remote, staffList) {
+    const upserts = [];
+    const signatures = new Map();
+    for (const staff of staffList) {
+        const signature = staffSignature(staff);
+        signatures.set(staff.id, signature);
+        if (remote.get(staff.id) !== signature) upserts.push(staff);
+    }
+    const deletes = [];
+    for (const id of remote.keys()) {
+        if (!signatures.has(id)) deletes.push(id);
+    }
+    return { upserts, deletes, signatures };
+}
@@ -0,0 +1,107 @@
+/**
+ * src/js/data/liveStream.js
+ * 서버 실시간 업데이트 수신 (/api/stream, Server-Sent Events)
+ *
+ * 서버(server.py)가 한 번 가져온 승객예고/주차장 데이터를 모든 대시보드에
+ * 전달합니다. 처음에 전체 스냅샷을 받고, 이후에는 바뀐 시간대/구역만 받아
+ * 현재 데이터에 반영합니다. 정적 호스팅처럼 서버가 없으면 조용히 종료합니다.
+ */
+
+export class LiveStream {
+    /**
+     * @param {Object} handlers
+     * @param {Function} handlers.onForecast - 갱신된 전체 승객예고 (PassengerForecast)
+     * @param {Function} handlers.onParking - 갱신된 전체 주차장 데이터
+     * @param {string} url - SSE 엔드포인트
+     */
+    constructor({ onForecast, onParking } = {}, url = '/api/stream') {
+        this.url = url;
+        this.onForecast = onForecast || (() => {});
+        this.onParking = onParking || (() => {});
+        this.forecast = null;
+        this.parking = null;
+        this.source = null;
+    }
+
+    start() {
+        if (typeof EventSource === 'undefined' || this.source) return;
+
+        let opened = false;
+        this.source = new EventSource(this.url);
+        this.source.onopen = () => { opened = true; };
+        this.source.onerror = () => {
+            // 한 번도 연결되지 않았다면 서버가 없는 환경: 재시도하지 않음
+            // (연결 후 끊긴 경우는 EventSource가 자동 재연결 후 스냅샷을 다시 받음)
+            if (!opened) this.stop();
+        };
+
+        this.source.addEventListener('snapshot', (e) => {
+            const { forecast, parking } = JSON.parse(e.data);
+            if (forecast) this.setForecast(forecast);
+            if (parking) this.setParking(parking);
+        });
+        this.source.addEventListener('forecast', (e) => this.applyForecastDiff(JSON.parse(e.data)));
+        this.source.addEventListener('parking', (e) => this.applyParkingDiff(JSON.parse(e.data)));
+    }
+
+    stop() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+    }
+
+    setForecast(forecast) {
+        this.forecast = { ...forecast, source: 'live-stream' };
+        this.onForecast(this.forecast);
+    }
+
+    setParking(parking) {
+        this.parking = parking;
+        this.onParking(parking);
+    }
+
+    /**
+     * 변경된 시간대 행만 교체 (hourStart 기준)
+     * @param {Object} diff - { full } 또는 { date, lastUpdated, contentHash, hours, removed }
+     */
+    applyForecastDiff(diff) {
+        if (diff.full) {
+            this.setForecast(diff.full);
+            return;
+        }
+        if (!this.forecast || this.forecast.date !== diff.date) return;
+
+        const rows = new Map(this.forecast.hourlyData.map(row => [row.hourStart, row]));
+        diff.hours.forEach(row => rows.set(row.hourStart, row));
+        (diff.removed || []).forEach(hourStart => rows.delete(hourStart));
+
+        this.setForecast({
+            ...this.forecast,
+            lastUpdated: diff.lastUpdated,
+            contentHash: diff.contentHash,
+            hourlyData: [...rows.values()].sort((a, b) => a.hourStart - b.hourStart)
+        });
+    }
+
+    /**
+     * 바뀐 주차 가능 대수만 반영 ("shortTerm.floor1" 형태의 경로)
+     * @param {Object} diff - { full } 또는 { lastUpdated, errors, changes }
+     */
+    applyParkingDiff(diff) {
+        if (diff.full) {
+            this.setParking(diff.full);
+            return;
+        }
+        if (!this.parking) return;
+
+        const parking = JSON.parse(JSON.stringify(this.parking));
+        Object.entries(diff.changes).forEach(([path, available]) => {
+            const target = path.split('.').reduce((node, key) => (node ? node[key] : null), parking);
+            if (target) target.available = available;
+        });
+        parking.lastUpdated = diff.lastUpdated;
+        parking.errors = diff.errors;
+        this.setParking(parking);
+    }
+}
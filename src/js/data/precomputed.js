@@ -0,0 +1,83 @@
+/**
+ * src/js/data/precomputed.js
+ * 미리 계산된 필요 인원 결과 재사용 (src/data/latest_requirements.json)
+ *
+ * 데이터 업데이트 스크립트가 기본 설정으로 계산한 결과를 승객예고의
+ * contentHash와 함께 저장합니다. 현재 승객예고의 contentHash와 계산 관련
+ * 설정이 같으면 calculateAllRequirements를 다시 실행하지 않습니다.
+ */
+
+// 계산 결과에 영향을 주는 설정 키 (theme, language 등은 제외)
+const CALCULATION_KEYS = [
+    'serviceRates',
+    'targetWaitTime',
+    'targetUtilization',
+    'autoGateRatio',
+    'foreignRatio',
+    'alertThresholds'
+];
+
+/**
+ * 키 순서와 무관한 JSON 문자열
+ * @param {any} value
+ * @returns {string}
+ */
+function stableStringify(value) {
+    if (Array.isArray(value)) {
+        return `[${value.map(stableStringify).join(',')}]`;
+    }
+    if (value && typeof value === 'object') {
+        return `{${Object.keys(value).sort().map(k => `${JSON.stringify(k)}:${stableStringify(value[k])}`).join(',')}}`;
+    }
+    return JSON.stringify(value);
+}
+
+/**
+ * 계산 관련 설정만 뽑은 비교용 키
+ * @param {Object} settings
+ * @returns {string}
+ */
+export function settingsKey(settings = {}) {
+    const picked = {};
+    CALCULATION_KEYS.forEach(key => { picked[key] = settings[key]; });
+    return stableStringify(picked);
+}
+
+export const PrecomputedRequirements = {
+    path: 'src/data/latest_requirements.json',
+    data: null,
+
+    /**
+     * 미리 계산된 결과 파일 로드 (없거나 실패하면 null)
+     * @returns {Promise<Object|null>}
+     */
+    async load() {
+        try {
+            const response = await fetch(this.path, { cache: 'no-cache' });
+            if (!response.ok) return null;
+            const data = await response.json();
+            this.data = data && data.requirement ? data : null;
+        } catch (error) {
+            console.warn('Precomputed requirements unavailable:', error.message);
+            this.data = null;
+        }
+        return this.data;
+    },
+
+    /**
+     * 승객예고/설정에 맞는 기존 계산 결과 찾기
+     * @param {Object} forecast - 현재 승객예고 (contentHash 포함 시에만 재사용)
+     * @param {Object} settings - 현재 설정
+     * @param {Array<Object>} candidates - 이전 계산 결과들 (localStorage 등)
+     * @returns {Object|null} 재사용 가능한 StaffRequirement
+     */
+    find(forecast, settings, candidates = []) {
+        if (!forecast || !forecast.contentHash) return null;
+        const key = settingsKey(settings);
+        const pool = [...candidates, this.data && this.data.requirement];
+        const match = pool.find(req =>
+            req && req.forecastHash === forecast.contentHash && settingsKey(req.parameters) === key);
+        if (!match) return null;
+        return { ...match, forecastId: forecast.id };
+    }
+};
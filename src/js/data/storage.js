@@ -1,17 +1,33 @@
 /**
  * src/js/data/storage.js
- * LocalStorage 관리 모듈
+ * LocalStorage 관리 모듈 (Supabase 동기화는 cloudSync.js)
  */
 
 import { STORAGE_KEYS } from '../config.js';
 import { supabase } from './supabaseClient.js';
+import { CloudSync } from './cloudSync.js';
+
+// 원격 저장은 CloudSync가 모아서 변경분만 전송
+const cloudSync = new CloudSync(supabase, {
+    onError: (error) => {
+        console.error('Supabase save failed:', error);
+        alert(`로컬에는 저장되었으나 클라우드 동기화에 실패했습니다. 잠시 후 다시 시도합니다.\n오류: ${error.message || JSON.stringify(error)}`);
+    }
+});
+
+if (typeof window !== 'undefined') {
+    // 탭을 닫거나 숨길 때 대기 중인 변경을 바로 전송
+    window.addEventListener('pagehide', () => cloudSync.flush());
+}
 
 export const Storage = {
+    sync: cloudSync,
+
     /**
-     * 데이터 저장 (Supabase + LocalStorage)
-     * @param {string} key - 저장 키 ('staff' or 'settings')
+     * 데이터 저장 (LocalStorage 즉시 + Supabase는 묶어서 변경분만)
+     * @param {string} key - 저장 키 (STORAGE_KEYS)
      * @param {any} data - 저장할 데이터
-     * @returns {Promise<boolean>} 성공 여부
+     * @returns {Promise<boolean>} 이 변경이 포함된 클라우드 전송의 성공 여부
      */
     async save(key, data) {
         // 1. LocalStorage에 즉시 저장 (Optimistic update)
@@ -21,67 +37,22 @@ export const Storage = {
             console.error('LocalStorage save failed:', e);
         }
 
-        // 2. Supabase에 저장
-        try {
-            if (key === STORAGE_KEYS.STAFF) {
-                if (Array.isArray(data)) {
-                    // 1. Upsert (Insert or Update)
-                    const updates = data.map(s => ({
-                        id: s.id,
-                        name: s.name,
-                        status: s.status,
-                        assignment: s.assignment,
-                        updated_at: new Date().toISOString()
-                    }));
-
-                    const { error: upsertError } = await supabase
-                        .from('staff')
-                        .upsert(updates);
-
-                    if (upsertError) throw upsertError;
-
-                    // 2. Delete (Sync: Remove items not in the current list)
-                    // 'not.in' filter can be brittle. Instead, we fetch remote IDs and delete the diff.
-                    const { data: remoteStaff, error: fetchError } = await supabase
-                        .from('staff')
-                        .select('id');
-
-                    if (fetchError) throw fetchError;
-
-                    const remoteIds = remoteStaff.map(r => r.id);
-                    const localIds = data.map(s => s.id);
-
-                    // Find IDs that are in DB but not in our new list
-                    const idsToDelete = remoteIds.filter(id => !localIds.includes(id));
-
-                    if (idsToDelete.length > 0) {
-                        const { error: deleteError } = await supabase
-                            .from('staff')
-                            .delete()
-                            .in('id', idsToDelete);
-
-                        if (deleteError) throw deleteError;
-                    }
-                }
-            } else if (key === STORAGE_KEYS.SETTINGS) {
-                const { error } = await supabase
-                    .from('settings')
-                    .upsert([{
-                        id: 'global_settings',
-                        config: data,
-                        updated_at: new Date().toISOString()
-                    }]);
-
-                if (error) throw error;
-            }
-
-            return true;
-        } catch (error) {
-            console.error('Supabase save failed:', error);
-            // Local save already happened at the beginning of the function
-            alert(`로컬에는 저장되었으나 클라우드 동기화에 실패했습니다.\n오류: ${error.message || JSON.stringify(error)}`);
-            return false;
+        // 2. Supabase 전송 예약 (연속된 편집은 한 번에 전송)
+        if (key === STORAGE_KEYS.STAFF && Array.isArray(data)) {
+            return cloudSync.queueStaff(data);
         }
+        if (key === STORAGE_KEYS.SETTINGS) {
+            return cloudSync.queueSettings(data);
+        }
+        return true;
+    },
+
+    /**
+     * 대기 중인 클라우드 변경을 즉시 전송
+     * @returns {Promise<boolean>}
+     */
+    flush() {
+        return cloudSync.flush();
     },
 
     /**
@@ -107,6 +78,7 @@ export const Storage = {
             if (key === STORAGE_KEYS.STAFF) {
                 const { data, error } = await supabase.from('staff').select('*');
                 if (error) throw error;
+                cloudSync.markStaffSynced(data || []);
                 return data;
             } else if (key === STORAGE_KEYS.SETTINGS) {
                 const { data, error } = await supabase
@@ -115,6 +87,7 @@ export const Storage = {
                     .eq('id', 'global_settings')
                     .single();
                 if (error) throw error;
+                if (data?.config) cloudSync.markSettingsSynced(data.config);
                 return data?.config || null;
             }
         } catch (error) {
@@ -136,7 +109,9 @@ export const Storage = {
                 { event: '*', schema: 'public', table: 'staff' },
                 (payload) => {
                     console.log('Staff change received:', payload);
-                    this.fetchLatest('staff').then(data => {
+                    // 보낼 변경이 남아 있으면 로컬 편집이 우선 (전송 후 다시 알림이 옴)
+                    if (cloudSync.hasPendingStaff()) return;
+                    this.fetchLatest(STORAGE_KEYS.STAFF).then(data => {
                         if (data) onStaffChange(data);
                     });
                 }
@@ -147,6 +122,7 @@ export const Storage = {
                 (payload) => {
                     console.log('Settings change received:', payload);
                     if (payload.new && payload.new.config) {
+                        cloudSync.markSettingsSynced(payload.new.config);
                         onSettingsChange(payload.new.config);
                     }
                 }
@@ -4,11 +4,23 @@
  */
 
 import { generateUUID } from '../utils/helpers.js';
+import { parseZoneKey } from '../core/shiftPlanner.js';
+
+const STATUS_BADGES = {
+  idle: { label: '대기', background: 'rgba(16, 185, 129, 0.2)', color: '#10b981' },
+  assigned: { label: '배정됨', background: 'rgba(59, 130, 246, 0.2)', color: '#3b82f6' },
+  break: { label: '휴식', background: 'rgba(245, 158, 11, 0.2)', color: '#f59e0b' },
+  off: { label: '부재', background: 'rgba(148, 163, 184, 0.2)', color: '#94a3b8' }
+};
+
+const pad = (hour) => String(hour).padStart(2, '0');
 
 export class StaffUI {
   constructor(eventBus) {
     this.eventBus = eventBus;
     this.staffList = [];
+    this.plan = null;
+    this.planIndex = 0;
     // this.container will be initialized in render()
 
     this.bindEvents();
@@ -21,6 +33,17 @@ export class StaffUI {
     this.render();
   }
 
+  /**
+   * 자동 배정 결과 요약 표시
+   * @param {Object|null} plan - planShifts 결과
+   * @param {number} index - 현재 시간대 인덱스
+   */
+  setPlan(plan, index = 0) {
+    this.plan = plan;
+    this.planIndex = index;
+    this.render();
+  }
+
   bindEvents() {
     // Add Staff Button (Event delegation or direct bind if element exists)
     document.addEventListener('click', (e) => {
@@ -31,6 +54,13 @@ export class StaffUI {
         const id = e.target.dataset.id;
         this.handleDeleteStaff(id);
       }
+      if (e.target.classList.contains('btn-toggle-status')) {
+        const { id, status } = e.target.dataset;
+        this.eventBus.emit('staff:status', { staffId: id, status });
+      }
+      if (e.target.id === 'btn-plan-staff') {
+        this.eventBus.emit('staff:plan');
+      }
       if (e.target.id === 'btn-save-staff') {
         this.eventBus.emit('staff:save');
       }
@@ -55,10 +85,19 @@ export class StaffUI {
     const newStaff = {
       id: generateUUID(),
       name: name,
-      status: 'idle', // idle, assigned
+      status: 'idle', // idle, assigned, break, off
       assignment: null // { type: 'arrival'|'departure', zone: 'A', booth: 1 }
     };
 
+    // 근무 시간 (선택, 비우면 종일)
+    const startInput = document.getElementById('new-staff-shift-start');
+    const endInput = document.getElementById('new-staff-shift-end');
+    if (startInput && endInput && startInput.value !== '' && endInput.value !== '') {
+      newStaff.shift = { start: Number(startInput.value) % 24, end: Number(endInput.value) % 24 };
+      startInput.value = '';
+      endInput.value = '';
+    }
+
     this.staffList.push(newStaff);
     this.eventBus.emit('staff:updated', this.staffList);
 
@@ -74,6 +113,33 @@ export class StaffUI {
     this.render();
   }
 
+  renderPlanSummary() {
+    if (!this.plan) return '';
+    const plan = this.plan;
+    const coverage = plan.coverage[this.planIndex] || {};
+    const cells = plan.zones.map(key => {
+      const { type, zone } = parseZoneKey(key);
+      const { required, assigned } = coverage[key] || { required: 0, assigned: 0 };
+      const color = assigned < required ? 'var(--color-danger)' : 'var(--color-success)';
+      return `
+        <div style="padding: 0.5rem; background: rgba(255,255,255,0.05); border-radius: var(--radius-sm); text-align: center;">
+          <div style="font-size: 0.8rem; color: var(--color-text-secondary);">${type === 'arrival' ? '입국' : '출국'} ${zone}</div>
+          <div style="font-weight: bold; color: ${color};">${assigned} / ${required}</div>
+        </div>`;
+    }).join('');
+
+    return `
+        <div class="staff-plan" style="background: var(--color-bg-card); padding: 1rem; border-radius: var(--radius-md); margin-bottom: 1rem;">
+          <div style="display: flex; justify-content: space-between; margin-bottom: 0.5rem; font-size: 0.9rem;">
+            <span style="font-weight: bold;">자동 배정 (${plan.hours[this.planIndex] || '-'}, 배정 / 필요)</span>
+            <span style="color: var(--color-text-secondary);">
+              부족 ${plan.shortageHours}인시 · 구역 이동 ${plan.switches}회 · ${plan.elapsedMs}ms
+            </span>
+          </div>
+          <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 0.5rem;">${cells}</div>
+        </div>`;
+  }
+
   render() {
     if (!this.container) {
       this.container = document.getElementById('view-staff');
@@ -102,42 +168,56 @@ export class StaffUI {
 
         <div class="add-staff-form" style="display: flex; gap: 0.5rem; margin-bottom: 1rem;">
           <input type="text" id="new-staff-name" placeholder="직원 이름 입력" style="flex: 1; padding: 0.8rem; border-radius: var(--radius-sm); border: 1px solid var(--border-color); background: var(--color-bg-input); color: var(--color-text-primary);">
+          <input type="number" id="new-staff-shift-start" min="0" max="23" placeholder="근무 시작(시)" style="width: 7rem; padding: 0.8rem; border-radius: var(--radius-sm); border: 1px solid var(--border-color); background: var(--color-bg-input); color: var(--color-text-primary);">
+          <input type="number" id="new-staff-shift-end" min="0" max="23" placeholder="종료(시)" style="width: 6rem; padding: 0.8rem; border-radius: var(--radius-sm); border: 1px solid var(--border-color); background: var(--color-bg-input); color: var(--color-text-primary);">
           <button id="btn-add-staff" style="padding: 0 1.5rem; background: var(--color-primary); color: white; border: none; border-radius: var(--radius-sm); font-weight: bold;">추가</button>
         </div>
 
         <div class="staff-actions" style="display: flex; justify-content: flex-end; gap: 0.5rem; margin-bottom: 1rem;">
+            <button id="btn-plan-staff" style="padding: 0.5rem 1rem; background: var(--color-primary); color: white; border: none; border-radius: var(--radius-sm); cursor: pointer;">자동 배정</button>
             <button id="btn-save-staff" style="padding: 0.5rem 1rem; background: var(--color-success); color: white; border: none; border-radius: var(--radius-sm); cursor: pointer;">저장</button>
             <button id="btn-reset-staff" style="padding: 0.5rem 1rem; background: var(--color-danger); color: white; border: none; border-radius: var(--radius-sm); cursor: pointer;">초기화</button>
         </div>
 
+        ${this.renderPlanSummary()}
+
         <div class="staff-list" style="background: var(--color-bg-card); border-radius: var(--radius-md); overflow: hidden;">
           <table style="width: 100%; border-collapse: collapse;">
             <thead>
               <tr style="background: rgba(255,255,255,0.05); text-align: left;">
                 <th style="padding: 1rem;">이름</th>
+                <th style="padding: 1rem;">근무</th>
                 <th style="padding: 1rem;">상태</th>
                 <th style="padding: 1rem;">배정 현황</th>
                 <th style="padding: 1rem; text-align: right;">관리</th>
               </tr>
             </thead>
             <tbody>
-              ${this.staffList.length === 0 ? '<tr><td colspan="4" style="padding: 2rem; text-align: center; color: var(--color-text-muted);">등록된 직원이 없습니다.</td></tr>' : ''}
-              ${this.staffList.map(staff => `
+              ${this.staffList.length === 0 ? '<tr><td colspan="5" style="padding: 2rem; text-align: center; color: var(--color-text-muted);">등록된 직원이 없습니다.</td></tr>' : ''}
+              ${this.staffList.map(staff => {
+                const badge = STATUS_BADGES[staff.status] || STATUS_BADGES.idle;
+                const away = staff.status === 'off' || staff.status === 'break';
+                return `
                 <tr style="border-top: 1px solid var(--border-color);">
                   <td style="padding: 1rem; font-weight: 500;">${staff.name}</td>
+                  <td style="padding: 1rem; font-size: 0.9rem; color: var(--color-text-secondary);">
+                    ${staff.shift ? `${pad(staff.shift.start)}~${pad(staff.shift.end)}시` : '종일'}
+                  </td>
                   <td style="padding: 1rem;">
-                    <span style="padding: 0.2rem 0.6rem; border-radius: 1rem; font-size: 0.8rem; background: ${staff.status === 'idle' ? 'rgba(16, 185, 129, 0.2)' : 'rgba(59, 130, 246, 0.2)'}; color: ${staff.status === 'idle' ? '#10b981' : '#3b82f6'};">
-                      ${staff.status === 'idle' ? '대기' : '배정됨'}
+                    <span style="padding: 0.2rem 0.6rem; border-radius: 1rem; font-size: 0.8rem; background: ${badge.background}; color: ${badge.color};">
+                      ${badge.label}
                     </span>
                   </td>
                   <td style="padding: 1rem; font-size: 0.9rem; color: var(--color-text-secondary);">
                     ${staff.assignment ? `${staff.assignment.type === 'arrival' ? '입국' : '출국'} - ${staff.assignment.zone} (부스 ${staff.assignment.booth})` : '-'}
                   </td>
                   <td style="padding: 1rem; text-align: right;">
+                    <button class="btn-toggle-status" data-id="${staff.id}" data-status="${away ? 'idle' : 'off'}" style="background: none; border: 1px solid var(--border-color); border-radius: var(--radius-sm); color: var(--color-text-secondary); cursor: pointer; padding: 0.2rem 0.6rem;">${away ? '복귀' : '부재'}</button>
                     <button class="btn-delete-staff" data-id="${staff.id}" style="background: none; border: none; color: var(--color-danger); cursor: pointer;">🗑️</button>
                   </td>
                 </tr>
-              `).join('')}
+              `;
+              }).join('')}
             </tbody>
           </table>
         </div>
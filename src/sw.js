@@ -1,74 +1,183 @@
 /**
  * src/sw.js
  * Service Worker for Offline Support
+ *
+ * 정적 자산: 서버가 만드는 ./asset-manifest.json(파일 경로 → 내용 해시)과
+ * 캐시에 저장해 둔 이전 목록을 비교해, 해시가 바뀐 파일만 다시 받습니다.
+ * 버전 번호를 올릴 필요가 없고, 페이지를 열 때마다(최대 MANIFEST_CHECK_INTERVAL에
+ * 한 번) 목록을 확인합니다. 목록에 있는 파일은 캐시 우선이고, 목록에 없는 파일과
+ * 목록을 받을 수 없는 경우(정적 호스팅 등 server.py 없이 배포)에는
+ * stale-while-revalidate로 받아 오래된 JS/CSS가 계속 남지 않게 합니다.
+ * 페이지(HTML)는 네트워크 우선, 오프라인이면 캐시.
+ *
+ * 데이터(latest_data.json, parking_data.json, latest_requirements.json)와 조회 API:
+ * stale-while-revalidate. 캐시된 응답을 바로 돌려주고, 뒤에서 ETag로 재검증해
+ * (If-None-Match → 304면 그대로) 바뀌었을 때만 캐시를 교체합니다. 조회 API는
+ * 쿼리(날짜 등)마다 따로 저장되므로 MAX_DATA_ENTRIES개를 넘으면 오래된 것부터 지웁니다.
  */
 
-const CACHE_NAME = 'iqm-cache-v48';
-const STATIC_ASSETS = [
-    './',
-    './index.html',
-    './css/main.css',
-    './css/variables.css',
-    './css/responsive.css',
-    './js/app.js',
-    './js/config.js',
-    './js/data/storage.js',
-    './js/data/importer.js',
-    './js/data/sampleData.js',
-    './js/core/calculator.js',
-    './js/core/queueModel.js',
-    './js/core/alertSystem.js',
-    './js/ui/dashboard.js',
-    './js/ui/chart.js',
-    './js/ui/components.js',
-    './js/ui/settings.js',
-    './js/utils/helpers.js',
-    './manifest.json',
-    'https://cdn.jsdelivr.net/npm/chart.js' // 외부 CDN 캐싱
-];
-
-// 설치
+const ASSET_CACHE = 'iqm-assets';
+const DATA_CACHE = 'iqm-data';
+const MANIFEST_URL = new URL('./asset-manifest.json', self.location).href;
+const MANIFEST_CHECK_INTERVAL = 60 * 1000; // ms
+const MAX_DATA_ENTRIES = 60;
+
+// stale-while-revalidate 대상 (경로 끝부분 기준, T2는 data/T2/...)
+const DATA_PATTERN = /\/data\/(T\d\/)?(latest_data|parking_data|latest_requirements)\.json$/;
+const API_SWR_PATHS = ['/api/airport-data', '/api/staffing', '/api/history', '/api/parking-history'];
+
+let lastManifestCheck = 0;
+let manifestCheck = null;
+let managedAssets = null; // 자산 목록으로 갱신하는 URL (쿼리 제외)
+
+// 설치: 바뀐 자산만 받아 두고 바로 활성화
 self.addEventListener('install', (event) => {
     console.log('[Service Worker] Installing...');
     event.waitUntil(
-        caches.open(CACHE_NAME)
-            .then(cache => {
-                console.log('[Service Worker] Caching app shell');
-                return cache.addAll(STATIC_ASSETS);
-            })
+        syncAssets()
+            .catch(error => console.log('[Service Worker] Asset manifest unavailable', error))
             .then(() => self.skipWaiting())
     );
 });
 
-// 활성화
+// 활성화: 예전 버전 캐시(iqm-cache-vNN) 정리
 self.addEventListener('activate', (event) => {
     console.log('[Service Worker] Activating...');
     event.waitUntil(
         caches.keys()
             .then(keys => Promise.all(
-                keys.filter(key => key !== CACHE_NAME)
+                keys.filter(key => key !== ASSET_CACHE && key !== DATA_CACHE)
                     .map(key => caches.delete(key))
             ))
             .then(() => self.clients.claim())
     );
 });
 
-// 요청 가로채기 (Cache First 전략)
 self.addEventListener('fetch', (event) => {
-    // API 요청 등은 제외하고 정적 자산 위주로 캐싱
-    // 여기서는 모든 요청에 대해 캐시 우선 시도
-    event.respondWith(cacheFirst(event.request));
+    const { request } = event;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+
+    if (url.origin !== self.location.origin) {
+        // 외부 리소스(CDN)는 주소에 버전이 들어 있으므로 캐시 우선
+        event.respondWith(cacheFirst(request));
+        return;
+    }
+    if (url.href === MANIFEST_URL) return;
+    if (DATA_PATTERN.test(url.pathname) || API_SWR_PATHS.some(path => url.pathname.includes(path))) {
+        event.respondWith(staleWhileRevalidate(event, request, DATA_CACHE, MAX_DATA_ENTRIES));
+        return;
+    }
+    // 그 밖의 API(특히 /api/stream 같은 스트림)는 서비스 워커를 거치지 않음
+    if (url.pathname.includes('/api/')) return;
+
+    // 페이지를 열 때 자산 목록 확인 (응답은 기다리지 않음)
+    if (request.mode === 'navigate') {
+        event.waitUntil(checkAssets());
+        event.respondWith(networkFirst(request));
+        return;
+    }
+    event.respondWith(handleAsset(event, request));
 });
 
+/**
+ * 자산 목록에 있는 파일만 캐시 우선 (목록이 갱신을 맡음)
+ */
+async function handleAsset(event, request) {
+    const url = new URL(request.url);
+    const managed = await loadManagedAssets();
+    if (managed.has(url.origin + url.pathname)) return cacheFirst(request);
+    return staleWhileRevalidate(event, request, ASSET_CACHE);
+}
+
+async function loadManagedAssets() {
+    if (!managedAssets) {
+        const stored = await (await caches.open(ASSET_CACHE)).match(MANIFEST_URL);
+        managedAssets = assetUrls(stored ? (await stored.json()).assets || {} : {});
+    }
+    return managedAssets;
+}
+
+function assetUrls(assets) {
+    return new Set(Object.keys(assets).map(path => new URL(path, self.location).href));
+}
+
+/**
+ * 자산 목록이 바뀌었으면 바뀐 파일만 다시 받기 (동시에 한 번만, 간격 제한)
+ */
+function checkAssets() {
+    if (manifestCheck || Date.now() - lastManifestCheck < MANIFEST_CHECK_INTERVAL) {
+        return manifestCheck || Promise.resolve();
+    }
+    lastManifestCheck = Date.now();
+    manifestCheck = syncAssets()
+        .catch(error => console.log('[Service Worker] Asset check failed', error))
+        .finally(() => { manifestCheck = null; });
+    return manifestCheck;
+}
+
+async function syncAssets() {
+    const cache = await caches.open(ASSET_CACHE);
+    const stored = await cache.match(MANIFEST_URL);
+    const previous = stored ? (await stored.json()).assets || {} : {};
+
+    const headers = stored && stored.headers.get('ETag') ? { 'If-None-Match': stored.headers.get('ETag') } : {};
+    const response = await fetch(MANIFEST_URL, { cache: 'no-store', headers });
+    if (response.status === 304) return;
+    if (!response.ok) {
+        // 목록이 없어졌으면(정적 호스팅으로 옮김 등) 캐시 우선을 멈추고 재검증으로 전환
+        await cache.delete(MANIFEST_URL);
+        managedAssets = new Set();
+        throw new Error(`asset manifest: HTTP ${response.status}`);
+    }
+    const manifest = await response.json();
+    const assets = manifest.assets || {};
+
+    // 캐시된 해시를 기록해 두고, 받지 못한 파일은 다음 확인 때 다시 시도
+    const cached = {};
+    const changed = Object.keys(assets).filter(path => previous[path] !== assets[path]);
+    await Promise.all(Object.keys(assets).map(async path => {
+        if (!changed.includes(path)) {
+            cached[path] = assets[path];
+            return;
+        }
+        try {
+            const assetResponse = await fetch(new URL(path, self.location), { cache: 'no-cache' });
+            if (!assetResponse.ok) return;
+            await cache.put(new URL(path, self.location).href, assetResponse);
+            cached[path] = assets[path];
+        } catch (error) {
+            console.log('[Service Worker] Asset fetch failed', path, error);
+        }
+    }));
+
+    // 목록에서 빠진 파일 삭제
+    await Promise.all(Object.keys(previous)
+        .filter(path => !(path in assets))
+        .map(path => cache.delete(new URL(path, self.location).href)));
+
+    const complete = Object.keys(cached).length === Object.keys(assets).length;
+    await cache.put(MANIFEST_URL, new Response(JSON.stringify({ version: manifest.version, assets: cached }), {
+        headers: {
+            'Content-Type': 'application/json',
+            // 일부만 받았으면 ETag를 남기지 않아 다음 확인 때 전체 목록을 다시 비교
+            ...(complete && response.headers.get('ETag') ? { ETag: response.headers.get('ETag') } : {})
+        }
+    }));
+    managedAssets = assetUrls(cached);
+    console.log(`[Service Worker] Assets updated: ${changed.length} changed, ${Object.keys(assets).length} total`);
+}
+
 async function cacheFirst(request) {
-    const cached = await caches.match(request);
+    // 자산은 쿼리(?v=...)와 무관하게 같은 파일
+    const cached = await caches.match(request, { ignoreSearch: true });
     if (cached) return cached;
 
     try {
         const response = await fetch(request);
         // 유효한 응답만 캐싱 (CDN 등 외부 리소스 포함)
-        if (response && response.status === 200 && response.type === 'basic') {
-            const cache = await caches.open(CACHE_NAME);
+        if (response && response.status === 200 && (response.type === 'basic' || response.type === 'cors')) {
+            const cache = await caches.open(ASSET_CACHE);
             cache.put(request, response.clone());
         }
         return response;
@@ -78,3 +187,62 @@ async function cacheFirst(request) {
         return new Response('Offline', { status: 503, statusText: 'Service Unavailable' });
     }
 }
+
+async function networkFirst(request) {
+    try {
+        const response = await fetch(request);
+        // 리다이렉트된 응답은 페이지 요청에 다시 쓸 수 없으므로 저장하지 않음
+        if (response.ok && response.type === 'basic' && !response.redirected) {
+            const cache = await caches.open(ASSET_CACHE);
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        console.log('[Service Worker] Network request failed', error);
+        const cached = await caches.match(request, { ignoreSearch: true });
+        return cached || new Response('Offline', { status: 503, statusText: 'Service Unavailable' });
+    }
+}
+
+/**
+ * 캐시된 응답을 바로 반환하고 ETag로 재검증. 캐시가 없으면 네트워크 응답을 기다림.
+ * maxEntries > 0이면 저장 후 가장 오래전에 갱신된 항목부터 지워 개수를 제한.
+ */
+async function staleWhileRevalidate(event, request, cacheName, maxEntries = 0) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    const revalidate = revalidateData(cache, request, cached, maxEntries);
+    if (cached) {
+        event.waitUntil(revalidate.catch(error => console.log('[Service Worker] Revalidate failed', error)));
+        return cached;
+    }
+    try {
+        return await revalidate;
+    } catch (error) {
+        console.log('[Service Worker] Network request failed', error);
+        return new Response(JSON.stringify({ error: 'Offline' }), {
+            status: 503,
+            headers: { 'Content-Type': 'application/json' }
+        });
+    }
+}
+
+async function revalidateData(cache, request, cached, maxEntries) {
+    const etag = cached && cached.headers.get('ETag');
+    const response = await fetch(request.url, {
+        cache: 'no-store',
+        headers: etag ? { 'If-None-Match': etag } : {}
+    });
+    if (response.status === 304 && cached) return cached;
+    if (response.ok) {
+        await cache.put(request, response.clone());
+        if (maxEntries > 0) await trimCache(cache, maxEntries);
+    }
+    return response;
+}
+
+// cache.keys()는 저장한 순서 (다시 저장하면 맨 뒤로)
+async function trimCache(cache, maxEntries) {
+    const keys = await cache.keys();
+    await Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)));
+}
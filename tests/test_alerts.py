@@ -0,0 +1,111 @@
+"""Sliding-window rules, revisions and batch validation in iqm.alerts."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from iqm.alerts import AlertEngine, default_rules
+
+START = datetime(2026, 10, 17, 6)
+
+
+def hours(n, start=START, minutes=60):
+    return [start + timedelta(minutes=minutes * i) for i in range(n)]
+
+
+def levels(engine, series="T1", scope="total"):
+    scopes = engine.state(series)["series"][series]["scopes"]
+    return {alert["time"]: alert["level"] for alert in scopes[scope]["alerts"]}
+
+
+def feed(engine, totals, series="T1", minutes=60):
+    events = []
+    for when, total in zip(hours(len(totals), minutes=minutes), totals):
+        events += engine.push(series, when, {"total": total}, resolution=minutes)
+    return events
+
+
+def test_default_rules_match_consecutive_alerts():
+    # determineConsecutiveAlerts: one-hour levels, > yellow twice -> yellow, > orange twice -> red
+    engine = AlertEngine(default_rules())
+    feed(engine, [7000, 7700, 7700, 8300, 8300, 100])
+    times = [when.isoformat() for when in hours(6)]
+    assert levels(engine) == {times[0]: "blue", times[1]: "yellow", times[2]: "yellow",
+                              times[3]: "orange", times[4]: "red"}
+
+
+def test_mean_window_needs_every_slot():
+    engine = AlertEngine([{"name": "busy", "scope": "total", "level": "orange", "threshold": 100, "window": 2}])
+    events = feed(engine, [1000, 50, 40])
+    # The first hour has no previous hour; (1000 + 50) / 2 fires; (50 + 40) / 2 clears
+    assert [(e["time"][11:16], e["previous"], e["level"]) for e in events] == [
+        ("07:00", "normal", "orange"), ("08:00", "orange", "normal")]
+
+
+def test_all_window():
+    engine = AlertEngine([{"name": "run", "scope": "total", "level": "red", "threshold": 100,
+                           "window": 2, "mode": "all", "op": ">"}])
+    feed(engine, [150, 90, 150, 150, 100])
+    assert list(levels(engine)) == [hours(4)[3].isoformat()]
+
+
+def test_sub_hourly_samples_are_scaled_to_hourly_rates():
+    engine = AlertEngine([{"name": "rate", "scope": "total", "level": "blue", "threshold": 100, "window": 0.25}])
+    feed(engine, [20, 30], minutes=15)   # 80/h, then 120/h
+    assert list(levels(engine)) == [hours(2, minutes=15)[1].isoformat()]
+    # A one-hour window spans four 15-minute slots
+    hourly = AlertEngine([{"name": "rate", "scope": "total", "level": "blue", "threshold": 100}])
+    feed(hourly, [20, 30, 30, 30], minutes=15)
+    assert list(levels(hourly)) == [hours(4, minutes=15)[3].isoformat()]
+
+
+def test_revision_matches_replay():
+    rules = default_rules() + [{"name": "mean-3h", "scope": "total", "level": "orange",
+                                "threshold": 8000, "window": 3}]
+    live = AlertEngine(rules)
+    totals = [7000, 8300, 8300, 8300, 7000, 6000]
+    feed(live, totals)
+    revised = live.push("T1", hours(6)[2], {"total": 5000})
+    assert revised and all(event["revised"] for event in revised)
+    totals[2] = 5000
+    replay = AlertEngine(rules)
+    feed(replay, totals)
+    assert live.state() == replay.state()
+
+
+def test_unchanged_revision_is_a_no_op():
+    engine = AlertEngine()
+    feed(engine, [9000, 9000])
+    assert engine.push("T1", hours(2)[1], {"total": 9000}) == []
+
+
+@pytest.mark.parametrize("bad", [
+    ("2026-10-17T07:00", [1, 2]),
+    ("2026-10-17T07:00", {"total": float("nan")}),
+    ("2026-10-17T07:00", {"total": -1}),
+    ("2026-10-17T07:00", {"nowhere": 1}),
+    ("2026-10-17T07:30", {"total": 1}),
+    ("yesterday", {"total": 1}),
+    ("2026-10-17T07:00+09:00", {"total": 1}),
+])
+def test_batch_is_validated_before_anything_is_applied(bad):
+    engine = AlertEngine()
+    with pytest.raises(ValueError):
+        engine.push_many("T1", [("2026-10-17T06:00", {"total": 9000}), bad])
+    assert engine.stats()["samples"] == 0
+    assert engine.state()["series"] == {}
+
+
+def test_resolution_is_fixed_per_series():
+    engine = AlertEngine()
+    engine.push("gates", START, {"total": 1}, resolution=15)
+    with pytest.raises(ValueError):
+        engine.push("gates", START + timedelta(hours=1), {"total": 1})
+
+
+def test_subscribers_receive_transitions():
+    engine = AlertEngine()
+    received = []
+    engine.subscribe(received.append)
+    events = feed(engine, [9000, 100])
+    assert received == events and [e["level"] for e in events] == ["red", "normal"]
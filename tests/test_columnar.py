@@ -0,0 +1,41 @@
+"""HourlyColumns round trips (records, save/load, between)."""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from iqm.columnar import HourlyColumns  # noqa: E402
+
+LATEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "data", "latest_data.json")
+KEYS = ("date", "terminal", "lastUpdated", "hourlyData", "contentHash")
+
+
+def records(days=3):
+    with open(LATEST, encoding="utf-8") as f:
+        base = json.load(f)
+    out = []
+    for i in range(days):
+        record = {key: base[key] for key in KEYS if key in base}
+        record["date"] = f"2026-07-{i + 1:02d}"
+        record["contentHash"] = f"hash-{i}"
+        out.append(record)
+    return out
+
+
+def test_records_round_trip():
+    original = records()
+    assert HourlyColumns.from_records(original).to_records() == original
+
+
+def test_save_load_round_trip(tmp_path):
+    original = records()
+    HourlyColumns.from_records(original).save(str(tmp_path))
+    assert HourlyColumns.load(str(tmp_path)).to_records() == original
+
+
+def test_between_keeps_metadata():
+    original = records(5)
+    assert HourlyColumns.from_records(original).between("2026-07-02", "2026-07-03").to_records() == original[1:3]
@@ -0,0 +1,75 @@
+"""Parser backends agree with each other, and the terminal check."""
+
+import os
+
+import pytest
+
+from iqm import parser
+from iqm.parser import BACKENDS, check_page_terminal, extract_table_rows, page_terminal, parse_airport_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+PASSENGER_PAGES = ("883_passenger.html", "883_passenger_no_id.html")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def available_backends():
+    backends = [backend for backend in BACKENDS if backend != "lxml" or parser.lxml_html is not None]
+    if "bs4" in backends:
+        try:
+            import bs4  # noqa: F401
+        except ImportError:
+            backends.remove("bs4")
+    return backends
+
+
+@pytest.mark.parametrize("name", PASSENGER_PAGES)
+def test_backends_agree(name):
+    html = read_fixture(name)
+    results = {backend: parse_airport_html(html, "20260724", backend=backend)["hourlyData"]
+               for backend in available_backends()}
+    expected = results.pop("stream")
+    assert len(expected) == 24
+    for backend, rows in results.items():
+        assert rows == expected, backend
+
+
+def test_backends_agree_on_rows():
+    html = read_fixture("883_passenger.html")
+    rows = {backend: extract_table_rows(html, backend) for backend in available_backends()}
+    assert all(value == rows["stream"] for value in rows.values())
+
+
+def test_missing_table():
+    with pytest.raises(ValueError):
+        parse_airport_html("<html><body><p>점검 중</p></body></html>")
+
+
+def test_content_hash_ignores_last_updated():
+    html = read_fixture("883_passenger.html")
+    first = parse_airport_html(html, "20260724")
+    second = parse_airport_html(html, "20260724")
+    assert first["contentHash"] == second["contentHash"]
+
+
+def test_page_terminal():
+    html = read_fixture("883_passenger.html")
+    assert page_terminal(html) == "T1"
+    t2 = html.replace('<option value="T1" selected>', '<option value="T1">').replace(
+        '<option value="T2">', '<option value="T2" selected>')
+    assert page_terminal(t2) == "T2"
+    assert page_terminal("<table id='userEx'></table>") is None
+
+
+def test_page_for_another_terminal_is_rejected():
+    html = read_fixture("883_passenger.html")
+    with pytest.raises(ValueError, match="T2"):
+        parse_airport_html(html, "20260724", terminal="T2")
+    # A page that doesn't name its terminal is only trusted for T1
+    check_page_terminal("<html></html>", "T1")
+    with pytest.raises(ValueError):
+        check_page_terminal("<html></html>", "T2")
+    assert parse_airport_html(html, "20260724", terminal="T2", check_terminal=False)["terminal"] == "T2"
@@ -0,0 +1,112 @@
+"""400 responses of the JSON POST endpoints (no upstream requests are made)."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import server
+
+FORECAST_ROW = {"hour": "06~07", "hourStart": 6,
+                "arrival": {"AB": 100, "C": 100, "D": 100, "EF": 100, "total": 400},
+                "departure": {"AB": 100, "C": 100, "D": 100, "EF": 100, "total": 400}}
+FORECAST = {"date": "2026-10-17", "hourlyData": [FORECAST_ROW]}
+
+
+@pytest.fixture(scope="module")
+def base_url(tmp_path_factory):
+    root = tmp_path_factory.mktemp("src")
+    directory, server.DIRECTORY = server.DIRECTORY, str(root)
+    httpd = server.make_server(port=0, workers=4, stream_interval=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    server.DIRECTORY = directory
+
+
+def post(base_url, path, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(base_url + path, data=data, method="POST",
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def sample(time="2026-10-17T08:00", values=None):
+    return {"time": time, "values": {"total": 2100} if values is None else values}
+
+
+@pytest.mark.parametrize("body", [
+    [1],
+    {"samples": [sample()]},                                           # no series
+    {"series": "T1", "samples": [sample()]},                           # forecast-fed series
+    {"series": "t2", "samples": [sample()]},
+    {"series": "gates", "samples": []},
+    {"series": "gates", "samples": ["x"]},
+    {"series": "gates", "samples": [sample(values=[1, 2])]},
+    {"series": "gates", "samples": [sample(values={"total": "many"})]},
+    {"series": "gates", "samples": [sample(time="soon")]},
+    {"series": "gates", "resolution": 15, "samples": [sample(), sample("2026-10-17T08:07")]},
+    {"series": "gates", "resolution": "x", "samples": [sample()]},
+])
+def test_alert_samples_rejected(base_url, body):
+    status, payload = post(base_url, "/api/alerts", body)
+    assert status == 400 and "error" in payload
+
+
+def test_alert_batch_is_atomic(base_url):
+    status, _ = post(base_url, "/api/alerts", {"series": "atomic", "samples": [sample(), sample(values=[1])]})
+    assert status == 400
+    status, payload = post(base_url, "/api/alerts", {"series": "atomic", "resolution": 15,
+                                                     "samples": [sample(), sample("2026-10-17T08:15")]})
+    # The rejected batch didn't create the series with 60-minute slots
+    assert status == 200 and payload["samples"] == 2
+
+
+@pytest.mark.parametrize("body", [
+    [1],
+    {"settings": [1, 2]},
+    {"forecast": [1]},
+    {"forecast": {"date": "2026-10-17"}},
+    {"forecast": {"hourlyData": [1]}},
+    {"forecast": {"hourlyData": [{"arrival": [1]}]}},
+    {"forecast": FORECAST, "settings": {"foreignRatio": 5}},
+])
+def test_staffing_rejected(base_url, body):
+    pytest.importorskip("numpy")
+    status, payload = post(base_url, "/api/staffing", body)
+    assert status == 400 and "error" in payload
+
+
+def test_staffing_accepts_forecast(base_url):
+    pytest.importorskip("numpy")
+    status, payload = post(base_url, "/api/staffing", {"forecast": FORECAST, "settings": {"autoGateRatio": 0.3}})
+    assert status == 200 and len(payload["hourlyRequirement"]) == 1
+
+
+@pytest.mark.parametrize("body", [
+    [1],
+    {"grid": {"autoGateRatio": [0.2]}, "settings": [1], "forecast": FORECAST},
+    {"grid": {"autoGateRatio": [0.2]}, "forecast": [1]},
+    {"grid": {"nonsense": [1]}, "forecast": FORECAST},
+    {"grid": {"autoGateRatio": [0.2]}, "start": "2026-07-10", "end": "2026-07-01"},
+    {"grid": {"autoGateRatio": [0.2]}, "start": "2026-01-01", "end": "2026-12-31"},
+    {"grid": {"autoGateRatio": [0.2]}, "start": "July"},
+])
+def test_sweep_rejected(base_url, body):
+    pytest.importorskip("numpy")
+    status, payload = post(base_url, "/api/sweep", body)
+    assert status == 400 and "error" in payload
+
+
+@pytest.mark.parametrize("body", [[1], "DEBUG", {"level": "NOPE"}, {"level": True}, b"{"])
+def test_logging_update_rejected(base_url, body):
+    status, payload = post(base_url, "/api/logging", body)
+    assert status == 400 and "error" in payload
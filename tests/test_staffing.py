@@ -0,0 +1,85 @@
+"""iqm.staffing against hand-computed Erlang B/C and M/M/c values."""
+
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from iqm.staffing import (alert_levels, compute_requirements, erlang_b_table, min_servers_for_wait,  # noqa: E402
+                          required_staff, wait_minutes_table)
+
+LATEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "data", "latest_data.json")
+
+
+def test_erlang_b():
+    # B(c, A) for A = 2 Erlangs: 1, 2/3, 2/5, 4/19, 2/21
+    table = erlang_b_table(np.array(2.0), max_servers=4)
+    assert table == pytest.approx([1, 2 / 3, 2 / 5, 4 / 19, 2 / 21])
+
+
+def test_erlang_b_stays_finite_under_heavy_load():
+    table = erlang_b_table(np.array(500.0))
+    assert np.isfinite(table).all() and (table >= 0).all() and (table <= 1).all()
+
+
+def test_mm1_wait():
+    # M/M/1 with lambda = 30/h, mu = 60/h: Wq = rho / (mu - lambda) = 1 min
+    assert wait_minutes_table(np.array(30.0), np.array(60.0), max_servers=1)[1] == pytest.approx(1.0)
+
+
+def test_mmc_wait():
+    # lambda = 2/h, mu = 1/h, c = 3: Erlang C = 4/9, Wq = C / (c mu - lambda) h = 26.67 min
+    table = wait_minutes_table(np.array(2.0), np.array(1.0), max_servers=4)
+    assert table[3] == pytest.approx(4 / 9 * 60)
+    # c = 4: C = 4/23, Wq = C / 2 h
+    assert table[4] == pytest.approx(4 / 23 / 2 * 60)
+    # Unstable (c <= a): infinite wait
+    assert np.isinf(table[1]) and np.isinf(table[2])
+
+
+def test_no_arrivals_no_wait():
+    assert (wait_minutes_table(np.array(0.0), np.array(1.0), max_servers=3) == 0).all()
+
+
+def test_min_servers_for_wait():
+    lam, mu = np.array([2.0, 2.0, 2.0]), np.array([1.0, 1.0, 1.0])
+    # 26.7 min at c = 3, 5.2 min at c = 4
+    assert min_servers_for_wait(lam, mu, np.array([30.0, 20.0, 5.0])).tolist() == [3, 4, 5]
+    # Never below ceil(lambda / mu), and capped by max_servers
+    assert int(min_servers_for_wait(np.array(2.5), np.array(1.0), 1000.0)) == 3
+    assert int(min_servers_for_wait(np.array(500.0), np.array(1.0), 1.0, max_servers=100)) == 500
+
+
+def test_required_staff():
+    # 1000 passengers, 20% auto gates, 80% utilisation of 50/h booths: 800 / 40 = 20
+    assert int(required_staff(1000, 50.0, 0.8, 0.2)) == 20
+    assert int(required_staff(1, 50.0, 0.8, 0.2)) == 1     # at least one booth when anyone arrives
+    assert int(required_staff(0, 50.0, 0.8, 0.2)) == 0
+
+
+def test_alert_levels():
+    thresholds = {"blue": 7000, "yellow": 7600, "orange": 8200, "red": 8600}
+    assert alert_levels([7000, 7700, 7700, 8300, 8300, 100], thresholds).tolist() == [1, 2, 2, 3, 4, 0]
+
+
+def test_compute_requirements_wait_targets():
+    with open(LATEST, encoding="utf-8") as f:
+        forecast = json.load(f)
+    result = compute_requirements(forecast)
+    settings = result["parameters"]
+    target, auto_gate = settings["targetWaitTime"], settings["autoGateRatio"]
+    assert len(result["hourlyRequirement"]) == len(forecast["hourlyData"])
+    for hour in result["hourlyRequirement"]:
+        for direction in ("arrival", "departure"):
+            for zone in hour[direction].values():
+                lam = zone["passengers"] * (1 - auto_gate)
+                if lam <= 0:
+                    continue
+                waits = wait_minutes_table(np.array(lam), np.array(zone["serviceRate"]))
+                booths = zone["requiredForWait"]
+                # The smallest stable booth count that meets the target
+                assert waits[booths] <= target
+                assert booths == np.ceil(lam / zone["serviceRate"]) or waits[booths - 1] > target
+                assert zone["expectedWait"] == pytest.approx(waits[zone["required"]], abs=1e-3)